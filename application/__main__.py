@@ -0,0 +1,4 @@
+import sys
+from application.cli import main
+
+sys.exit(main())
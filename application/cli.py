@@ -0,0 +1,215 @@
+""" Simply Done on the command line. Works without Qt, for scripts and cron jobs.
+
+Usage:
+    python -m application [--db PATH] add "Buy milk" [--priority High] [--status "To Do"] [--due 2024/05/01]
+    python -m application list [--status "To Do"] [--priority High] [--order-by priority] [--limit 20]
+    python -m application move ID STATUS [--after ID | --before ID]
+    python -m application delete ID [ID ...]
+    python -m application import FILE [--format csv|jsonl] [--no-upsert]
+    python -m application export FILE [--format csv|jsonl]
+    python -m application stats
+    python -m application batch < commands.txt
+
+batch reads one add, move, delete or list command per line from stdin, e.g. `add "Buy milk" --priority High`, and applies
+all of them in a single transaction. If one command fails, none is applied. Empty lines and lines starting with # are
+skipped. Use - as FILE to import from stdin or export to stdout.
+"""
+import argparse
+import io
+import shlex
+import sqlite3
+import sys
+from application.controller.task_manager import TaskManager
+from application.model.database_manager import DatabaseManager, DatabaseError, DURABILITY_PROFILES, resolve_db_path
+from application.model.todo_item import parse_due_date
+from application.model.transfer import detect_format
+
+# Rows fetched per query by the list command
+LIST_PAGE_SIZE = 1000
+
+
+class CommandError(Exception):
+    """ Raised for a command line that cannot be parsed. argparse exits the process instead, which batch must not do."""
+
+
+class CommandParser(argparse.ArgumentParser):
+    """ An ArgumentParser that raises CommandError instead of exiting, so batch can report the failing line."""
+
+    def error(self, message):
+        raise CommandError(message)
+
+
+def run_add(task_manager, arguments, out):
+    """ Create a ToDoItem and print its ID."""
+    todo_item = task_manager.create_todo_item(arguments.title, arguments.priority, arguments.status, parse_due_date(arguments.due))
+    print(todo_item.id, file=out)
+
+
+def run_list(task_manager, arguments, out):
+    """ Print the matching ToDoItems as tab-separated lines of ID, status, priority, due date and title."""
+    remaining = arguments.limit
+    after_key = None
+    while remaining is None or remaining > 0:
+        page_size = LIST_PAGE_SIZE if remaining is None else min(remaining, LIST_PAGE_SIZE)
+        todo_items = task_manager.query_todo_items(status=arguments.status, priority=arguments.priority, order_by=arguments.order_by,
+                                                   limit=page_size, after_key=after_key)
+        for todo_item in todo_items:
+            print(todo_item.id, todo_item.status or '', todo_item.priority or '', todo_item.due_date_text or '', todo_item.title,
+                  sep='\t', file=out)
+        if len(todo_items) < page_size:
+            break
+        if remaining is not None:
+            remaining -= len(todo_items)
+        after_key = DatabaseManager.page_key(todo_items[-1], arguments.order_by)
+
+
+def run_move(task_manager, arguments, out):
+    """ Move a ToDoItem to a status, at the end of its column or next to another ToDoItem."""
+    task_manager.move_todo_item(arguments.id, arguments.status, arguments.after, arguments.before)
+
+
+def run_delete(task_manager, arguments, out):
+    """ Delete ToDoItems and print how many were deleted."""
+    print(task_manager.delete_todo_items(arguments.ids), file=out)
+
+
+def run_import(task_manager, arguments, out):
+    """ Import a CSV or JSON Lines file and print the number of imported ToDoItems."""
+    format = arguments.format or ('csv' if arguments.file == '-' else detect_format(arguments.file))
+    with _open(arguments.file, 'r') as file:
+        count = task_manager.import_todo_items(file, format, upsert=arguments.upsert, progress=_progress('Imported'))
+    print(count, file=out)
+
+
+def run_export(task_manager, arguments, out):
+    """ Export all ToDoItems to a CSV or JSON Lines file."""
+    format = arguments.format or ('csv' if arguments.file == '-' else detect_format(arguments.file))
+    with _open(arguments.file, 'w') as file:
+        task_manager.export_todo_items(file, format, progress=_progress('Exported'))
+
+
+def run_stats(task_manager, arguments, out):
+    """ Print the number of ToDoItems per status and in total."""
+    counts = task_manager.count_todo_items_by_status()
+    for status, count in counts.items():
+        print(f"{status or '(no status)'}\t{count}", file=out)
+    print(f"Total\t{sum(counts.values())}", file=out)
+
+
+def run_batch(task_manager, arguments, out):
+    """ Run the commands read from stdin in one transaction. A failing line rolls back all of them."""
+    parser = build_parser(BATCH_COMMANDS, parser_class=CommandParser)
+    output = io.StringIO()  # Printed after the commit, so a failed batch does not print IDs that were rolled back
+    with task_manager.transaction():
+        for line_number, line in enumerate(sys.stdin, 1):
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            try:
+                command = parser.parse_args(shlex.split(line))
+                command.run(task_manager, command, output)
+            except (CommandError, ValueError, DatabaseError, sqlite3.Error) as e:
+                raise CommandError(f"line {line_number}: {describe_error(e)}") from e
+    out.write(output.getvalue())
+
+
+def add_add_arguments(parser):
+    parser.add_argument('title')
+    parser.add_argument('--priority', help="High, Medium or Low")
+    parser.add_argument('--status', default='To Do', help="The column of the task (default: To Do)")
+    parser.add_argument('--due', help="The due date as YYYY/MM/DD")
+
+
+def add_list_arguments(parser):
+    parser.add_argument('--status', help="Only list tasks with this status")
+    parser.add_argument('--priority', help="Only list tasks with this priority")
+    parser.add_argument('--order-by', default='id', choices=['id', 'title', 'priority', 'status', 'due_date', 'position'])
+    parser.add_argument('--limit', type=int, help="List at most this many tasks")
+
+
+def add_move_arguments(parser):
+    parser.add_argument('id', type=int)
+    parser.add_argument('status')
+    neighbour = parser.add_mutually_exclusive_group()
+    neighbour.add_argument('--after', type=int, metavar='ID', help="Place the task after this task of the column")
+    neighbour.add_argument('--before', type=int, metavar='ID', help="Place the task before this task of the column")
+
+
+def add_delete_arguments(parser):
+    parser.add_argument('ids', type=int, nargs='+', metavar='id')
+
+
+def add_transfer_arguments(parser, upsert):
+    parser.add_argument('file', help="The file path, or - for stdin/stdout")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension, csv for -")
+    if upsert:
+        parser.add_argument('--no-upsert', dest='upsert', action='store_false',
+                            help="Insert every row as a new task instead of replacing the task with the same ID")
+
+
+# The commands as (name, help, function adding the arguments, function running the command)
+COMMANDS = [
+    ('add', "Add a task and print its ID", add_add_arguments, run_add),
+    ('list', "List tasks as tab-separated lines", add_list_arguments, run_list),
+    ('move', "Move a task to a status", add_move_arguments, run_move),
+    ('delete', "Delete tasks", add_delete_arguments, run_delete),
+    ('import', "Import tasks from a CSV or JSON Lines file", lambda parser: add_transfer_arguments(parser, upsert=True), run_import),
+    ('export', "Export all tasks to a CSV or JSON Lines file", lambda parser: add_transfer_arguments(parser, upsert=False), run_export),
+    ('stats', "Print the number of tasks per status", lambda parser: None, run_stats),
+    ('batch', "Run commands from stdin in a single transaction", lambda parser: None, run_batch),
+]
+
+# The commands allowed on the lines of a batch
+BATCH_COMMANDS = [command for command in COMMANDS if command[0] in ('add', 'list', 'move', 'delete')]
+
+
+def build_parser(commands=COMMANDS, parser_class=argparse.ArgumentParser):
+    """ Return a parser for the commands. The parsed arguments carry the function running the command as run."""
+    parser = parser_class(prog='python -m application', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True, parser_class=parser_class)
+    for name, help, add_arguments, run in commands:
+        subparser = subparsers.add_parser(name, help=help, description=help)
+        add_arguments(subparser)
+        subparser.set_defaults(run=run)
+    return parser
+
+
+def describe_error(error):
+    """ Return the message of an error, followed by the message of the exception a DatabaseError wraps."""
+    if isinstance(error, DatabaseError) and error.original_exception is not None:
+        return f"{error.message} {error.original_exception}"
+    return str(error)
+
+
+def main(argv=None, out=sys.stdout):
+    """ Run one command line and return the exit code: 0 on success, 1 if the command failed. Failures, including files
+        and databases that cannot be opened, are reported as one error line instead of a traceback."""
+    parser = build_parser()
+    parser.add_argument('--db', help="Path of the SQLite database. Defaults to the TODO_DB_PATH environment variable or todo_list.db")
+    parser.add_argument('--durability', choices=list(DURABILITY_PROFILES), default='safe', help="The SQLite durability profile")
+    arguments = parser.parse_args(argv)
+    task_manager = None
+    try:
+        task_manager = TaskManager(DatabaseManager(resolve_db_path(arguments.db), durability=arguments.durability))
+        arguments.run(task_manager, arguments, out)
+    except (CommandError, ValueError, DatabaseError, OSError, sqlite3.Error) as e:
+        print(f"error: {describe_error(e)}", file=sys.stderr)
+        return 1
+    finally:
+        if task_manager is not None:
+            task_manager.db_manager.close_connection()
+    return 0
+
+
+def _open(path, mode):
+    """ Open a transfer file, where - stands for stdin or stdout. The standard streams are not closed afterwards."""
+    if path == '-':
+        stream = sys.stdin if mode == 'r' else sys.stdout
+        return open(stream.fileno(), mode, newline='', closefd=False)
+    return open(path, mode, newline='', encoding='utf-8')
+
+
+def _progress(verb):
+    """ Return a progress callback that reports to stderr, or None if stderr is not a terminal."""
+    if not sys.stderr.isatty():
+        return None
+    return lambda count: print(f"\r{verb} {count} tasks", end='', file=sys.stderr, flush=True)
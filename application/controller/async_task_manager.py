@@ -0,0 +1,123 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from application.controller.task_manager import TaskManager
+from application.model.database_manager import DatabaseManager
+
+
+class AsyncTaskManager:
+    """ This class offers the operations of a TaskManager as coroutines, for asyncio services that embed the task store.
+
+        SQLite calls block, so every call runs on a thread of an executor owned by this class instead of the event loop.
+        Reads run on a pool of max_readers threads; the ConnectionPool gives every thread its own reader connection, so in
+        WAL mode concurrent reads neither wait for each other nor for a write in progress. Writes run on a single thread in
+        the order they were awaited, so they never queue up on the writer lock while holding a reader thread.
+        A write has been committed when its coroutine returns, so reads awaited after it see its result."""
+
+    def __init__(self, task_manager=None, max_readers=4):
+        """ Create the executors.
+        Args:
+            task_manager (TaskManager, DatabaseManager or str): The TaskManager to wrap. A DatabaseManager or a database path is
+                passed to a new TaskManager, and without one the path is resolved as in TaskManager.
+            max_readers (int): The number of reads that run at the same time. Further reads wait for a free thread."""
+        if not isinstance(task_manager, TaskManager):
+            task_manager = TaskManager(task_manager)
+        self.task_manager = task_manager
+        self._readers = ThreadPoolExecutor(max_readers, thread_name_prefix='todo-reader')
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix='todo-writer')
+
+    async def _read(self, function, *args, **kwargs):
+        """ Run a blocking read on the reader threads and return its result."""
+        return await asyncio.get_running_loop().run_in_executor(self._readers, functools.partial(function, *args, **kwargs))
+
+    async def _write(self, function, *args, **kwargs):
+        """ Run a blocking write on the writer thread and return its result."""
+        return await asyncio.get_running_loop().run_in_executor(self._writer, functools.partial(function, *args, **kwargs))
+
+    async def create_todo_item(self, title, priority=None, status=None, due_date=None):
+        """ Create a ToDoItem and return it. See TaskManager.create_todo_item."""
+        return await self._write(self.task_manager.create_todo_item, title, priority, status, due_date)
+
+    async def create_todo_items(self, todo_items):
+        """ Insert many ToDoItems in a single transaction and return their IDs. See TaskManager.create_todo_items."""
+        return await self._write(self.task_manager.create_todo_items, list(todo_items))
+
+    async def get_todo_item(self, id):
+        """ Return the ToDoItem with the ID. See TaskManager.get_todo_item."""
+        return await self._read(self.task_manager.get_todo_item, id)
+
+    async def update_todo_item(self, id, title, priority, status, due_date):
+        """ Update a ToDoItem. Fields that are None keep their value. See TaskManager.update_todo_item."""
+        return await self._write(self.task_manager.update_todo_item, id, title, priority, status, due_date)
+
+    async def update_todo_status(self, id, status):
+        """ Change the status of a ToDoItem."""
+        return await self._write(self.task_manager.update_todo_status, id, status)
+
+    async def move_todo_item(self, id, status, after_id=None, before_id=None):
+        """ Move a ToDoItem to a status and between two ToDoItems of that column. See TaskManager.move_todo_item."""
+        return await self._write(self.task_manager.move_todo_item, id, status, after_id, before_id)
+
+    async def delete_todo_item(self, id):
+        """ Delete the ToDoItem with the ID."""
+        return await self._write(self.task_manager.delete_todo_item, id)
+
+    async def delete_todo_items(self, ids):
+        """ Delete many ToDoItems in a single transaction and return the number of deleted rows."""
+        return await self._write(self.task_manager.delete_todo_items, list(ids))
+
+    async def list_todo_items(self):
+        """ Return all ToDoItems as a list. Use iter_todo_items for large boards."""
+        return await self._read(self.task_manager.list_todo_items)
+
+    async def query_todo_items(self, status=None, priority=None, due_before=None, due_after=None, order_by='id', limit=None, after_key=None):
+        """ Return one page of ToDoItems matching the filters. See TaskManager.query_todo_items."""
+        return await self._read(self.task_manager.query_todo_items, status=status, priority=priority, due_before=due_before,
+                                due_after=due_after, order_by=order_by, limit=limit, after_key=after_key)
+
+    async def search_todo_items(self, query, limit=50):
+        """ Return the ToDoItems whose title matches the query. See TaskManager.search_todo_items."""
+        return await self._read(self.task_manager.search_todo_items, query, limit)
+
+    async def sort_todo_items_by_due_date(self):
+        """ Return all ToDoItems sorted by due date."""
+        return await self._read(self.task_manager.sort_todo_items_by_due_date)
+
+    async def sort_todo_items_by_priority(self):
+        """ Return all ToDoItems sorted by priority."""
+        return await self._read(self.task_manager.sort_todo_items_by_priority)
+
+    async def iter_todo_items(self, batch_size=500, order_by='id', **filters):
+        """ Yield the ToDoItems matching the filters one by one, reading one keyset page of batch_size items per executor call.
+        No cursor is held between pages, so a slow consumer blocks neither a reader thread nor writers. Items changed while
+        iterating are seen in their state at the time their page is read.
+        Args:
+            batch_size (int): The number of items per page.
+            order_by (str): The field to sort by, as in query_todo_items.
+            filters: status, priority, due_before and due_after, as in query_todo_items.
+        Yields:
+            ToDoItem: The ToDoItems in sort order."""
+        after_key = None
+        while True:
+            todo_items = await self.query_todo_items(order_by=order_by, limit=batch_size, after_key=after_key, **filters)
+            for todo_item in todo_items:
+                yield todo_item
+            if len(todo_items) < batch_size:
+                return
+            after_key = DatabaseManager.page_key(todo_items[-1], order_by)
+
+    async def close(self, close_database=True):
+        """ Wait for the pending calls, stop the executor threads and close the database connections.
+        Args:
+            close_database (bool): False keeps the connections open, e.g. when the TaskManager is shared with other code."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._writer.shutdown)
+        await loop.run_in_executor(None, self._readers.shutdown)
+        if close_database:
+            self.task_manager.db_manager.close_connection()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
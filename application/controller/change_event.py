@@ -0,0 +1,30 @@
+class ChangeEvent:
+    """ This class describes a change of ToDoItems. The TaskManager passes one to its subscribers after every write and for
+        every batch of changes that another connection, e.g. a second instance of the application, wrote to the database.
+
+        kind is one of CREATED, UPDATED, STATUS_CHANGED, DELETED or RESET. RESET means that the changed items are not known,
+        e.g. after all items were deleted, so views should reload. todo_items holds the changed ToDoItems when the writer
+        already has them, otherwise views read the items by their IDs."""
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    STATUS_CHANGED = 'status_changed'
+    DELETED = 'deleted'
+    RESET = 'reset'
+
+    __slots__ = ('kind', 'ids', 'todo_items', 'external')
+
+    def __init__(self, kind, ids=(), todo_items=(), external=False):
+        """ Initialize the event.
+            Args:
+                kind (str): The kind of change, one of the constants of this class.
+                ids (iterable): The IDs of the changed ToDoItems.
+                todo_items (iterable): The changed ToDoItems in their new state, if known.
+                external (bool): True if the change was written by another connection."""
+        self.kind = kind
+        self.ids = tuple(ids)
+        self.todo_items = tuple(todo_items)
+        self.external = external
+
+    def __repr__(self):
+        return f"ChangeEvent({self.kind!r}, ids={self.ids!r}, external={self.external!r})"
@@ -1,17 +1,121 @@
-import arrow
-from application.model.todo_item import ToDoItem
-from application.model.database_manager import DatabaseManager, DatabaseError
+import threading
+from contextlib import contextmanager
+from application.model.todo_item import ToDoItem, DueDateFormatError, parse_due_date
+from application.model.database_manager import DatabaseManager, DatabaseError, resolve_db_path
+from application.model import transfer
+from application.controller.todo_item_cache import TodoItemCache
+from application.controller.change_event import ChangeEvent
 
 class TaskManager:
     """ This class is responsible for managing the ToDoItems in the application. It interacts with the DatabaseManager to perform CRUD operations on the ToDoItems."""
     
-    def __init__(self, db_manager):
-        """ The constructor initializes the DatabaseManager object.
+    def __init__(self, db_manager=None, cache_size=1024):
+        """ The constructor initializes the DatabaseManager object and the cache of ToDoItems.
+        The application creates one DatabaseManager and shares it between all components, so pass the instance wherever possible.
         Args:
-            db_manager (DatabaseManager): An instance of the DatabaseManager class. """
-            
-        self.db_manager = DatabaseManager('/Users/sebastianahlburg/Documents/Studium/Studium Informatik/IU/Module/Projekt Software Engineering/ToDo_Application/todo_list.db') 
+            db_manager (DatabaseManager or str): An instance of the DatabaseManager class, or the path of the database to open.
+                Without a path, the path is taken from the TODO_DB_PATH environment variable or defaults to todo_list.db.
+            cache_size (int): The number of ToDoItems kept in memory for get_todo_item, 0 disables the cache. """
+        if not isinstance(db_manager, DatabaseManager):
+            db_manager = DatabaseManager(resolve_db_path(db_manager))
+        self.db_manager = db_manager
+        self.cache = TodoItemCache(cache_size)  # Filled by reads, invalidated by every write of this TaskManager
+        self._subscribers = []
+        self._poll_lock = threading.Lock()
+        # The state of the database this TaskManager has seen, to find the changes of other connections
+        self._data_version, self._last_change = self.db_manager.change_state()
+
+    def cache_stats(self):
+        """ This method returns the hit and miss counters of the ToDoItem cache, its size and its capacity as a dict."""
+        return self.cache.stats()
+
+    def get_stats(self):
+        """ This method returns the statistics of this TaskManager as a dict: the cache counters under 'cache' and, if SQL
+        instrumentation is on (see DatabaseManager and the TODO_SQL_STATS environment variable), the per-statement counts,
+        latencies in milliseconds and returned rows under 'queries'. 'queries' is None while instrumentation is off."""
+        query_stats = self.db_manager.query_stats
+        return {'cache': self.cache_stats(), 'queries': query_stats.snapshot() if query_stats is not None else None}
+
+    def subscribe(self, callback):
+        """ This method registers a callback that is called with a ChangeEvent after every change of ToDoItems.
+        The callback runs in the thread that wrote the change, so user interfaces have to pass the event on to their own thread.
+        Args:
+            callback (callable): The function to call with each ChangeEvent.
+            Returns:
+                callable: The callback, to be passed to unsubscribe."""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """ This method removes a callback registered with subscribe."""
+        self._subscribers.remove(callback)
+
+    def _notify(self, kind, ids=(), todo_items=(), external=False):
+        """ Call the subscribers with a ChangeEvent."""
+        self._skip_own_changes()
+        if not self._subscribers:
+            return
+        event = ChangeEvent(kind, ids, todo_items, external)
+        for callback in list(self._subscribers):
+            callback(event)
+
+    def _skip_own_changes(self):
+        """ Mark the change log entries of a write of this TaskManager as seen, so poll_external_changes does not report them.
+        This is only safe while no other connection wrote since the last poll, which data_version tells. It is read together
+        with the newest log entry, so a commit of another connection cannot slip in between the two."""
+        with self._poll_lock:
+            data_version, last_change = self.db_manager.change_state()
+            if data_version == self._data_version:
+                self._last_change = last_change
+
+    def poll_external_changes(self):
+        """ This method checks whether another connection, e.g. a second instance of the application or a sync script, changed
+        the database, and notifies the subscribers about the changed ToDoItems. While nothing changed the check is a single
+        PRAGMA data_version, so it can run every second. The changed IDs are read from the change log kept by triggers.
+        Changes of this TaskManager are only reported again if another connection wrote at about the same time.
+            Returns:
+                list: The ChangeEvents of the changes found, empty if nothing changed."""
+        if not self._poll_lock.acquire(blocking=False):
+            return []  # Another thread is already polling
+        try:
+            data_version = self.db_manager.data_version()
+            if data_version == self._data_version:
+                return []
+            self._data_version = data_version
+            changes = self.db_manager.changes_since(self._last_change)
+            if changes is None:  # The log was pruned past the last seen change, so the changed items are unknown
+                self._last_change = self.db_manager.latest_change()
+                self.cache.invalidate()
+                events = [ChangeEvent(ChangeEvent.RESET, external=True)]
+            else:
+                ids_by_kind = {}
+                for seq, id, kind in changes:
+                    ids_by_kind.setdefault(kind, {})[id] = None  # A dict keeps the order and drops duplicates
+                    self._last_change = seq
+                self.cache.invalidate([id for ids in ids_by_kind.values() for id in ids])
+                events = [ChangeEvent(kind, ids, external=True) for kind, ids in ids_by_kind.items()]
+        except Exception as e:
+            raise DatabaseError("An error occurred while reading the changes of the ToDo items.", original_exception=e, operation="SELECT") from e
+        finally:
+            self._poll_lock.release()
+        for event in events:
+            for callback in list(self._subscribers):
+                callback(event)
+        return events
         
+    @contextmanager
+    def transaction(self):
+        """ This context manager applies all writes made inside it in one transaction, e.g. a batch of commands from a script.
+        Subscribers are notified of every write as usual. If the block raises, nothing is committed, the cache is cleared and
+        the subscribers get a RESET event, because the earlier events of the block describe writes that were rolled back."""
+        try:
+            with self.db_manager.transaction():
+                yield
+        except BaseException:
+            self.cache.invalidate()
+            self._notify(ChangeEvent.RESET)
+            raise
+
     def create_todo_item(self, title, priority=None, status=None, due_date=None):
         """ This method creates a new ToDoItem and inserts it into the database. It returns the created ToDoItem object.
             Args:
@@ -26,14 +130,38 @@ class TaskManager:
                         DatabaseError: If an error occurs while creating the ToDoItem."""
         if not title:
             raise ValueError("Title cannot be empty")
-        todo_item = ToDoItem(None, title, priority, status, due_date)
         try:
-            self.db_manager.insert_todo_item(todo_item)
-            todo_item.id = self.db_manager.get_last_inserted_id()  # Retrieve the ID from the database and set it on the object 
+            # The database manager returns the stored item together with its ID, so no second round trip is needed
+            todo_item = self.db_manager.insert_todo_item(ToDoItem(None, title, priority, status, due_date))
         except Exception as e:
             raise DatabaseError("An error occurred while creating the ToDo item.", original_exception=e, operation="INSERT") from e
+        self.cache.put([todo_item])  # Written through, the new item is complete and current
+        self._notify(ChangeEvent.CREATED, [todo_item.id], [todo_item])
         return todo_item
 
+    def create_todo_items(self, todo_items):
+        """ This method inserts many ToDoItems into the database in a single transaction. It returns the IDs assigned to them.
+            Args:
+                todo_items (iterable): The ToDoItem objects to insert.
+                Returns:
+                    list: The IDs of the created ToDoItems in insertion order.
+                    Raises:
+                        ValueError: If a title is empty. No item of the batch is inserted in that case.
+                        DatabaseError: If an error occurs while creating the ToDoItems."""
+        def validated(todo_items):
+            for todo_item in todo_items:
+                if not todo_item.title:
+                    raise ValueError("Title cannot be empty")
+                yield todo_item
+        try:
+            ids = self.db_manager.insert_todo_items(validated(todo_items))
+        except ValueError:
+            raise
+        except Exception as e:
+            raise DatabaseError("An error occurred while creating the ToDo items.", original_exception=e, operation="INSERT") from e
+        self._notify(ChangeEvent.CREATED, ids)
+        return ids
+
     def get_todo_item(self, id):
         """ This method retrieves a ToDoItem from the database based on its ID. It returns the ToDoItem object if found, otherwise raises a ValueError.
         Args:
@@ -43,11 +171,16 @@ class TaskManager:
             Raises:
                 ValueError: If no ToDoItem is found with the specified ID.
                 DatabaseError: If an error occurs while retrieving the ToDoItem."""
+        todo_item = self.cache.get(id)
+        if todo_item is not None:
+            return todo_item
         try:
             # Check if the ID is valid
+            generation = self.cache.generation
             todo_item = self.db_manager.get_todo_item(id)
             if todo_item is None:
                 raise ValueError(f"No ToDoItem found with id {id}")
+            self.cache.put([todo_item], generation)
             return todo_item
         except Exception as e:
             raise DatabaseError("An error occurred while retrieving the ToDo item.", original_exception=e, operation="SELECT") from e
@@ -55,9 +188,39 @@ class TaskManager:
     def update_todo_item(self, id, title, priority, status, due_date):
         """ This method updates a ToDoItem in the database."""
         try:
-            self.db_manager.update_todo_item(ToDoItem(id, title, priority, status, due_date))
+            if not self.db_manager.update_todo_item(ToDoItem(id, title, priority, status, due_date)):
+                raise ValueError(f"No ToDoItem found with id {id}")
         except Exception as e:
             raise DatabaseError("An error occurred while updating the ToDo item.", original_exception=e, operation="UPDATE") from e
+        finally:
+            self.cache.invalidate([id])  # Fields that are None keep their stored value, so the cached item cannot be patched
+        self._notify(ChangeEvent.UPDATED, [id])
+
+    def update_todo_items(self, todo_items):
+        """ This method updates many ToDoItems in the database in a single transaction. It returns the number of updated rows."""
+        todo_items = list(todo_items)
+        try:
+            count = self.db_manager.update_todo_items(todo_items)
+        except Exception as e:
+            raise DatabaseError("An error occurred while updating the ToDo items.", original_exception=e, operation="UPDATE") from e
+        finally:
+            self.cache.invalidate(todo_item.id for todo_item in todo_items)
+        self._notify(ChangeEvent.UPDATED, [todo_item.id for todo_item in todo_items])
+        return count
+
+    def patch_todo_items(self, ids, **changes):
+        """ This method writes the same values, e.g. status='Done', to many ToDoItems in a single transaction. It returns the number of patched rows."""
+        ids = list(ids)
+        try:
+            count = self.db_manager.patch_todo_items(ids, **changes)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise DatabaseError("An error occurred while updating the ToDo items.", original_exception=e, operation="UPDATE") from e
+        finally:
+            self.cache.invalidate(ids)
+        self._notify(ChangeEvent.STATUS_CHANGED if 'status' in changes else ChangeEvent.UPDATED, ids)
+        return count
 
     def delete_todo_item(self, id):
         """ This method deletes a ToDoItem from the database based on its ID."""
@@ -65,14 +228,126 @@ class TaskManager:
             self.db_manager.delete_todo_item(id)
         except Exception as e:
             raise DatabaseError("An error occurred while deleting the ToDo item.", original_exception=e, operation="DELETE") from e # Raise a DatabaseError with additional information about the operation that failed 
-        
+        finally:
+            self.cache.invalidate([id])
+        self._notify(ChangeEvent.DELETED, [id])
+
+    def delete_todo_items(self, ids):
+        """ This method deletes many ToDoItems from the database in a single transaction. It returns the number of deleted rows."""
+        ids = list(ids)
+        try:
+            count = self.db_manager.delete_todo_items(ids)
+        except Exception as e:
+            raise DatabaseError("An error occurred while deleting the ToDo items.", original_exception=e, operation="DELETE") from e
+        finally:
+            self.cache.invalidate(ids)
+        self._notify(ChangeEvent.DELETED, ids)
+        return count
+
     def delete_all_todo_items(self):
-        self.db_manager.delete_all_todo_items()
+        try:
+            self.db_manager.delete_all_todo_items()
+        finally:
+            self.cache.invalidate()
+        self._notify(ChangeEvent.RESET)
+
+    def import_todo_items(self, file, format='csv', upsert=True, progress=None):
+        """ This method imports ToDoItems from a CSV or JSON Lines file in chunked transactions. It returns the number of imported items.
+        Rows are validated like handle_submit validates the edit dialog. The subscribers get a RESET event afterwards, even if
+        the import failed, because the chunks before the failing row stay committed.
+            Args:
+                file (file): A text file opened for reading, for CSV with newline=''.
+                format (str): 'csv' or 'jsonl'.
+                upsert (bool): If True, rows with a stored ID replace that ToDoItem, otherwise every row is inserted as a new one.
+                progress (callable): Called with the number of imported items after every committed chunk.
+                Returns:
+                    int: The number of imported ToDoItems.
+                    Raises:
+                        ValueError: If a row is invalid. The message names its line.
+                        DatabaseError: If an error occurs while writing the ToDoItems."""
+        try:
+            return transfer.import_todo_items(self.db_manager, file, format, upsert=upsert, progress=progress)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise DatabaseError("An error occurred while importing the ToDo items.", original_exception=e, operation="INSERT") from e
+        finally:
+            self.cache.invalidate()
+            self._notify(ChangeEvent.RESET)
+
+    def export_todo_items(self, file, format='csv', progress=None):
+        """ This method streams all ToDoItems to a CSV or JSON Lines file, ordered by ID. It returns the number of exported items.
+            Args:
+                file (file): A text file opened for writing, for CSV with newline=''.
+                format (str): 'csv' or 'jsonl'.
+                progress (callable): Called with the number of exported items after every chunk."""
+        try:
+            return transfer.export_todo_items(self.db_manager, file, format, progress=progress)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise DatabaseError("An error occurred while exporting the ToDo items.", original_exception=e, operation="SELECT") from e
 
     def list_todo_items(self):
         """ This method retrieves all ToDoItems from the database and returns a list of ToDoItem objects."""
         return self.db_manager.list_todo_items()
+
+    def count_todo_items_by_status(self):
+        """ This method returns the number of ToDoItems per status as a dict."""
+        try:
+            return self.db_manager.count_todo_items_by_status()
+        except Exception as e:
+            raise DatabaseError("An error occurred while counting the ToDo items.", original_exception=e, operation="SELECT") from e
+
+    def iter_todo_items(self, batch_size=500, order_by=None):
+        """ This method streams all ToDoItems from the database in batches of batch_size rows, so exports and bulk processing run in constant memory.
+        Args:
+            batch_size (int): The number of rows to fetch per round trip.
+            order_by (str): An optional field to sort by, e.g. 'due_date' or 'priority'.
+            Returns:
+                iterator: An iterator over the ToDoItem objects."""
+        return self.db_manager.iter_todo_items(batch_size=batch_size, order_by=order_by)
     
+    def query_todo_items(self, status=None, priority=None, due_before=None, due_after=None, order_by='id', limit=None, after_key=None):
+        """ This method retrieves one page of ToDoItems matching the filters. Pass the last item of a page as after_key to get the next page.
+        Args:
+            status (str or iterable): The status or statuses to match. None in an iterable matches ToDoItems without status.
+            priority (str or iterable): The priority or priorities to match.
+            due_before (str): Only return ToDoItems due before this date, in the format YYYY-MM-DD.
+            due_after (str): Only return ToDoItems due after this date, in the format YYYY-MM-DD.
+            order_by (str): The field to sort by: 'id', 'title', 'priority', 'status' or 'due_date'.
+            limit (int): The page size, or None for all matching ToDoItems.
+            after_key (ToDoItem or tuple): The last ToDoItem of the previous page, or its key from DatabaseManager.page_key.
+            Returns:
+                list: The ToDoItem objects of the page.
+            Raises:
+                ValueError: If order_by is not a sortable field.
+                DatabaseError: If an error occurs while querying the ToDoItems."""
+        try:
+            generation = self.cache.generation
+            todo_items = self.db_manager.query_todo_items(status=status, priority=priority, due_before=due_before, due_after=due_after,
+                                                          order_by=order_by, limit=limit, after_key=after_key)
+            self.cache.put(todo_items, generation)  # The board opens items it has listed, so keep them for get_todo_item
+            return todo_items
+        except ValueError:
+            raise
+        except Exception as e:
+            raise DatabaseError("An error occurred while querying the ToDo items.", original_exception=e, operation="SELECT") from e
+
+    def search_todo_items(self, query, limit=50):
+        """ This method searches the titles of the ToDoItems. Every word of the query must match the start of a word in the title.
+        Args:
+            query (str): The words to search for.
+            limit (int): The maximum number of results, or None for all.
+            Returns:
+                list: The matching ToDoItem objects, best matches first.
+            Raises:
+                DatabaseError: If an error occurs while searching the ToDoItems."""
+        try:
+            return self.db_manager.search_todo_items(query, limit)
+        except Exception as e:
+            raise DatabaseError("An error occurred while searching the ToDo items.", original_exception=e, operation="SELECT") from e
+
     def sort_todo_items_by_due_date(self):
         """ This method retrieves all ToDoItems from the database and returns a list of ToDoItem objects sorted by due date."""
         return self.db_manager.get_todo_items_sorted_by('due_date')
@@ -93,19 +368,15 @@ class TaskManager:
             Returns:
                 bool or str: True if the update was successful, otherwise an error message."""
         
-        # If the date string is not empty, try to parse it
-        if due_date_str:
-            try:
-                # Try to parse the date string
-                due_date = arrow.get(due_date_str, 'YYYY/MM/DD').format('YYYY-MM-DD')
-            except arrow.parser.ParserError:
-                # If a ParserError is raised, return an error message
-                return "Use YYYY/MM/DD format"
-            except ValueError:
-                # If a ValueError is raised, return a different error message
-                return "Invalid date. Please check the month and day values."
-        else:
-            due_date = None  # If the date string is empty, set due_date to None
+        # An empty date string results in None. parse_due_date checks the date without arrow, like the importer does
+        try:
+            due_date = parse_due_date(due_date_str)
+        except DueDateFormatError:
+            # If the text is not a date at all, return an error message
+            return "Use YYYY/MM/DD format"
+        except ValueError:
+            # If the month or day is out of range, return a different error message
+            return "Invalid date. Please check the month and day values."
 
         # If the user input is empty, replace it with None
         title = title if title.strip() else None
@@ -123,5 +394,33 @@ class TaskManager:
         Args:
             id (int): The ID of the ToDoItem to update.
             status (str): The new status of the ToDoItem."""
-        self.db_manager.update_todo_status(id, status)
+        try:
+            self.db_manager.update_todo_status(id, status)
+        finally:
+            self.cache.invalidate([id])
+        self._notify(ChangeEvent.STATUS_CHANGED, [id])
+
+    def move_todo_item(self, id, status, after_id=None, before_id=None):
+        """ This method moves a ToDoItem to a status and between two ToDoItems of that column. Only the moved row is written.
+        Args:
+            id (int): The ID of the ToDoItem to move.
+            status (str): The new status of the ToDoItem.
+            after_id (int): The ID of the ToDoItem it follows, or None.
+            before_id (int): The ID of the ToDoItem it precedes, or None. Without both it is moved to the end of the column.
+            Returns:
+                ToDoItem: The moved ToDoItem with its new position.
+                Raises:
+                    DatabaseError: If no ToDoItem has the ID or an error occurs while moving it."""
+        try:
+            todo_item = self.db_manager.move_todo_item(id, status, after_id, before_id)
+            if todo_item is None:
+                raise ValueError(f"No ToDoItem found with id {id}")
+        except Exception as e:
+            self.cache.invalidate([id])
+            raise DatabaseError("An error occurred while moving the ToDo item.", original_exception=e, operation="UPDATE") from e
+        # A renumbering of the column changes the positions of its other items, so drop them before caching the moved one
+        self.cache.invalidate_matching(lambda cached: cached.id == id or cached.status == status)
+        self.cache.put([todo_item])
+        self._notify(ChangeEvent.STATUS_CHANGED, [id], [todo_item])
+        return todo_item
         
\ No newline at end of file
@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+
+
+class TodoItemCache:
+    """ This class is an identity map of ToDoItems keyed by ID with least-recently-used eviction.
+
+        The TaskManager reads through it and invalidates it on every write, so an item that was just loaded for the
+        board is served from memory when it is opened again. The cache is used from the worker threads of the user
+        interface, so every method holds a lock.
+
+        Reads and writes can interleave: a reader may load a row, a writer may change it, and only then may the reader
+        store its stale copy. To prevent this, readers take a generation before they query the database and pass it to
+        put. Every invalidation starts a new generation, and items loaded under an older one are not stored."""
+
+    def __init__(self, capacity=1024):
+        """ Initialize an empty cache.
+            Args:
+                capacity (int): The maximum number of cached items. 0 disables the cache."""
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self):
+        """ The current generation, to be passed to put for items loaded after reading it."""
+        return self._generation
+
+    def get(self, id):
+        """ Return the cached ToDoItem with the ID and mark it as recently used, or None on a miss."""
+        with self._lock:
+            todo_item = self._items.get(id)
+            if todo_item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(id)
+            self.hits += 1
+            return todo_item
+
+    def put(self, todo_items, generation=None):
+        """ Store ToDoItems, replacing cached items with the same ID and evicting the least recently used ones.
+            Args:
+                todo_items (iterable): The ToDoItems to store.
+                generation (int): The generation read before the items were loaded, or None for items that were just
+                    written, which are always stored."""
+        if not self.capacity:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return  # Something was written since the items were loaded, so they may be outdated
+            for todo_item in todo_items:
+                self._items[todo_item.id] = todo_item
+                self._items.move_to_end(todo_item.id)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def invalidate(self, ids=None):
+        """ Remove ToDoItems from the cache and start a new generation.
+            Args:
+                ids (iterable): The IDs to remove, or None to clear the whole cache."""
+        with self._lock:
+            self._generation += 1
+            if ids is None:
+                self._items.clear()
+            else:
+                for id in ids:
+                    self._items.pop(id, None)
+
+    def invalidate_matching(self, predicate):
+        """ Remove the ToDoItems for which predicate(todo_item) is true and start a new generation."""
+        with self._lock:
+            self._generation += 1
+            for id in [id for id, todo_item in self._items.items() if predicate(todo_item)]:
+                del self._items[id]
+
+    def stats(self):
+        """ Return the hit and miss counters, the number of cached items and the capacity as a dict."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._items), 'capacity': self.capacity}
@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+
+class _ReaderLease:
+    """ Holds the reader connection of one thread in its thread-local state. Python drops that state when the thread ends,
+    and the pool gets the connection back through a finalizer of the lease."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+
+class ConnectionPool:
+    """ This class hands out SQLite connections to the DatabaseManager so that it can be used from several threads.
+
+    There is a single writer connection, guarded by a lock, because SQLite only allows one writer at a time anyway.
+    Every thread that reads gets its own reader connection, so readers never wait for each other or for the
+    writer lock and, in WAL mode, keep reading the last committed snapshot while a write is in progress.
+    When a thread ends, its reader connection is kept for the next thread, up to max_idle_readers, and closed otherwise.
+    Thread pools such as QThreadPool retire and recreate their threads, and the threads of a QThreadPool even lose their
+    thread-local state after every task, so without reuse every task would open a connection.
+    In-memory databases exist only inside one connection, so for them all readers share the writer connection."""
+
+    def __init__(self, db_path, configure=None, factory=None, max_idle_readers=4):
+        """ The constructor opens the writer connection.
+        Args:
+            db_path (str): The path of the SQLite database file, or ':memory:'.
+            configure (callable): An optional function that is called with every new connection, e.g. to apply PRAGMAs.
+            factory (callable): An optional sqlite3.Connection subclass, or a callable creating one, for all connections.
+            max_idle_readers (int): The number of reader connections kept open for reuse after their thread ended."""
+        self.db_path = db_path
+        self.configure = configure
+        self.factory = factory
+        self.max_idle_readers = max_idle_readers
+        self.in_memory = db_path == ':memory:' or db_path == ''
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers = []  # Every open reader connection, in use or idle
+        self._idle_readers = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+        self._writer = self._open()
+
+    def _open(self):
+        """ Open and configure a new connection. Connections may be closed from another thread than the one using them."""
+        connection = sqlite3.connect(self.db_path, check_same_thread=False, factory=self.factory or sqlite3.Connection)
+        if self.configure is not None:
+            self.configure(connection)
+        return connection
+
+    @property
+    def writer_connection(self):
+        """ The connection used for writes. Use writer() instead to access it safely from several threads."""
+        return self._writer
+
+    @contextmanager
+    def writer(self):
+        """ Check out the writer connection for one transaction.
+            The transaction is committed when the block exits normally and rolled back if it raises.
+            Blocks nested in the same thread join the outermost transaction, so several writes can be committed as one."""
+        with self._write_lock:
+            depth = getattr(self._local, 'write_depth', 0)
+            self._local.write_depth = depth + 1
+            try:
+                yield self._writer
+                if not depth:
+                    self._writer.commit()
+            except BaseException:
+                if not depth:
+                    self._writer.rollback()
+                raise
+            finally:
+                self._local.write_depth = depth
+
+    @contextmanager
+    def reader(self):
+        """ Check out the reader connection of the calling thread, opening it on first use.
+            Inside a writer block the writer connection is returned instead, so reads see the uncommitted writes."""
+        if self.in_memory or getattr(self._local, 'write_depth', 0):
+            with self._write_lock:
+                yield self._writer
+            return
+        lease = getattr(self._local, 'lease', None)
+        if lease is None:
+            lease = self._local.lease = _ReaderLease(self._acquire_reader())
+            weakref.finalize(lease, self._release_reader, lease.connection)
+        yield lease.connection
+
+    def _acquire_reader(self):
+        """ Return an idle reader connection, or open a new one."""
+        with self._readers_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+            if self._idle_readers:
+                return self._idle_readers.pop()
+        connection = self._open()
+        with self._readers_lock:
+            self._readers.append(connection)
+        return connection
+
+    def _release_reader(self, connection):
+        """ Take back the reader connection of a thread that ended. It is kept for reuse or closed if enough are idle."""
+        with self._readers_lock:
+            if not self._closed and len(self._idle_readers) < self.max_idle_readers:
+                self._idle_readers.append(connection)
+                return
+            if connection in self._readers:
+                self._readers.remove(connection)
+        connection.close()
+
+    def close(self):
+        """ Close the writer and every reader connection opened by any thread."""
+        self._closed = True
+        with self._readers_lock:
+            for connection in self._readers:
+                connection.close()
+            self._readers.clear()
+            self._idle_readers.clear()
+        with self._write_lock:
+            self._writer.close()
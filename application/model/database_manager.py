@@ -1,142 +1,615 @@
-import sqlite3
-import arrow
-from application.model.todo_item import ToDoItem
+import functools
+import os
+import re
+import threading
+from contextlib import contextmanager
+from application.model.todo_item import ToDoItem, format_due_date, priority_rank
+from application.model.migrations import run_migrations, create_title_search_index, drop_title_search_triggers, repair_title_search_index
+from application.model.connection_pool import ConnectionPool
+from application.model.query_stats import QueryStats, TracingConnection
+
+# The database file used when neither a path nor the TODO_DB_PATH environment variable is given, relative to the working directory
+DEFAULT_DB_PATH = 'todo_list.db'
+DB_PATH_ENV_VAR = 'TODO_DB_PATH'
+
+# The columns of a ToDoItem in constructor order. Queries list them explicitly because SELECT * also returns generated columns.
+# sort_position is the manual position of the item, or its ID if it was never moved.
+TODO_ITEM_COLUMNS = 'id, title, priority, status, due_date, sort_position'
+
+# The fields todo items can be sorted by and the column behind each one. Only these names are ever interpolated into ORDER BY.
+# priority_rank is a generated, indexed column that maps High/Medium/Low to 1/2/3, sort_position the manual order within a column.
+SORT_COLUMNS = {'id': 'id', 'title': 'title', 'priority': 'priority_rank', 'status': 'status', 'due_date': 'due_date',
+                'position': 'sort_position'}
+
+# The columns that can be changed after a todo item was created
+UPDATABLE_COLUMNS = ('title', 'priority', 'status', 'due_date')
+
+# Partial update in one statement: a NULL parameter keeps the current value of the column
+UPDATE_TODO_ITEM_SQL = '''
+    UPDATE todo_items
+    SET title = COALESCE(?, title), priority = COALESCE(?, priority),
+        status = COALESCE(?, status), due_date = COALESCE(?, due_date)
+    WHERE id = ?
+'''
+
+# Insert, or overwrite the whole item if the ID exists. A NULL ID lets SQLite assign a new one.
+UPSERT_TODO_ITEM_SQL = '''
+    INSERT INTO todo_items (id, title, priority, status, due_date, position)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        title = excluded.title, priority = excluded.priority, status = excluded.status,
+        due_date = excluded.due_date, position = excluded.position
+'''
+
+# PRAGMA settings applied to every connection, keyed by durability profile.
+# safe:   WAL journal and a full fsync on every commit, nothing committed is ever lost.
+# fast:   WAL journal with synchronous=NORMAL, a power loss may drop the last commits but never corrupts the database.
+# memory: journal kept in memory and no fsync at all, meant for imports, benchmarks and throwaway databases.
+# cache_size is negative, which SQLite interprets as KiB instead of pages.
+DURABILITY_PROFILES = {
+    'safe': {'journal_mode': 'WAL', 'synchronous': 'FULL', 'cache_size': -16000, 'mmap_size': 64 * 1024 * 1024, 'temp_store': 'MEMORY'},
+    'fast': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'cache_size': -64000, 'mmap_size': 256 * 1024 * 1024, 'temp_store': 'MEMORY'},
+    'memory': {'journal_mode': 'MEMORY', 'synchronous': 'OFF', 'cache_size': -64000, 'mmap_size': 256 * 1024 * 1024, 'temp_store': 'MEMORY'},
+}
+
+
+def resolve_db_path(db_path=None):
+    """ Return the database path to open: the given path, else the TODO_DB_PATH environment variable, else DEFAULT_DB_PATH.
+    Args:
+        db_path (str): An explicit path, e.g. from the --db command line flag, or None."""
+    return db_path or os.environ.get(DB_PATH_ENV_VAR) or DEFAULT_DB_PATH
+
+
+def position_between(lower, upper):
+    """ Return a position between two neighbouring positions, so a moved item is the only row that changes.
+    Args:
+        lower (float): The position of the item before the new place, or None at the start of the column.
+        upper (float): The position of the item after the new place, or None at the end of the column.
+    Returns:
+        float: The new position, or None if the two positions are too close to fit another one in between."""
+    if lower is None and upper is None:
+        return 1.0
+    if lower is None:
+        return upper - 1
+    if upper is None:
+        return lower + 1
+    position = (lower + upper) / 2
+    return position if lower < position < upper else None
+
+
+def apply_durability_profile(connection, durability):
+    """ Apply the PRAGMA settings of a durability profile to a connection.
+    Args:
+        connection (sqlite3.Connection): The connection to configure.
+        durability (str): The name of a profile in DURABILITY_PROFILES.
+    Raises:
+        ValueError: If the profile is unknown."""
+    if durability not in DURABILITY_PROFILES:
+        raise ValueError(f"Unknown durability profile '{durability}', expected one of {', '.join(DURABILITY_PROFILES)}")
+    for pragma, value in DURABILITY_PROFILES[durability].items():
+        # PRAGMA statements do not accept bound parameters; the values come from the fixed table above
+        connection.execute(f'PRAGMA {pragma} = {value}')
+
 
 class DatabaseManager:
-    """ This class is responsible for managing the database connection and executing SQL queries."""
+    """ This class is responsible for managing the database connection and executing SQL queries.
+        Connections come from a ConnectionPool, so one DatabaseManager can be shared by the GUI thread and worker threads."""
     
-    def __init__(self, db_path):
-        """ The constructor initializes the database path and calls the connect and create_table methods."""
+    def __init__(self, db_path, durability='safe', query_stats=None):
+        """ The constructor initializes the database path and calls the connect and create_table methods.
+        Args:
+            db_path (str): The path of the SQLite database file, or ':memory:'.
+            durability (str): The connection profile, one of 'safe', 'fast' or 'memory'. See DURABILITY_PROFILES.
+            query_stats (QueryStats or bool): Records the statistics of every SQL statement when given. True creates a QueryStats
+                with the default slow query threshold and False switches recording off. If None, the TODO_SQL_STATS environment
+                variable decides."""
+        if durability not in DURABILITY_PROFILES:
+            raise ValueError(f"Unknown durability profile '{durability}', expected one of {', '.join(DURABILITY_PROFILES)}")
         self.db_path = db_path
-        self.connection = None
-        self.cursor = None
+        self.durability = durability
+        if query_stats is None:
+            query_stats = QueryStats.from_environment(os.environ)
+        elif query_stats is True:
+            query_stats = QueryStats()
+        self.query_stats = query_stats or None
+        self.pool = None
+        self._local = threading.local()  # Per-thread state such as the ID of the last inserted row
         self.connect()
         self.create_table()
 
     def connect(self):
-        """ This method establishes a connection to the database and creates a cursor object."""
-        self.connection = sqlite3.connect(self.db_path)
-        self.cursor = self.connection.cursor()
+        """ This method creates the connection pool. Every connection it opens gets the durability profile applied, and records
+        its statements in query_stats if instrumentation is on."""
+        factory = functools.partial(TracingConnection, query_stats=self.query_stats) if self.query_stats is not None else None
+        self.pool = ConnectionPool(self.db_path, configure=lambda connection: apply_durability_profile(connection, self.durability),
+                                   factory=factory)
+
+    @property
+    def connection(self):
+        """ The writer connection of the pool, for maintenance and tests. It is not safe to use from several threads."""
+        return self.pool.writer_connection
 
     def create_table(self):
-        """ This method creates the todo_items table if it does not exist."""
-    
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS todo_items(
-                id INTEGER PRIMARY KEY,
-                title TEXT,
-                priority TEXT,
-                status TEXT,
-                due_date TEXT
-            )
-        ''')
-        self.connection.commit()
+        """ This method creates the todo_items table if it does not exist and upgrades existing databases to the latest schema."""
+        with self.pool.writer() as connection:
+            run_migrations(connection)
+            repair_title_search_index(connection)
 
     def insert_todo_item(self, todo_item):
-        """ This method inserts a new todo item into the database."""
-        
-        # Use the format method of the Arrow library to format the due date in the YYYY-MM-DD format
-        try:
-            formatted_due_date = todo_item.due_date.format('YYYY-MM-DD') if todo_item.due_date else None
-            self.cursor.execute('''
+        """ This method inserts a new todo item into the database and returns it with the ID assigned by the database.
+        The ID is read from the cursor that ran the INSERT while the writer lock is held, so concurrent inserts cannot interleave.
+        Args:
+            todo_item (ToDoItem): The todo item to insert. Its id attribute is ignored.
+        Returns:
+            ToDoItem: A new ToDoItem with the assigned ID and the attributes of todo_item.
+        Raises:
+            sqlite3.Error: If the insert fails. Nothing is stored in that case."""
+        with self.pool.writer() as connection:
+            cursor = connection.execute('''
+                INSERT INTO todo_items (title, priority, status, due_date)
+                VALUES (?, ?, ?, ?)
+            ''', (todo_item.title, todo_item.priority, todo_item.status, todo_item.due_date_text))
+            id = cursor.lastrowid
+        self._local.last_inserted_id = id
+        return ToDoItem(id, todo_item.title, todo_item.priority, todo_item.status, todo_item.due_date, position=id)
+
+    def insert_todo_items(self, todo_items):
+        """ This method inserts many todo items in a single transaction and returns the IDs assigned to them.
+        Args:
+            todo_items (iterable): The ToDoItem objects to insert. Their id attribute is ignored.
+        Returns:
+            list: The IDs of the inserted rows in insertion order."""
+        with self.pool.writer() as connection:  # Commit once for the whole batch, or roll back if any row fails
+            if not connection.in_transaction:
+                # A SELECT does not open the transaction, so take the write lock before reading the maximum, or a row
+                # committed by another connection in between would be returned as one of ours
+                connection.execute('BEGIN IMMEDIATE')
+            previous_max_id = connection.execute('SELECT COALESCE(MAX(id), 0) FROM todo_items').fetchone()[0]
+            connection.executemany('''
                 INSERT INTO todo_items (title, priority, status, due_date)
                 VALUES (?, ?, ?, ?)
-            ''', (todo_item.title, todo_item.priority, todo_item.status, formatted_due_date))
-            self.connection.commit()
-        except Exception as e: # Catch all exceptions
-            print(f"An error occurred: {e}")
+            ''', ((todo_item.title, todo_item.priority, todo_item.status, todo_item.due_date_text)
+                  for todo_item in todo_items))
+            # No other connection can write inside the transaction, so the new rows are exactly the ones above the previous maximum
+            return [row[0] for row in connection.execute('SELECT id FROM todo_items WHERE id > ? ORDER BY id', (previous_max_id,))]
+
+    def upsert_todo_items(self, todo_items):
+        """ This method writes many todo items in a single transaction, replacing the stored item with the same ID.
+        Items without an ID, or with an ID that is not stored yet, are inserted; a stored item is overwritten with all
+        attributes of the new one, including its position. This is the write path of the importer.
+        Args:
+            todo_items (iterable): The ToDoItem objects to write.
+        Returns:
+            int: The number of written rows."""
+        with self.pool.writer() as connection:
+            return connection.executemany(UPSERT_TODO_ITEM_SQL, (
+                (todo_item.id, todo_item.title, todo_item.priority, todo_item.status, todo_item.due_date_text, todo_item.position)
+                for todo_item in todo_items)).rowcount
 
     def get_todo_item(self, id):
         """ This method retrieves a todo item from the database based on its ID."""
         
-        self.cursor.execute('SELECT * FROM todo_items WHERE id = ?', (id,))
-        row = self.cursor.fetchone()
+        with self.pool.reader() as connection:
+            row = connection.execute(f'SELECT {TODO_ITEM_COLUMNS} FROM todo_items WHERE id = ?', (id,)).fetchone()
         if row is not None: # Check if a row was returned
-            return ToDoItem(row[0], row[1], row[2], row[3], arrow.get(row[4]) if row[4] else None)
+            return ToDoItem.from_row(row)  # The due date is parsed lazily on first access
         else:
             return None
 
     def update_todo_item(self, todo_item):
-        """ This method updates an existing todo item in the database."""
-        
-        # Fetch the current values from the database
-        current_todo_item = self.get_todo_item(todo_item.id)
-        
-        # Use the current values as defaults if no new value is provided
-        title = todo_item.title if todo_item.title is not None else current_todo_item.title
-        priority = todo_item.priority if todo_item.priority is not None else current_todo_item.priority
-        status = todo_item.status if todo_item.status is not None else current_todo_item.status
-        due_date = todo_item.due_date if todo_item.due_date is not None else current_todo_item.due_date
-
-        # Format the due date
-        formatted_due_date = due_date.format('YYYY-MM-DD') if due_date else None
-
-        # Update the database
-        self.cursor.execute('''
-            UPDATE todo_items
-            SET title = ?, priority = ?, status = ?, due_date = ?
-            WHERE id = ?
-        ''', (title, priority, status, formatted_due_date, todo_item.id))
-        self.connection.commit()
-        
+        """ This method updates an existing todo item in the database with a single statement.
+        Attributes that are None keep their current value, so the row does not have to be read first.
+        Returns:
+            bool: True if a todo item with the ID exists, otherwise False."""
+        with self.pool.writer() as connection:
+            cursor = connection.execute(UPDATE_TODO_ITEM_SQL, self._update_parameters(todo_item))
+            return cursor.rowcount > 0
+
+    def update_todo_items(self, todo_items):
+        """ This method updates many todo items in a single transaction. Attributes that are None keep their current value.
+        Args:
+            todo_items (iterable): The ToDoItem objects to update, identified by their id attribute.
+        Returns:
+            int: The number of updated rows."""
+        with self.pool.writer() as connection:
+            return connection.executemany(UPDATE_TODO_ITEM_SQL, map(self._update_parameters, todo_items)).rowcount
+
+    def patch_todo_items(self, ids, **changes):
+        """ This method writes the same values to many todo items in a single transaction. Only the given columns are written.
+        Args:
+            ids (iterable): The IDs of the todo items to patch.
+            **changes: The new column values, e.g. status='Done'. Allowed columns are title, priority, status and due_date.
+        Returns:
+            int: The number of patched rows.
+        Raises:
+            ValueError: If no change or an unknown column is given."""
+        if not changes:
+            raise ValueError("No changes given")
+        unknown = set(changes) - set(UPDATABLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot update unknown columns: {', '.join(sorted(unknown))}")
+        columns = [column for column in UPDATABLE_COLUMNS if column in changes]  # Whitelisted, so safe to interpolate
+        values = [format_due_date(changes[column]) if column == 'due_date' else changes[column] for column in columns]
+        set_list = ', '.join(f'{column} = ?' for column in columns)
+        with self.pool.writer() as connection:
+            return connection.executemany(f'UPDATE todo_items SET {set_list} WHERE id = ?', ((*values, id) for id in ids)).rowcount
+
+    @staticmethod
+    def _update_parameters(todo_item):
+        """ Return the parameters of UPDATE_TODO_ITEM_SQL for a todo item."""
+        return (todo_item.title, todo_item.priority, todo_item.status, todo_item.due_date_text, todo_item.id)
+
+    def move_todo_item(self, id, status, after_id=None, before_id=None):
+        """ This method moves a todo item to a status and to a place between two items of that column.
+        The item gets a position halfway between its new neighbours, so only its own row is written. If the neighbours are
+        too close for another position, the column is renumbered first, which keeps its order.
+        Args:
+            id (int): The ID of the todo item to move.
+            status (str): The new status of the todo item.
+            after_id (int): The ID of the item the moved item follows, or None to move it to the start.
+            before_id (int): The ID of the item the moved item precedes, or None to move it to the end.
+                With only one of them the item is placed right next to it, before the item that is adjacent to it now.
+                Without both neighbours the item is appended to the end of the column.
+        Returns:
+            ToDoItem: The moved todo item, or None if no todo item has the ID.
+        Raises:
+            ValueError: If a neighbour does not exist, is not in the status, is the moved item itself, or if after_id
+                does not come before before_id."""
+        with self.pool.writer() as connection:
+            if after_id is None and before_id is None:
+                last = connection.execute('SELECT MAX(sort_position) FROM todo_items WHERE status = ? AND id != ?', (status, id)).fetchone()[0]
+                position = position_between(last, None)
+            else:
+                self._check_neighbours(connection, id, status, after_id, before_id)
+                position = position_between(*self._neighbour_positions(connection, id, status, after_id, before_id))
+                if position is None:
+                    self._renumber_positions(connection, status)
+                    position = position_between(*self._neighbour_positions(connection, id, status, after_id, before_id))
+                if position is None:  # Cannot happen for checked neighbours, but a NULL position would lose the place
+                    raise ValueError(f"No position left between the todo items {after_id} and {before_id}")
+            cursor = connection.execute('UPDATE todo_items SET status = ?, position = ? WHERE id = ?', (status, position, id))
+            if cursor.rowcount == 0:
+                return None
+            row = connection.execute(f'SELECT {TODO_ITEM_COLUMNS} FROM todo_items WHERE id = ?', (id,)).fetchone()
+        return ToDoItem.from_row(row)
+
+    @staticmethod
+    def _check_neighbours(connection, id, status, after_id, before_id):
+        """ Raise ValueError unless the given neighbours of a moved item are other items of the status, in the right order."""
+        keys = []
+        for neighbour_id in (after_id, before_id):
+            if neighbour_id is None:
+                continue
+            if neighbour_id == id:
+                raise ValueError(f"Cannot move the todo item {id} next to itself")
+            row = connection.execute('SELECT status, sort_position FROM todo_items WHERE id = ?', (neighbour_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"No todo item found with id {neighbour_id}")
+            if row[0] != status:
+                raise ValueError(f"The todo item {neighbour_id} is not in the status '{status}'")
+            keys.append((row[1], neighbour_id))
+        if len(keys) == 2 and keys[0] >= keys[1]:
+            raise ValueError(f"The todo item {after_id} does not come before the todo item {before_id}")
+
+    @staticmethod
+    def _sort_position(connection, id):
+        """ Return the sort position of a todo item, or None if id is None or no todo item has the ID."""
+        if id is None:
+            return None
+        row = connection.execute('SELECT sort_position FROM todo_items WHERE id = ?', (id,)).fetchone()
+        return None if row is None else row[0]
+
+    def _neighbour_positions(self, connection, id, status, after_id, before_id):
+        """ Return the sort positions of the items the moved item is placed between. If only one neighbour is given, the
+        other one is the item of the column that is adjacent to it, not counting the moved item itself."""
+        lower = self._sort_position(connection, after_id)
+        upper = self._sort_position(connection, before_id)
+        if before_id is None and after_id is not None:
+            upper = self._adjacent_position(connection, id, status, after_id, following=True)
+        elif after_id is None and before_id is not None:
+            lower = self._adjacent_position(connection, id, status, before_id, following=False)
+        return lower, upper
+
+    @staticmethod
+    def _adjacent_position(connection, id, status, neighbour_id, following):
+        """ Return the sort position of the item of a status that follows (or precedes) an item in the column order,
+        skipping the item with the ID id, or None if there is no such item."""
+        comparison, direction = ('>', 'ASC') if following else ('<', 'DESC')
+        row = connection.execute(f'''
+            SELECT sort_position FROM todo_items
+            WHERE status = ? AND id != ? AND (sort_position, id) {comparison} (SELECT sort_position, id FROM todo_items WHERE id = ?)
+            ORDER BY sort_position {direction}, id {direction} LIMIT 1
+        ''', (status, id, neighbour_id)).fetchone()
+        return None if row is None else row[0]
+
+    @staticmethod
+    def _renumber_positions(connection, status):
+        """ Give the items of a status the positions 1, 2, 3, ... in their current order."""
+        connection.execute('''
+            UPDATE todo_items SET position = (
+                SELECT ranked.number FROM (
+                    SELECT id, ROW_NUMBER() OVER (ORDER BY sort_position, id) AS number FROM todo_items WHERE status = ?
+                ) AS ranked
+                WHERE ranked.id = todo_items.id
+            )
+            WHERE status = ?
+        ''', (status, status))
+
+    def data_version(self):
+        """ This method returns PRAGMA data_version of the writer connection. The value changes whenever another connection,
+        e.g. a second instance of the application, commits to the database, but not for commits of this DatabaseManager."""
+        with self.pool.writer() as connection:
+            return connection.execute('PRAGMA data_version').fetchone()[0]
+
+    def latest_change(self):
+        """ This method returns the sequence number of the newest entry of the change log, or 0 if it is empty."""
+        with self.pool.reader() as connection:
+            return connection.execute('SELECT COALESCE(MAX(seq), 0) FROM todo_changes').fetchone()[0]
+
+    def change_state(self):
+        """ This method returns data_version and latest_change read together, so they describe the same state of the database.
+        Both are read in one transaction of the writer connection; a commit of another connection in between would otherwise
+        be counted as seen by the sequence number while data_version still claims that nothing happened.
+        Returns:
+            tuple: (data_version, latest change) as returned by data_version and latest_change."""
+        with self.pool.writer() as connection:
+            if not connection.in_transaction:
+                connection.execute('BEGIN')  # The first read fixes the snapshot that the PRAGMA reports on as well
+            seq = connection.execute('SELECT COALESCE(MAX(seq), 0) FROM todo_changes').fetchone()[0]
+            return connection.execute('PRAGMA data_version').fetchone()[0], seq
+
+    def changes_since(self, seq):
+        """ This method returns the entries of the change log after a sequence number.
+        Args:
+            seq (int): The sequence number of the last entry already seen, e.g. from latest_change.
+        Returns:
+            list: (seq, todo_id, kind) tuples in the order the changes were written, where kind is 'created', 'updated',
+                'status_changed' or 'deleted'. None if the log was pruned past seq, so some changes are unknown."""
+        with self.pool.reader() as connection:
+            oldest = connection.execute('SELECT MIN(seq) FROM todo_changes').fetchone()[0]
+            if oldest is not None and oldest > seq + 1:
+                return None
+            return connection.execute('SELECT seq, todo_id, kind FROM todo_changes WHERE seq > ? ORDER BY seq', (seq,)).fetchall()
+
     def get_last_inserted_id(self):
-        """ This method retrieves the ID of the last inserted row in the database."""
-        return self.cursor.lastrowid
+        """ This method retrieves the ID of the row last inserted by insert_todo_item in the calling thread.
+        Prefer the ToDoItem returned by insert_todo_item, which already carries the ID."""
+        return getattr(self._local, 'last_inserted_id', None)
 
     def delete_todo_item(self, id):
         """ This method deletes a todo item from the database based on its ID."""
-        self.cursor.execute('DELETE FROM todo_items WHERE id = ?', (id,))
-        self.connection.commit()
-        
+        with self.pool.writer() as connection:
+            connection.execute('DELETE FROM todo_items WHERE id = ?', (id,))
+
+    def delete_todo_items(self, ids):
+        """ This method deletes many todo items in a single transaction.
+        Args:
+            ids (iterable): The IDs of the todo items to delete.
+        Returns:
+            int: The number of deleted rows."""
+        with self.pool.writer() as connection:
+            return connection.executemany('DELETE FROM todo_items WHERE id = ?', ((id,) for id in ids)).rowcount
+
     def delete_all_todo_items(self):
         """ This method deletes all todo items from the database."""
-        self.cursor.execute('DELETE FROM todo_items')
-        self.connection.commit()
+        with self.pool.writer() as connection:
+            connection.execute('DELETE FROM todo_items')
         
     def list_todo_items(self):
         """ This method retrieves all todo items from the database and returns them as a list of ToDoItem objects."""
-        self.cursor.execute('SELECT * FROM todo_items')
-        rows = self.cursor.fetchall()
-        return [ToDoItem(row[0], row[1], row[2], row[3], arrow.get(row[4]) if row[4] else None) for row in rows]
+        with self.pool.reader() as connection:
+            rows = connection.execute(f'SELECT {TODO_ITEM_COLUMNS} FROM todo_items').fetchall()
+        return [ToDoItem.from_row(row) for row in rows]
+
+    def count_todo_items_by_status(self):
+        """ This method returns the number of todo items per status as a dict, counted on the status index."""
+        with self.pool.reader() as connection:
+            return dict(connection.execute('SELECT status, COUNT(*) FROM todo_items GROUP BY status ORDER BY status').fetchall())
 
     def get_todo_items_sorted_by(self, field):
         """ This method retrieves all todo items from the database and returns them as a list of ToDoItem objects sorted by the specified field."""
         
         # Sort the todo items based on the specified field
-        if field == 'priority':
-            self.cursor.execute('''
-                SELECT * FROM todo_items
-                ORDER BY CASE priority
-                    WHEN 'High' THEN 1
-                    WHEN 'Medium' THEN 2
-                    WHEN 'Low' THEN 3
-                    ELSE 4
-                END
-            ''')
-        else:
-            self.cursor.execute(f"SELECT * FROM todo_items ORDER BY {field}")
-
-        # Fetch all rows from the result set and create ToDoItem objects from them
-        rows = self.cursor.fetchall()
-        todo_items = []
-        for row in rows:
-            id, title, priority, status, due_date = row
-            due_date = arrow.get(due_date) if due_date else None
-            todo_item = ToDoItem(id, title, priority, status, due_date)
-            todo_items.append(todo_item)
-
-        return todo_items
+        with self.pool.reader() as connection:
+            cursor = connection.execute(f"SELECT {TODO_ITEM_COLUMNS} FROM todo_items ORDER BY {self._order_by_clause(field)}")
+
+            # Fetch all rows from the result set and create ToDoItem objects from them
+            rows = cursor.fetchall()
+        return [ToDoItem.from_row(row) for row in rows]
+
+    def iter_todo_items(self, batch_size=500, order_by=None):
+        """ This method streams todo items from the database, fetching batch_size rows at a time, so memory use does not grow with the board.
+        For a file database the rows are read from a single statement on the reader connection of the calling thread, so the
+        iteration sees one consistent snapshot of the table. This does not hold for an in-memory database, or inside a writer
+        block: they read through the writer connection, so rows written while the iteration runs may show up in it.
+        Args:
+            batch_size (int): The number of rows to fetch per round trip.
+            order_by (str): An optional field to sort by, as in get_todo_items_sorted_by.
+        Yields:
+            ToDoItem: The todo items one by one."""
+        order_by_clause = f" ORDER BY {self._order_by_clause(order_by)}" if order_by else ''
+        with self.pool.reader() as connection:
+            cursor = connection.execute(f"SELECT {TODO_ITEM_COLUMNS} FROM todo_items{order_by_clause}")
+        try:
+            while True:
+                # Check the connection out per batch, so the consumer of the generator never holds it between batches
+                with self.pool.reader():
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield ToDoItem.from_row(row)
+        finally:
+            cursor.close()  # Ends the read transaction even if the consumer stops early
+
+    def query_todo_items(self, status=None, priority=None, due_before=None, due_after=None, order_by='id', limit=None, after_key=None):
+        """ This method retrieves one page of todo items matching the filters, using keyset (seek) pagination.
+        Instead of skipping rows with OFFSET, every page continues after the sort key of the previous page's last item,
+        so loading page n costs the same as loading the first page.
+        Args:
+            status (str or iterable): Only return items with this status or one of these statuses. None in an iterable matches items without status.
+            priority (str or iterable): Only return items with this priority or one of these priorities.
+            due_before (str or Arrow): Only return items due before this date.
+            due_after (str or Arrow): Only return items due after this date.
+            order_by (str): The field to sort by, one of SORT_COLUMNS. Ties are broken by ID.
+            limit (int): The maximum number of items to return, or None for all.
+            after_key (ToDoItem or tuple): Continue after this item, or after a key returned by page_key.
+        Returns:
+            list: The ToDoItem objects of the page.
+        Raises:
+            ValueError: If order_by is not a sortable field."""
+        column = self._order_by_column(order_by)
+        conditions, parameters = [], []
+        self._add_in_condition(conditions, parameters, 'status', status)
+        self._add_in_condition(conditions, parameters, 'priority', priority)
+        if due_before is not None:
+            conditions.append('due_date < ?')
+            parameters.append(format_due_date(due_before))
+        if due_after is not None:
+            conditions.append('due_date > ?')
+            parameters.append(format_due_date(due_after))
+        if after_key is not None:
+            if isinstance(after_key, ToDoItem):
+                after_key = self.page_key(after_key, order_by)
+            if column == 'id':
+                conditions.append('id > ?')
+                parameters.append(after_key[-1])
+            elif after_key[0] is None:
+                # NULLs sort first, so after a NULL key come the remaining NULLs and then every non-NULL value
+                conditions.append(f'(({column} IS NULL AND id > ?) OR {column} IS NOT NULL)')
+                parameters.append(after_key[1])
+            else:
+                conditions.append(f'({column} > ? OR ({column} = ? AND id > ?))')
+                parameters.extend([after_key[0], after_key[0], after_key[1]])
+
+        sql = f'SELECT {TODO_ITEM_COLUMNS} FROM todo_items'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += f' ORDER BY {self._order_by_clause(order_by)}'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            parameters.append(limit)
+        with self.pool.reader() as connection:
+            rows = connection.execute(sql, parameters).fetchall()
+        return [ToDoItem.from_row(row) for row in rows]
+
+    def search_todo_items(self, query, limit=50):
+        """ This method searches the task titles and returns the best matches first.
+        Every word of the query must appear in the title, either whole or as the start of a longer word, so 'buy mil' finds 'Buy milk'. Results are ranked with BM25 by the FTS5 index, or ordered by ID if SQLite lacks FTS5.
+        Args:
+            query (str): The words to search for.
+            limit (int): The maximum number of results, or None for all.
+        Returns:
+            list: The matching ToDoItem objects."""
+        words = re.findall(r'\w+', query)
+        if not words:
+            return []
+        with self.pool.reader() as connection:
+            if self.has_search_index(connection):
+                # Quote every word so FTS5 operators in the input are taken literally, and mark it as a prefix
+                match = ' '.join(f'"{word}"*' for word in words)
+                columns = ', '.join(f'todo_items.{column}' for column in TODO_ITEM_COLUMNS.split(', '))
+                rows = connection.execute(f'''
+                    SELECT {columns} FROM todo_items_fts
+                    JOIN todo_items ON todo_items.id = todo_items_fts.rowid
+                    WHERE todo_items_fts MATCH ?
+                    ORDER BY todo_items_fts.rank
+                    LIMIT ?
+                ''', (match, -1 if limit is None else limit)).fetchall()
+            else:
+                conditions = ' AND '.join(["title LIKE ? ESCAPE '\\'"] * len(words))
+                patterns = ['%' + word.replace('_', '\\_') + '%' for word in words]  # Words are \w+, so only _ needs escaping
+                rows = connection.execute(f'SELECT {TODO_ITEM_COLUMNS} FROM todo_items WHERE {conditions} ORDER BY id LIMIT ?',
+                                          (*patterns, -1 if limit is None else limit)).fetchall()
+        return [ToDoItem.from_row(row) for row in rows]
+
+    @contextmanager
+    def transaction(self):
+        """ This context manager commits all writes made inside it by the calling thread as one transaction, or none of them
+        if the block raises. Other threads wait for the writer until the block exits, so keep it short."""
+        with self.pool.writer():
+            yield
+
+    @contextmanager
+    def deferred_search_index(self):
+        """ This context manager stops updating the title search index row by row and rebuilds it once when the block exits.
+        A rebuild costs a fraction of the per-row updates of a large import, but searches miss the rows written inside the
+        block until it exits. If the process dies inside the block, the next DatabaseManager opening the file repairs the index."""
+        if not self.has_search_index():
+            yield
+            return
+        with self.pool.writer() as connection:
+            drop_title_search_triggers(connection)
+        try:
+            yield
+        finally:
+            with self.pool.writer() as connection:
+                create_title_search_index(connection)
+
+    def has_search_index(self, connection=None):
+        """ Return True if the database has the FTS5 title index created by migration 3."""
+        if connection is None:
+            with self.pool.reader() as connection:
+                return self.has_search_index(connection)
+        return connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'todo_items_fts'").fetchone() is not None
+
+    @staticmethod
+    def page_key(todo_item, order_by='id'):
+        """ Return the keyset pagination key of a todo item for a sort field, to be passed as after_key to query_todo_items."""
+        if order_by == 'id':
+            return (todo_item.id,)
+        if order_by == 'priority':
+            return (priority_rank(todo_item.priority), todo_item.id)
+        if order_by == 'due_date':
+            return (todo_item.due_date_text, todo_item.id)
+        if order_by == 'position':
+            return (todo_item.id if todo_item.position is None else todo_item.position, todo_item.id)
+        DatabaseManager._order_by_column(order_by)  # Raises for unknown fields
+        return (getattr(todo_item, order_by), todo_item.id)
+
+    @staticmethod
+    def _add_in_condition(conditions, parameters, column, values):
+        """ Add a filter on a column that matches one value or any of several values. None matches NULL."""
+        if values is None:
+            return
+        if isinstance(values, str):
+            values = [values]
+        values = list(values)
+        alternatives = [f'{column} IS NULL'] if None in values else []
+        values = [value for value in values if value is not None]
+        if len(values) == 1:
+            alternatives.append(f'{column} = ?')  # Unlike IN, an equality lets SQLite read a (column, sort column) index in order
+            parameters.extend(values)
+        elif values:
+            alternatives.append(f"{column} IN ({', '.join('?' * len(values))})")
+            parameters.extend(values)
+        conditions.append('(' + (' OR '.join(alternatives) or '0') + ')')
+
+    @staticmethod
+    def _order_by_clause(field):
+        """ Return the ORDER BY terms for a field. Ties are broken by ID, which the indexes on the sort columns already contain."""
+        column = DatabaseManager._order_by_column(field)
+        return column if column == 'id' else f'{column}, id'
+
+    @staticmethod
+    def _order_by_column(field):
+        """ Return the column to sort by for a field name.
+        Raises:
+            ValueError: If the field is not one of SORT_COLUMNS, so that user input can never reach the SQL text."""
+        if field not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by '{field}', expected one of {', '.join(SORT_COLUMNS)}")
+        return SORT_COLUMNS[field]
         
         
     def update_todo_status(self, id, status):
         """ This method updates the status of a todo item in the database."""
-        self.cursor.execute("UPDATE todo_items SET status = ? WHERE id = ?", (status, id))
-        self.connection.commit()
+        with self.pool.writer() as connection:
+            connection.execute("UPDATE todo_items SET status = ? WHERE id = ?", (status, id))
 
 
     def close_connection(self):
-        """ This method closes the database connection."""
-        self.connection.close()
+        """ This method closes all database connections of the pool."""
+        self.pool.close()
         
 
 class DatabaseError(Exception):
@@ -0,0 +1,179 @@
+import sqlite3
+
+
+def fts5_available(connection):
+    """ Return True if the SQLite library was compiled with the FTS5 full-text search extension."""
+    return bool(connection.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+
+
+def create_title_search_index(connection):
+    """ Create the FTS5 index over the task titles and the triggers that keep it in sync with todo_items.
+        The index uses todo_items as external content, so titles are not stored twice. Without FTS5 nothing is created
+        and DatabaseManager.search_todo_items falls back to LIKE queries."""
+    if not fts5_available(connection):
+        return
+    for statement in [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS todo_items_fts USING fts5(title, content='todo_items', content_rowid='id')",
+        '''
+        CREATE TRIGGER IF NOT EXISTS todo_items_fts_insert AFTER INSERT ON todo_items BEGIN
+            INSERT INTO todo_items_fts(rowid, title) VALUES (new.id, new.title);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS todo_items_fts_delete AFTER DELETE ON todo_items BEGIN
+            INSERT INTO todo_items_fts(todo_items_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS todo_items_fts_update AFTER UPDATE OF title ON todo_items BEGIN
+            INSERT INTO todo_items_fts(todo_items_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            INSERT INTO todo_items_fts(rowid, title) VALUES (new.id, new.title);
+        END
+        ''',
+        "INSERT INTO todo_items_fts(todo_items_fts) VALUES ('rebuild')",  # Index the rows of upgraded databases
+    ]:
+        connection.execute(statement)
+
+
+# The triggers that keep the title index in sync. Bulk imports drop them and rebuild the index once at the end.
+TITLE_SEARCH_TRIGGERS = ('todo_items_fts_insert', 'todo_items_fts_delete', 'todo_items_fts_update')
+
+
+def drop_title_search_triggers(connection):
+    """ Drop the triggers of the title index, so bulk writes do not update it row by row.
+        create_title_search_index restores them and rebuilds the index."""
+    for trigger in TITLE_SEARCH_TRIGGERS:
+        connection.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+
+def repair_title_search_index(connection):
+    """ Restore the triggers of the title index and rebuild it if a bulk import was interrupted after dropping them.
+        Returns True if the index was repaired."""
+    names = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE name LIKE 'todo_items_fts%'")}
+    if 'todo_items_fts' not in names or names.issuperset(TITLE_SEARCH_TRIGGERS):
+        return False
+    create_title_search_index(connection)
+    return True
+
+
+# Each migration is a (version, description, statements) tuple. A statement is either SQL text or a function that is called
+# with the connection, for steps that depend on the SQLite build. Migrations are applied in order and never edited once
+# released; schema changes are made by appending a new migration with the next version number.
+MIGRATIONS = [
+    (1, "Create the todo_items table", [
+        '''
+        CREATE TABLE IF NOT EXISTS todo_items(
+            id INTEGER PRIMARY KEY,
+            title TEXT,
+            priority TEXT,
+            status TEXT,
+            due_date TEXT
+        )
+        ''',
+    ]),
+    (2, "Add an integer priority rank and indexes for filtering and sorting", [
+        # The rank is a generated column, so it can never drift from the priority text and needs no changes in the insert/update paths
+        '''
+        ALTER TABLE todo_items ADD COLUMN priority_rank INTEGER GENERATED ALWAYS AS (
+            CASE priority
+                WHEN 'High' THEN 1
+                WHEN 'Medium' THEN 2
+                WHEN 'Low' THEN 3
+                ELSE 4
+            END
+        ) VIRTUAL
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_todo_items_status ON todo_items(status)',
+        'CREATE INDEX IF NOT EXISTS idx_todo_items_due_date ON todo_items(due_date)',
+        'CREATE INDEX IF NOT EXISTS idx_todo_items_priority_rank ON todo_items(priority_rank)',
+    ]),
+    (3, "Add a full-text search index over the task titles", [
+        create_title_search_index,
+    ]),
+    (4, "Add a manual position for ordering the tasks of a column", [
+        # position is only written when a task is moved. Until then sort_position falls back to the ID, so new tasks are
+        # appended to their column and inserts need no extra statement to number them
+        'ALTER TABLE todo_items ADD COLUMN position REAL',
+        'ALTER TABLE todo_items ADD COLUMN sort_position REAL GENERATED ALWAYS AS (COALESCE(position, id)) VIRTUAL',
+        'CREATE INDEX IF NOT EXISTS idx_todo_items_status_position ON todo_items(status, sort_position)',
+    ]),
+    (5, "Add a change log so other connections can find out which tasks changed", [
+        # Filled by triggers, so the writes of every connection are logged, including other processes and sync scripts
+        '''
+        CREATE TABLE IF NOT EXISTS todo_changes(
+            seq INTEGER PRIMARY KEY,
+            todo_id INTEGER NOT NULL,
+            kind TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS todo_changes_insert AFTER INSERT ON todo_items BEGIN
+            INSERT INTO todo_changes(todo_id, kind) VALUES (new.id, 'created');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS todo_changes_update AFTER UPDATE ON todo_items BEGIN
+            INSERT INTO todo_changes(todo_id, kind) VALUES (new.id, CASE WHEN old.status IS new.status THEN 'updated' ELSE 'status_changed' END);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS todo_changes_delete AFTER DELETE ON todo_items BEGIN
+            INSERT INTO todo_changes(todo_id, kind) VALUES (old.id, 'deleted');
+        END
+        ''',
+        # Keep the newest 10000 changes. Pruning on every 1000th change keeps the cost out of the other writes. A reader that
+        # falls further behind cannot tell what changed and reloads everything
+        '''
+        CREATE TRIGGER IF NOT EXISTS todo_changes_prune AFTER INSERT ON todo_changes WHEN new.seq % 1000 = 0 BEGIN
+            DELETE FROM todo_changes WHERE seq <= new.seq - 10000;
+        END
+        ''',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(connection):
+    """ Return the version of the newest migration applied to the database, or 0 for a database without migrations."""
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations(
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return connection.execute('SELECT COALESCE(MAX(version), 0) FROM schema_migrations').fetchone()[0]
+
+
+def run_migrations(connection, migrations=MIGRATIONS):
+    """ Apply all pending migrations to the database in place and return the resulting schema version.
+        Every migration runs in its own transaction, so a failing migration leaves the database at the previous version.
+        The transactions take the write lock before the version is read, so several processes opening the same database
+        at once apply each migration exactly once; the others wait and then find it applied.
+        Args:
+            connection (sqlite3.Connection): The connection to migrate.
+            migrations (list): The migrations to apply, defaults to MIGRATIONS.
+        Returns:
+            int: The schema version after the migration."""
+    current_version = get_schema_version(connection)
+    connection.commit()
+    for version, description, statements in migrations:
+        if version <= current_version:
+            continue
+        connection.execute('BEGIN IMMEDIATE')  # DDL statements do not open a transaction implicitly
+        try:
+            current_version = get_schema_version(connection)  # Another connection may have applied it in the meantime
+            if version > current_version:
+                for statement in statements:
+                    if callable(statement):
+                        statement(connection)
+                    else:
+                        connection.execute(statement)
+                connection.execute('INSERT INTO schema_migrations (version, description) VALUES (?, ?)', (version, description))
+                current_version = version
+            connection.commit()
+        except sqlite3.Error:
+            connection.rollback()
+            raise
+    return current_version
@@ -0,0 +1,209 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Environment variables that switch the instrumentation on without code changes: TODO_SQL_STATS=1 records statistics for
+# every DatabaseManager, TODO_SLOW_QUERY_MS sets the duration above which a statement is logged with its query plan
+SQL_STATS_ENV_VAR = 'TODO_SQL_STATS'
+SLOW_QUERY_ENV_VAR = 'TODO_SLOW_QUERY_MS'
+DEFAULT_SLOW_QUERY_MS = 100
+
+# IN lists are built with one placeholder per value, so lists of any length are counted as one statement
+_PLACEHOLDER_LIST = re.compile(r'\?(?:\s*,\s*\?)+')
+
+
+def normalize_sql(sql):
+    """ Return the statement text as used for the statistics: whitespace collapsed and placeholder lists shortened."""
+    return _PLACEHOLDER_LIST.sub('?, ...', ' '.join(sql.split()))
+
+
+def percentile(samples, fraction):
+    """ Return the nearest-rank percentile of sorted samples, e.g. fraction 0.95 for p95."""
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+class QueryStats:
+    """ This class collects per-statement statistics of the SQL a DatabaseManager runs: how often a statement ran, the total
+        and the p50/p95/p99 time it took, including fetching its rows, and how many rows it returned.
+
+        Statements slower than slow_query_ms are logged as warnings together with their EXPLAIN QUERY PLAN. The statistics are
+        recorded by TracingConnection, which the ConnectionPool only uses while instrumentation is switched on, so the
+        default configuration runs on plain sqlite3 connections without any overhead."""
+
+    def __init__(self, slow_query_ms=DEFAULT_SLOW_QUERY_MS, sample_size=1000):
+        """ Initialize empty statistics.
+            Args:
+                slow_query_ms (float): The duration in milliseconds above which a statement is logged, or None to log nothing.
+                sample_size (int): The number of most recent durations kept per statement for the percentiles."""
+        self.slow_query_ms = slow_query_ms
+        self.sample_size = sample_size
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls, environ):
+        """ Return a QueryStats configured by TODO_SQL_STATS and TODO_SLOW_QUERY_MS, or None if TODO_SQL_STATS is not set."""
+        if environ.get(SQL_STATS_ENV_VAR, '') in ('', '0'):
+            return None
+        return cls(float(environ.get(SLOW_QUERY_ENV_VAR) or DEFAULT_SLOW_QUERY_MS))
+
+    def record(self, sql, seconds, rows=0):
+        """ Record one execution of a statement.
+            Args:
+                sql (str): The statement text.
+                seconds (float): The time spent executing the statement and fetching its rows.
+                rows (int): The number of rows returned."""
+        key = normalize_sql(sql)
+        with self._lock:
+            statement = self._statements.get(key)
+            if statement is None:
+                statement = self._statements[key] = {'count': 0, 'total': 0.0, 'rows': 0, 'samples': deque(maxlen=self.sample_size)}
+            statement['count'] += 1
+            statement['total'] += seconds
+            statement['rows'] += rows
+            statement['samples'].append(seconds)
+
+    def is_slow(self, seconds):
+        """ Return True if a statement that took this long is to be logged."""
+        return self.slow_query_ms is not None and seconds * 1000 >= self.slow_query_ms
+
+    def log_slow_query(self, sql, seconds, rows, plan):
+        """ Log a slow statement with its query plan, a list of the detail column of EXPLAIN QUERY PLAN."""
+        logger.warning("Slow query (%.1f ms, %d rows): %s\n  Query plan:\n    %s", seconds * 1000, rows, normalize_sql(sql),
+                       '\n    '.join(plan) or 'not available')
+
+    def snapshot(self):
+        """ Return the statistics as a dict keyed by statement, sorted by total time, slowest first. Times are in milliseconds."""
+        with self._lock:
+            statements = [(sql, dict(statement, samples=sorted(statement['samples']))) for sql, statement in self._statements.items()]
+        report = {}
+        for sql, statement in sorted(statements, key=lambda item: item[1]['total'], reverse=True):
+            samples = statement['samples']
+            report[sql] = {
+                'count': statement['count'],
+                'total_ms': statement['total'] * 1000,
+                'p50_ms': percentile(samples, 0.50) * 1000,
+                'p95_ms': percentile(samples, 0.95) * 1000,
+                'p99_ms': percentile(samples, 0.99) * 1000,
+                'rows': statement['rows'],
+            }
+        return report
+
+    def reset(self):
+        """ Forget all recorded statements."""
+        with self._lock:
+            self._statements.clear()
+
+
+class TracingConnection(sqlite3.Connection):
+    """ A sqlite3 connection whose cursors record their statements in a QueryStats. The shortcut methods execute and
+        executemany are overridden too, because the C implementation creates their cursors without calling cursor."""
+
+    def __init__(self, *args, query_stats, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.query_stats = query_stats
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TracingCursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class TracingCursor(sqlite3.Cursor):
+    """ A cursor that measures each statement from execute until its last row was fetched, the cursor is closed or reused.
+        SQLite computes result rows while they are fetched, so timing execute alone would miss most of the cost of a query."""
+
+    _sql = None
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, seq_of_parameters, None)
+
+    def _run(self, execute, sql, parameters, plan_parameters):
+        """ Finish the previous statement of this cursor and start measuring the next one."""
+        self._finish()
+        started = time.perf_counter()
+        try:
+            execute(sql, parameters)
+        finally:
+            self._sql, self._parameters, self._rows = sql, plan_parameters, 0
+            self._elapsed = time.perf_counter() - started
+        if self.description is None:
+            self._finish()  # Statements without result rows are complete after execute
+        return self
+
+    def _fetch(self, fetch, *args):
+        """ Run a fetch method, adding its time and rows to the current statement."""
+        started = time.perf_counter()
+        result = fetch(*args)
+        if self._sql is not None:
+            self._elapsed += time.perf_counter() - started
+        return result
+
+    def fetchone(self):
+        row = self._fetch(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._sql is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._fetch(super().fetchmany, self.arraysize if size is None else size)
+        if self._sql is not None:
+            self._rows += len(rows)
+            if not rows:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(super().fetchall)
+        if self._sql is not None:
+            self._rows += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()  # A statement whose cursor is dropped after fetchone, e.g. execute(...).fetchone()
+
+    def _finish(self):
+        """ Record the current statement, and log it with its query plan if it was slow."""
+        sql = self._sql
+        if sql is None:
+            return
+        self._sql = None
+        query_stats = self.connection.query_stats
+        query_stats.record(sql, self._elapsed, self._rows)
+        if query_stats.is_slow(self._elapsed):
+            query_stats.log_slow_query(sql, self._elapsed, self._rows, self._query_plan(sql))
+
+    def _query_plan(self, sql):
+        """ Return the detail lines of EXPLAIN QUERY PLAN for a statement, or an empty list if it cannot be explained."""
+        if self._parameters is None:
+            return []  # executemany has no single set of parameters
+        try:
+            cursor = self.connection.cursor(sqlite3.Cursor)  # A plain cursor, so the plan query is not recorded itself
+            return [row[3] for row in cursor.execute(f'EXPLAIN QUERY PLAN {sql}', self._parameters)]
+        except sqlite3.Error:
+            return []
@@ -1,9 +1,106 @@
+import datetime
+import re
+
+_UNPARSED = object()  # Marks a due date that has been loaded from the database but not parsed yet
+
+# Sort rank of each priority, the same mapping as the generated priority_rank column. Unknown and empty priorities sort last.
+PRIORITY_RANKS = {'High': 1, 'Medium': 2, 'Low': 3}
+UNRANKED_PRIORITY = 4
+
+# YYYY/MM/DD as entered in the user interface, or YYYY-MM-DD as stored and exported, without mixing the separators
+_DUE_DATE_PATTERN = re.compile(r'(?P<year>\d{4})(?P<sep>[/-])(?P<month>\d{2})(?P=sep)(?P<day>\d{2})')
+
+
+def priority_rank(priority):
+    """ Return the sort rank of a priority, 1 for High up to 4 for no priority."""
+    return PRIORITY_RANKS.get(priority, UNRANKED_PRIORITY)
+
+
+def format_due_date(due_date):
+    """ Return the due date in the YYYY-MM-DD storage format. Strings are assumed to be formatted already."""
+    if not due_date:
+        return None
+    if isinstance(due_date, str):
+        return due_date
+    return due_date.format('YYYY-MM-DD')  # Use the format method of the Arrow library
+
+
+class DueDateFormatError(ValueError):
+    """ Raised by parse_due_date for text that does not look like a date at all."""
+
+
+def parse_due_date(text):
+    """ Validate a due date typed as YYYY/MM/DD or stored as YYYY-MM-DD and return it in the YYYY-MM-DD storage format.
+    The check uses a regular expression and datetime.date instead of arrow, so validating a million imported rows stays cheap.
+    Args:
+        text (str): The due date, or an empty string or None for no due date.
+    Returns:
+        str: The due date as YYYY-MM-DD, or None.
+    Raises:
+        DueDateFormatError: If the text is not formatted as YYYY/MM/DD or YYYY-MM-DD.
+        ValueError: If the month or day is out of range, e.g. 2024/02/30."""
+    if not text:
+        return None
+    match = _DUE_DATE_PATTERN.fullmatch(text)
+    if match is None:
+        raise DueDateFormatError(f"Invalid due date format '{text}', expected YYYY/MM/DD")
+    year, month, day = match.group('year', 'month', 'day')
+    try:
+        datetime.date(int(year), int(month), int(day))
+    except ValueError as e:
+        raise ValueError(f"Invalid due date '{text}': {e}") from e
+    return f'{year}-{month}-{day}'
+
 
 class ToDoItem:
-    """ This class represents a todo item."""
-    def __init__(self, id, title, priority, status, due_date):
+    """ This class represents a todo item.
+        Items use __slots__ instead of a per-instance __dict__, and items loaded from the database keep the due date as
+        the stored YYYY-MM-DD text until due_date is read for the first time, so loading a large board does not parse dates.
+        The position orders the items of a Kanban column manually. Items loaded from the database always have one."""
+
+    __slots__ = ('id', 'title', 'priority', 'status', 'position', '_due_date', '_due_date_text')
+
+    def __init__(self, id, title, priority, status, due_date, position=None):
         self.id = id
         self.title = title
         self.priority = priority
         self.status = status
-        self.due_date = due_date
\ No newline at end of file
+        self.due_date = due_date
+        self.position = position
+
+    @classmethod
+    def from_row(cls, row):
+        """ Create a ToDoItem from a database row (id, title, priority, status, due_date[, position]) without parsing the due date.
+        Args:
+            row (tuple): The row in the column order of TODO_ITEM_COLUMNS.
+        Returns:
+            ToDoItem: The todo item, whose due_date is parsed into an Arrow object on first access."""
+        todo_item = cls.__new__(cls)
+        todo_item.id, todo_item.title, todo_item.priority, todo_item.status, due_date_text, *position = row
+        todo_item.position = position[0] if position else None
+        todo_item._due_date = _UNPARSED if due_date_text else None
+        todo_item._due_date_text = due_date_text or None
+        return todo_item
+
+    @property
+    def due_date(self):
+        """ The due date. For items loaded from the database this is an Arrow object, otherwise the value that was assigned."""
+        if self._due_date is _UNPARSED:
+            import arrow  # Imported on first use so that code which never reads a due date does not pay for arrow
+            self._due_date = arrow.get(self._due_date_text)
+        return self._due_date
+
+    @due_date.setter
+    def due_date(self, value):
+        self._due_date = value
+        self._due_date_text = None
+
+    @property
+    def due_date_text(self):
+        """ The due date in the YYYY-MM-DD storage format, or None. Reading it never parses the date."""
+        if self._due_date_text is not None:
+            return self._due_date_text
+        return format_due_date(self._due_date)
+
+    def __repr__(self):
+        return f"ToDoItem({self.id!r}, {self.title!r}, {self.priority!r}, {self.status!r}, {self.due_date_text!r})"
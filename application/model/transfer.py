@@ -0,0 +1,141 @@
+import csv
+import itertools
+import json
+from application.model.todo_item import ToDoItem, parse_due_date
+
+# The fields of an exported todo item, in column order. position keeps the manual order of the Kanban columns.
+TRANSFER_FIELDS = ('id', 'title', 'priority', 'status', 'due_date', 'position')
+
+# The supported file formats, keyed by file extension
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+# Rows per transaction on import and per progress report on export
+DEFAULT_CHUNK_SIZE = 10000
+
+# The fields that hold text. JSON Lines files may contain other types, which are rejected on import
+TEXT_FIELDS = ('title', 'priority', 'status', 'due_date')
+
+
+def detect_format(path):
+    """ Return the transfer format of a file, 'csv' or 'jsonl', from its extension.
+    Raises:
+        ValueError: If the extension is not one of FORMATS."""
+    for extension, format in FORMATS.items():
+        if path.lower().endswith(extension):
+            return format
+    raise ValueError(f"Cannot tell the format of '{path}', expected one of {', '.join(FORMATS)}")
+
+
+def export_todo_items(db_manager, file, format='csv', chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """ Write all todo items to a file, ordered by ID. The items are streamed from the database, so memory use does not
+    grow with the board.
+    Args:
+        db_manager (DatabaseManager): The database to export.
+        file (file): A text file opened for writing, for CSV with newline=''.
+        format (str): 'csv' or 'jsonl'.
+        chunk_size (int): The number of rows fetched per round trip and written between progress reports.
+        progress (callable): Called with the number of exported items after every chunk.
+    Returns:
+        int: The number of exported items."""
+    write = _csv_writer(file) if format == 'csv' else _jsonl_writer(file, format)
+    count = 0
+    for todo_item in db_manager.iter_todo_items(batch_size=chunk_size, order_by='id'):
+        write((todo_item.id, todo_item.title, todo_item.priority, todo_item.status, todo_item.due_date_text, todo_item.position))
+        count += 1
+        if progress and count % chunk_size == 0:
+            progress(count)
+    if progress and count % chunk_size:
+        progress(count)
+    return count
+
+
+def import_todo_items(db_manager, file, format='csv', upsert=True, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """ Read todo items from a file and write them to the database in transactions of chunk_size rows, so memory use does
+    not grow with the file. Every row is validated like the edit dialog validates its input.
+    A file that fails validation or a write stops the import, but the chunks before the failing one stay committed.
+    Files larger than one chunk are imported inside DatabaseManager.deferred_search_index.
+    Args:
+        db_manager (DatabaseManager): The database to import into.
+        file (file): A text file opened for reading, for CSV with newline=''.
+        format (str): 'csv' or 'jsonl'.
+        upsert (bool): If True, a row whose ID is stored replaces that item and keeps the ID. If False, IDs are ignored
+            and every row is inserted as a new item.
+        chunk_size (int): The number of rows per transaction.
+        progress (callable): Called with the number of imported items after every committed chunk.
+    Returns:
+        int: The number of imported items.
+    Raises:
+        ValueError: If a row is invalid. The message names its line."""
+    todo_items = read_todo_items(file, format)
+    chunks = iter(lambda: list(itertools.islice(todo_items, chunk_size)), [])
+    write = db_manager.upsert_todo_items if upsert else db_manager.insert_todo_items
+    count = 0
+
+    def write_chunks(chunks):
+        nonlocal count
+        for chunk in chunks:
+            write(chunk)
+            count += len(chunk)
+            if progress:
+                progress(count)
+
+    # A file that fits into one chunk is written with the search index updated row by row. Larger files are bulk loads,
+    # for which rebuilding the index once at the end is several times faster than the per-row updates
+    write_chunks(itertools.islice(chunks, 1))
+    second_chunk = next(chunks, None)
+    if second_chunk is not None:
+        with db_manager.deferred_search_index():
+            write_chunks(itertools.chain([second_chunk], chunks))
+    return count
+
+
+def read_todo_items(file, format='csv'):
+    """ Parse and validate the rows of an exported file one by one.
+    Args:
+        file (file): A text file opened for reading.
+        format (str): 'csv' or 'jsonl'.
+    Yields:
+        ToDoItem: The todo item of each row. Its due date is the validated YYYY-MM-DD text.
+    Raises:
+        ValueError: If a row is invalid. The message names its line."""
+    if format == 'csv':
+        reader = csv.DictReader(file)
+        rows = ((reader.line_num, row) for row in reader)
+    elif format == 'jsonl':
+        rows = ((line_number, line) for line_number, line in enumerate(file, 1) if line.strip())
+    else:
+        raise ValueError(f"Unknown format '{format}', expected csv or jsonl")
+    for line_number, row in rows:
+        try:
+            yield _todo_item_from_row(json.loads(row) if format == 'jsonl' else row)
+        except (ValueError, TypeError) as e:  # json.JSONDecodeError is a ValueError too, int([1]) raises a TypeError
+            raise ValueError(f"Line {line_number}: {e}") from e
+
+
+def _todo_item_from_row(row):
+    """ Create a ToDoItem from a dict of exported fields. Empty CSV cells are read as None."""
+    if not isinstance(row, dict):
+        raise ValueError(f"Expected an object with the fields {', '.join(TRANSFER_FIELDS)}, got {type(row).__name__}")
+    for field in TEXT_FIELDS:
+        if not isinstance(row.get(field), (str, type(None))):
+            raise ValueError(f"{field} must be a string, got {type(row[field]).__name__}")
+    values = (row.get(field) for field in TRANSFER_FIELDS)
+    id, title, priority, status, due_date, position = (None if value == '' else value for value in values)
+    if not title:
+        raise ValueError("Title cannot be empty")
+    return ToDoItem(int(id) if id is not None else None, title, priority, status, parse_due_date(due_date),
+                    position=float(position) if position is not None else None)
+
+
+def _csv_writer(file):
+    """ Write the CSV header and return a function that writes one row."""
+    writer = csv.writer(file)
+    writer.writerow(TRANSFER_FIELDS)
+    return writer.writerow
+
+
+def _jsonl_writer(file, format):
+    """ Return a function that writes one row as a JSON object on its own line."""
+    if format != 'jsonl':
+        raise ValueError(f"Unknown format '{format}', expected csv or jsonl")
+    return lambda row: file.write(json.dumps(dict(zip(TRANSFER_FIELDS, row))) + '\n')
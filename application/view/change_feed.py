@@ -0,0 +1,44 @@
+from PySide6.QtCore import QObject, QTimer, Qt, Signal
+
+
+class ChangeFeed(QObject):
+    """ This class delivers the ChangeEvents of a TaskManager to the GUI thread as the changed signal.
+
+        The TaskManager notifies its subscribers in the thread that wrote the change, which is a worker thread in the
+        user interface, so the events are passed on through a queued signal. A timer also polls the TaskManager for changes
+        written by other connections, such as a second instance of the application or a sync script, on the read pool of
+        the TaskWorker."""
+
+    # Emitted in the GUI thread with every ChangeEvent
+    changed = Signal(object)
+
+    # Carries an event from the writing thread to the GUI thread
+    _received = Signal(object)
+
+    def __init__(self, controller, worker, poll_interval_ms=1000, parent=None):
+        """ Subscribe to the TaskManager and start polling for external changes.
+            Args:
+            controller (TaskManager): The TaskManager to observe
+            worker (TaskWorker): The worker that runs the polls
+            poll_interval_ms (int): How often to check for external changes, 0 disables polling
+            parent (QObject): The parent object"""
+        super().__init__(parent)
+        self.controller = controller
+        self.worker = worker
+        self._received.connect(self.changed, Qt.QueuedConnection)
+        self._subscription = controller.subscribe(self._received.emit)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.poll)
+        if poll_interval_ms:
+            self.poll_timer.start(poll_interval_ms)
+
+    def poll(self):
+        """ Check for external changes in the background. Found changes arrive through the changed signal."""
+        # A failed poll, e.g. while another process holds a lock, is retried by the next one instead of showing an error.
+        # Polls run every second while the application is idle, so they do not show the busy indicator
+        self.worker.submit(self.controller.poll_external_changes, on_error=lambda e: None, track_busy=False)
+
+    def close(self):
+        """ Stop polling and unsubscribe from the TaskManager."""
+        self.poll_timer.stop()
+        self.controller.unsubscribe(self._subscription)
@@ -0,0 +1,69 @@
+import time
+from PySide6.QtCore import QEvent, QObject, Signal
+
+
+class StartupProfiler(QObject):
+    """ This class measures the cold start of the application for the --profile-startup mode of main.py.
+
+        It records three milestones, each relative to the moment the process started:
+        time to window is the first paint of the main window, time to first task is the first column that shows a task
+        and time to full board is the moment every column shows its first page. The milestones are observed through Qt
+        events and model signals, so the measured code runs unchanged."""
+
+    # Emitted once every column shows its first page
+    finished = Signal()
+
+    def __init__(self, started_at, parent=None):
+        """ Initialize the profiler.
+            Args:
+            started_at (float): The time.perf_counter() value taken when the process started
+            parent (QObject): The parent object"""
+        super().__init__(parent)
+        self.started_at = started_at
+        self.time_to_window = None
+        self.time_to_first_task = None
+        self.time_to_full_board = None
+        self._pending_models = set()
+
+    def watch(self, user_interface):
+        """ Start observing the window and the columns of a UserInterface. Call this before the window is shown."""
+        user_interface.window.installEventFilter(self)
+        for column in user_interface.columns:
+            model = column.model()
+            self._pending_models.add(model)
+            model.modelReset.connect(lambda model=model: self._column_loaded(model))
+            model.rowsInserted.connect(lambda *args, model=model: self._rows_shown(model))
+
+    def elapsed(self):
+        """ Return the seconds since the process started."""
+        return time.perf_counter() - self.started_at
+
+    def eventFilter(self, watched, event):
+        """ Record the first paint of the main window."""
+        if self.time_to_window is None and event.type() == QEvent.Paint:
+            self.time_to_window = self.elapsed()
+        return False
+
+    def _rows_shown(self, model):
+        """ Record the first task shown in any column."""
+        if self.time_to_first_task is None and model.rowCount() > 0:
+            self.time_to_first_task = self.elapsed()
+
+    def _column_loaded(self, model):
+        """ Record a column that shows its first page, and the full board once all columns do."""
+        self._rows_shown(model)
+        self._pending_models.discard(model)
+        if not self._pending_models and self.time_to_full_board is None:
+            self.time_to_full_board = self.elapsed()
+            self.finished.emit()
+
+    def report(self):
+        """ Return the milestones as text, one per line. A milestone that was not reached is shown as n/a."""
+        def milliseconds(seconds):
+            return 'n/a' if seconds is None else f"{seconds * 1000:.1f} ms"
+        return '\n'.join([
+            "Startup profile:",
+            f"  time to window:     {milliseconds(self.time_to_window)}",
+            f"  time to first task: {milliseconds(self.time_to_first_task)}",
+            f"  time to full board: {milliseconds(self.time_to_full_board)}",
+        ])
@@ -0,0 +1,118 @@
+from PySide6.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, QTimer, Qt, Signal
+
+
+class _Job(QRunnable):
+    """ A call that runs on a thread of a QThreadPool and reports its outcome to the TaskWorker."""
+
+    def __init__(self, worker, fn, args, kwargs, on_result, on_error, track_busy):
+        super().__init__()
+        self.worker = worker
+        self.track_busy = track_busy
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.on_result = on_result
+        self.on_error = on_error
+
+    def run(self):
+        """ Run the call and hand the result or the exception to the GUI thread."""
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:  # Reported to on_error in the GUI thread
+            self.worker._finished.emit(self, False, e)
+        else:
+            self.worker._finished.emit(self, True, result)
+
+
+class TaskWorker(QObject):
+    """ This class runs TaskManager calls on background threads, so the Qt event loop never waits for SQLite.
+
+        Results and errors are delivered to callbacks in the GUI thread. Writes run one at a time on their own thread in
+        the order they were submitted, so a status change can never overtake the creation of the same ToDo, while reads
+        run on a separate pool and do not queue behind writes. Bursts of identical requests, such as a refresh per
+        keystroke, can be collapsed into one call with coalesce."""
+
+    # Emitted with True when the first call starts and with False when the last one finished, not counting calls submitted
+    # with track_busy=False
+    busyChanged = Signal(bool)
+
+    # Carries a finished job from the pool thread to the GUI thread
+    _finished = Signal(object, bool, object)
+
+    def __init__(self, read_threads=2, on_error=None, parent=None):
+        """ Initialize the thread pools.
+            Args:
+            read_threads (int): The maximum number of reads that run at the same time
+            on_error (callable): The callback for errors of calls submitted without their own on_error
+            parent (QObject): The parent object"""
+        super().__init__(parent)
+        self.on_error = on_error
+        self.write_pool = QThreadPool(self)
+        self.write_pool.setMaxThreadCount(1)
+        self.read_pool = QThreadPool(self)
+        self.read_pool.setMaxThreadCount(read_threads)
+        self.in_flight = 0
+        self.busy_calls = 0  # The calls in flight that count for busyChanged
+        self._jobs = set()  # Keeps the submitted jobs alive until their result was delivered
+        self._timers = {}  # The single-shot timer of every coalesce key
+        self._coalesced = {}  # The function each pending timer calls
+        self._finished.connect(self._deliver, Qt.QueuedConnection)
+
+    def submit(self, fn, *args, on_result=None, on_error=None, write=False, track_busy=True, **kwargs):
+        """ Run fn(*args, **kwargs) on a background thread.
+            Args:
+            fn (callable): The function to call, typically a TaskManager method
+            on_result (callable): Called in the GUI thread with the return value
+            on_error (callable): Called in the GUI thread with the exception, defaults to the on_error of the worker
+            write (bool): True if the call changes data. Writes run one at a time in submission order
+            track_busy (bool): False for periodic background calls the user did not ask for, which must not show as busy"""
+        job = _Job(self, fn, args, kwargs, on_result, on_error or self.on_error, track_busy)
+        job.setAutoDelete(False)
+        self._jobs.add(job)
+        self.in_flight += 1
+        if track_busy:
+            self.busy_calls += 1
+            if self.busy_calls == 1:
+                self.busyChanged.emit(True)
+        (self.write_pool if write else self.read_pool).start(job)
+
+    def coalesce(self, key, fn, delay_ms=50):
+        """ Call fn in the GUI thread after delay_ms, unless coalesce is called again with the same key before.
+            Repeated requests within the delay result in a single call with the latest fn.
+            Args:
+            key (hashable): Identifies requests that replace each other, e.g. 'search' or ('refresh', status)
+            fn (callable): The function to call, usually one that submits work
+            delay_ms (int): How long to wait for further requests"""
+        timer = self._timers.get(key)
+        if timer is None:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda: self._coalesced.pop(key)())
+            self._timers[key] = timer
+        self._coalesced[key] = fn  # Replaces the function of an earlier request that has not run yet
+        timer.start(delay_ms)
+
+    def wait_for_done(self):
+        """ Block until every submitted call finished and its callbacks ran, including calls submitted by those callbacks."""
+        while self.in_flight:
+            self.write_pool.waitForDone()
+            self.read_pool.waitForDone()
+            QCoreApplication.processEvents()
+
+    def _deliver(self, job, ok, payload):
+        """ Run the callback of a finished job in the GUI thread."""
+        self._jobs.discard(job)
+        try:
+            if ok:
+                if job.on_result is not None:
+                    job.on_result(payload)
+            elif job.on_error is not None:
+                job.on_error(payload)
+            else:
+                raise payload
+        finally:
+            self.in_flight -= 1
+            if job.track_busy:
+                self.busy_calls -= 1
+                if self.busy_calls == 0:
+                    self.busyChanged.emit(False)
@@ -0,0 +1,298 @@
+from bisect import bisect_left
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QMimeData, Qt
+from application.model.database_manager import DatabaseManager
+
+
+class TodoListModel(QAbstractListModel):
+    """ A list model for one Kanban column. It shows the ToDos of one status and loads them page by page from the TaskManager,
+        so a column with many ToDos only creates the rows that have been scrolled into view.
+
+        Pages are loaded with keyset pagination in the current sort order, so fetchMore continues after the last loaded ToDo.
+        With a TaskWorker, fetchMore only submits the query and returns; the rows are inserted when the page arrives, so
+        scrolling never waits for the database.
+        Single ToDos can be inserted, moved and removed with upsert and remove without reloading the column.
+
+        Besides the shown order, the model keeps an index of the loaded ToDos for every order sort has switched to, and upsert
+        and remove update all of these indexes. Such an index is built by one sort the first time sort asks for it, so the
+        pages of fetchMore only extend the shown order. Once a column has loaded all its ToDos, sort switches to another
+        order without touching the database, and back to an order it showed before without sorting anything."""
+
+    def __init__(self, controller, status, page_size=200, worker=None, parent=None):
+        """ Initialize the model for the ToDos of one status.
+            Args:
+            controller (TaskManager): The TaskManager to load the ToDos from
+            status (str): The status of the ToDos in the column. The 'To Do' column also shows ToDos without status
+            page_size (int): The number of ToDos loaded per fetchMore
+            worker (TaskWorker): Runs the queries of fetchMore in the background, or None to run them in the calling thread
+            parent (QObject): The parent object"""
+        super().__init__(parent)
+        self.controller = controller
+        self.status = status
+        self.page_size = page_size
+        self.worker = worker
+        self._fetching = False  # True while the query of fetchMore runs in the background
+        self.order_by = 'position'  # The manual order, until the board is sorted by a field
+        self.load_generation = 0  # Counts the loads and sorts, so the page of a load that was overtaken can be dropped
+        self._indexes = {}  # Maps each sort field to a (keys, items) pair of lists with the loaded ToDos in that order
+        self._item_by_id = {}  # Maps the ID of every loaded ToDoItem to the item
+        self._build_indexes([])
+        self._all_loaded = True  # Nothing is loaded until reload is called
+
+    def statuses(self):
+        """ Return the statuses shown in this column."""
+        return ('To Do', None) if self.status == 'To Do' else (self.status,)
+
+    def accepts(self, todo):
+        """ Return True if the ToDo belongs to this column."""
+        return todo.status in self.statuses()
+
+    def sort_key(self, todo, order_by=None):
+        """ Return a key that orders ToDos like the database does for a sort field, with missing values first.
+            Args:
+            todo (ToDoItem): The ToDo
+            order_by (str): The sort field, or None for the current one"""
+        return tuple((value is not None, value) for value in DatabaseManager.page_key(todo, order_by or self.order_by))
+
+    # QAbstractListModel interface
+
+    def rowCount(self, parent=QModelIndex()):
+        """ Return the number of loaded ToDos."""
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        """ Return the title of the ToDo for display and its ID for Qt.UserRole."""
+        if not index.isValid() or index.row() >= len(self._items):
+            return None
+        todo = self._items[index.row()]
+        if role == Qt.DisplayRole:
+            return todo.title
+        if role == Qt.UserRole:
+            return todo.id
+        return None
+
+    def flags(self, index):
+        """ Return the item flags. ToDos can be dragged, and the column accepts drops between them."""
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+
+    def canFetchMore(self, parent=QModelIndex()):
+        """ Return True if not all ToDos of the column are loaded yet and no page is being loaded."""
+        return not parent.isValid() and not self._all_loaded and not self._fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        """ Load the next page of ToDos after the last loaded one. With a worker the page is queried in the background and
+            appended by append_page, and canFetchMore returns False until it arrived."""
+        if not self.canFetchMore(parent):
+            return
+        after_key = self._items[-1] if self._items else None
+        if self.worker is None:
+            self.append_page(self.load_generation, self.query_page(after_key))
+            return
+        self._fetching = True
+        self.worker.submit(self.query_page, after_key, on_result=lambda page, generation=self.load_generation: self.append_page(generation, page),
+                           on_error=self._fetch_failed)
+
+    def fully_loaded(self):
+        """ Return True if all ToDos of the column are loaded."""
+        return self._all_loaded
+
+    def supportedDropActions(self):
+        """ Return the drop actions of the column."""
+        return Qt.MoveAction
+
+    def mimeTypes(self):
+        """ Return the MIME types used for dragging ToDos."""
+        return ['text/plain']
+
+    def mimeData(self, indexes):
+        """ Return the ID of the first dragged ToDo as text."""
+        mime_data = QMimeData()
+        if indexes:
+            mime_data.setText(str(indexes[0].data(Qt.UserRole)))
+        return mime_data
+
+    # Loading and incremental changes
+
+    def reload(self, order_by=None):
+        """ Drop the loaded ToDos and load the first page again, optionally in a new sort order.
+            Args:
+            order_by (str): The new sort field, e.g. 'due_date' or 'priority', or None to keep the current one"""
+        order_by = order_by or self.order_by
+        self.show_first_page(self.query_first_page(order_by), order_by)
+
+    def query_page(self, after_key):
+        """ Query the page of ToDos after a ToDo in the current order without changing the model, so it can run on a
+            background thread.
+            Args:
+            after_key (ToDoItem): The last loaded ToDo, or None for the first page
+            Returns:
+                list: The ToDoItems of the page"""
+        return list(self.controller.query_todo_items(status=self.statuses(), order_by=self.order_by, limit=self.page_size, after_key=after_key))
+
+    def append_page(self, generation, page):
+        """ Append a page returned by query_page after the loaded ToDos, unless the column was loaded or sorted again since
+            the page was requested.
+            Args:
+            generation (int): The load_generation at the time the page was requested
+            page (list): The ToDoItems of the page"""
+        if generation != self.load_generation:
+            return
+        self._fetching = False
+        self._all_loaded = len(page) < self.page_size
+        for todo in page:
+            if todo.id in self._item_by_id:
+                self.remove(todo.id)  # Changed while the page was queried, so the loaded row is outdated
+        if not page:
+            return
+        self.beginInsertRows(QModelIndex(), len(self._items), len(self._items) + len(page) - 1)
+        self._index_append(page)
+        self.endInsertRows()
+
+    def _fetch_failed(self, error):
+        """ Allow fetchMore again after a failed page query and report the error like the other calls of the worker."""
+        self._fetching = False
+        if self.worker.on_error is not None:
+            self.worker.on_error(error)
+
+    def query_first_page(self, order_by=None):
+        """ Query the first page of the column without changing the model, so it can run on a background thread.
+            Args:
+            order_by (str): The sort field, or None for the current one
+            Returns:
+                list: The ToDoItems of the first page"""
+        return list(self.controller.query_todo_items(status=self.statuses(), order_by=order_by or self.order_by, limit=self.page_size))
+
+    def show_first_page(self, page, order_by=None):
+        """ Replace the loaded ToDos with a first page returned by query_first_page. Further pages are loaded by fetchMore.
+            Args:
+            page (list): The ToDoItems of the first page
+            order_by (str): The sort field the page was queried with, or None for the current one"""
+        self.load_generation += 1  # Drops the page of a fetchMore that is still running
+        self._fetching = False
+        self.beginResetModel()
+        if order_by is not None:
+            self.order_by = order_by
+        self._build_indexes(page)
+        self._all_loaded = len(page) < self.page_size
+        self.endResetModel()
+
+    def set_todos(self, todos):
+        """ Show exactly the given ToDos of this column, e.g. a list that was already loaded, without paging.
+            Args:
+            todos (iterable): The ToDoItems. ToDos of other statuses are ignored"""
+        self.load_generation += 1  # Replaces the page of a load that is still running
+        self._fetching = False
+        self.beginResetModel()
+        self._build_indexes([todo for todo in todos if self.accepts(todo)])
+        self._all_loaded = True
+        self.endResetModel()
+
+    def sort(self, order_by):
+        """ Show the loaded ToDos in another order from the in-memory index of the field, without any I/O.
+            This is only possible once all ToDos of the column are loaded, otherwise the first page of the new order has to be
+            queried with reload.
+            Args:
+            order_by (str): The sort field
+            Returns:
+                bool: True if the column is now sorted by the field, False if it has to be reloaded"""
+        if order_by == self.order_by:
+            return True
+        if not self._all_loaded:
+            return False
+        self.load_generation += 1  # A page that is still being queried for the old order must not replace this one
+        if order_by not in self._indexes:  # Sort once, upsert and remove keep the index up to date from now on
+            self._indexes[order_by] = self._sorted_index(self._items, order_by)
+        self.layoutAboutToBeChanged.emit()
+        persistent_indexes = self.persistentIndexList()
+        persistent_ids = [self._items[index.row()].id for index in persistent_indexes]
+        self._show_index(order_by)
+        self.changePersistentIndexList(persistent_indexes, [self.index(self.row_of(id)) for id in persistent_ids])
+        self.layoutChanged.emit()
+        return True
+
+    def todo_at(self, row):
+        """ Return the ToDoItem at a row."""
+        return self._items[row]
+
+    def row_of(self, todo_id):
+        """ Return the row of a loaded ToDo, or -1 if it is not loaded."""
+        todo = self._item_by_id.get(todo_id)
+        return -1 if todo is None else bisect_left(self._keys, self.sort_key(todo))
+
+    def upsert(self, todo):
+        """ Insert, update or move a ToDo according to its status and sort key.
+            A ToDo that sorts after the last loaded row is left to fetchMore, so it is not loaded twice."""
+        if not self.accepts(todo):
+            self.remove(todo.id)
+            return
+        key = self.sort_key(todo)
+        old = self._item_by_id.get(todo.id)
+        if old is not None and self.sort_key(old) == key:
+            # Same position: replace the ToDo, which may still move in the other indexes, and repaint its row
+            row = bisect_left(self._keys, key)
+            self._index_remove(old)
+            self._index_insert(todo)
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+            return
+        if old is not None:
+            self.remove(todo.id)
+        row = bisect_left(self._keys, key)
+        if row == len(self._items) and not self._all_loaded:
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._index_insert(todo)
+        self.endInsertRows()
+
+    def remove(self, todo_id):
+        """ Remove a ToDo from the column if it is loaded."""
+        row = self.row_of(todo_id)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self._index_remove(self._item_by_id[todo_id])
+        self.endRemoveRows()
+
+    # Sorted indexes
+
+    def _sorted_index(self, todos, order_by):
+        """ Return the (keys, items) index of ToDos for a sort field."""
+        pairs = sorted(((self.sort_key(todo, order_by), todo) for todo in todos), key=lambda pair: pair[0])  # Keys end with the unique ID
+        return [key for key, todo in pairs], [todo for key, todo in pairs]
+
+    def _build_indexes(self, todos):
+        """ Replace the loaded ToDos and build the index of the current order. The other indexes are built by sort."""
+        self._indexes = {self.order_by: self._sorted_index(todos, self.order_by)}
+        self._item_by_id = {todo.id: todo for todo in todos}
+        self._show_index(self.order_by)
+
+    def _index_append(self, page):
+        """ Append a page that continues the shown order, in one pass over the page. The indexes of other orders are
+            dropped, because the page rows would have to be inserted all over them; sort builds them again when needed."""
+        self._indexes = {self.order_by: self._indexes[self.order_by]}
+        self._keys.extend(self.sort_key(todo) for todo in page)
+        self._items.extend(page)
+        self._item_by_id.update((todo.id, todo) for todo in page)
+
+    def _show_index(self, order_by):
+        """ Make the index of a field the shown order."""
+        self.order_by = order_by
+        self._keys, self._items = self._indexes[order_by]
+
+    def _index_insert(self, todo):
+        """ Insert a ToDo into every index."""
+        for order_by, (keys, items) in self._indexes.items():
+            key = self.sort_key(todo, order_by)
+            row = bisect_left(keys, key)
+            keys.insert(row, key)
+            items.insert(row, todo)
+        self._item_by_id[todo.id] = todo
+
+    def _index_remove(self, todo):
+        """ Remove a loaded ToDo from every index. todo must be the loaded item, whose keys locate it."""
+        for order_by, (keys, items) in self._indexes.items():
+            row = bisect_left(keys, self.sort_key(todo, order_by))
+            del keys[row]
+            del items[row]
+        del self._item_by_id[todo.id]
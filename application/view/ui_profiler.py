@@ -0,0 +1,217 @@
+import functools
+import json
+import threading
+import time
+from collections import deque
+from PySide6.QtCore import QObject, QTimer, Qt
+from PySide6.QtGui import QKeySequence, QShortcut
+from PySide6.QtWidgets import QLabel
+from application.model.query_stats import percentile
+from application.view.todo_list_model import TodoListModel
+from application.view.user_interface import UserInterface, CustomListView
+
+# The methods that are timed, by class. The handlers of the window and the views run in the GUI thread and stall the
+# event loop while they run. query_first_page and query_page run on the worker threads and show how long a column waits
+# for its data.
+TIMED_METHODS = [
+    (UserInterface, ('update_kanban_board', 'sort_kanban_board', '_load_columns', '_show_first_page', 'handle_change_event',
+                     'apply_board_changes', 'refresh_board_item', 'move_board_item', 'add_todo', 'filter_kanban_board',
+                     '_show_search_results', 'open_todo_window', 'show_todo_dialog', 'handle_submit_and_close_dialog',
+                     'handle_delete_and_close_dialog', 'open_sort_dialog')),
+    (CustomListView, ('paintEvent', 'startDrag', 'dropEvent')),
+    (TodoListModel, ('query_first_page', 'query_page', 'fetchMore', 'append_page', 'show_first_page', 'set_todos', 'sort',
+                     'upsert', 'remove')),
+]
+
+
+class UIProfiler(QObject):
+    """ This class finds out why the board stutters, for the --profile-ui mode of main.py.
+
+        It measures three things while the application runs:
+        event loop stalls, with a heartbeat timer that notices when it fires late because a handler blocked the GUI thread;
+        the time spent in the handlers listed in TIMED_METHODS, including painting the columns and their database queries;
+        and the rows added to every column, per reload and in total.
+
+        The handlers are timed by replacing the methods on their classes, so the profiler has to be installed before the
+        UserInterface is created, which connects its signals to the methods. The measured code runs unchanged otherwise.
+        Times of nested handlers are inclusive, e.g. update_kanban_board includes the set_todos it calls.
+        F12 shows an overlay with the current numbers, and dump writes the full report as JSON."""
+
+    # Only one profiler can replace the methods at a time
+    _installed = None
+
+    def __init__(self, stall_threshold_ms=50, heartbeat_ms=10, parent=None):
+        """ Initialize the profiler.
+            Args:
+            stall_threshold_ms (float): A heartbeat this much later than due counts as a stall of the event loop
+            heartbeat_ms (int): The interval of the heartbeat timer
+            parent (QObject): The parent object"""
+        super().__init__(parent)
+        self.stall_threshold_ms = stall_threshold_ms
+        self.started_at = time.perf_counter()
+        self.user_interface = None
+        self.overlay = None
+        self._handlers = {}
+        self._rows = {}
+        self._stalls = []
+        self._lateness = deque(maxlen=10000)
+        self._recent = deque(maxlen=64)  # (ended at, name, seconds) of the latest GUI thread handlers, to explain stalls
+        self._originals = []
+        self._lock = threading.Lock()
+        self._gui_thread = threading.current_thread()
+        self.heartbeat_ms = heartbeat_ms
+        self.heartbeat = None
+
+    def install(self):
+        """ Replace the methods in TIMED_METHODS with timed versions."""
+        if UIProfiler._installed is not None:
+            raise RuntimeError("Another UIProfiler is installed")
+        UIProfiler._installed = self
+        for cls, names in TIMED_METHODS:
+            for name in names:
+                self._originals.append((cls, name, cls.__dict__.get(name)))
+                setattr(cls, name, self._timed(f'{cls.__name__}.{name}', getattr(cls, name)))
+
+    def uninstall(self):
+        """ Restore the original methods and stop the heartbeat."""
+        if self.heartbeat is not None:
+            self.heartbeat.stop()
+        for cls, name, original in reversed(self._originals):
+            if original is None:
+                delattr(cls, name)  # The method was inherited, e.g. paintEvent from QListView
+            else:
+                setattr(cls, name, original)
+        self._originals.clear()
+        if UIProfiler._installed is self:
+            UIProfiler._installed = None
+
+    def watch(self, user_interface):
+        """ Start the heartbeat, count the rows added to the columns of a UserInterface and add the overlay to its window,
+            toggled with F12. The QApplication exists from here on, which the timers need."""
+        self.user_interface = user_interface
+        self.heartbeat = QTimer(self)
+        self.heartbeat.setTimerType(Qt.PreciseTimer)
+        self.heartbeat.timeout.connect(self._tick)
+        self._last_tick = time.perf_counter()
+        self.heartbeat.start(self.heartbeat_ms)
+        for column in user_interface.columns:
+            model = column.model()
+            rows = self._rows[column.status] = {'reloads': 0, 'reloaded_rows': 0, 'inserted_rows': 0}
+            model.modelReset.connect(lambda model=model, rows=rows: self._count_reload(rows, model.rowCount()))
+            model.rowsInserted.connect(lambda parent, first, last, rows=rows: self._count_inserted(rows, last - first + 1))
+        self.overlay = QLabel(user_interface.window)
+        self.overlay.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.overlay.setStyleSheet("background: rgba(0, 0, 0, 180); color: white; font-family: monospace; padding: 6px;")
+        self.overlay.hide()
+        self.overlay_timer = QTimer(self)
+        self.overlay_timer.timeout.connect(self.update_overlay)
+        self.shortcut = QShortcut(QKeySequence('F12'), user_interface.window)
+        self.shortcut.activated.connect(self.toggle_overlay)
+
+    def _timed(self, name, function):
+        """ Return a wrapper of a method that records the time of every call under name."""
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, started, time.perf_counter())
+        return timed
+
+    def record(self, name, started, ended):
+        """ Record one call of a handler. Calls may come from any thread."""
+        seconds = ended - started
+        gui_thread = threading.current_thread() is self._gui_thread
+        with self._lock:
+            handler = self._handlers.get(name)
+            if handler is None:
+                handler = self._handlers[name] = {'count': 0, 'total': 0.0, 'max': 0.0, 'samples': deque(maxlen=1000),
+                                                  'gui_thread': gui_thread}
+            handler['count'] += 1
+            handler['total'] += seconds
+            handler['max'] = max(handler['max'], seconds)
+            handler['samples'].append(seconds)
+            if gui_thread:
+                self._recent.append((ended, name, seconds))
+
+    def _tick(self):
+        """ Measure how late the heartbeat fired. While a handler blocks the GUI thread the timer cannot fire, so the
+            delay is the time the event loop was stalled."""
+        now = time.perf_counter()
+        lateness = max(0.0, now - self._last_tick - self.heartbeat.interval() / 1000)
+        self._last_tick = now
+        self._lateness.append(lateness)
+        if lateness * 1000 >= self.stall_threshold_ms:
+            stalled_since = now - lateness - self.heartbeat.interval() / 1000
+            with self._lock:
+                culprits = sorted((entry for entry in self._recent if entry[0] >= stalled_since), key=lambda entry: -entry[2])
+            self._stalls.append({'at_s': now - self.started_at, 'ms': lateness * 1000,
+                                 'handlers': [f'{name} ({seconds * 1000:.1f} ms)' for _, name, seconds in culprits[:3]]})
+
+    def _count_reload(self, rows, count):
+        rows['reloads'] += 1
+        rows['reloaded_rows'] += count
+
+    def _count_inserted(self, rows, count):
+        rows['inserted_rows'] += count
+
+    def report(self):
+        """ Return the measurements as a dict that can be written as JSON. Times are in milliseconds."""
+        with self._lock:
+            handlers = {name: dict(handler, samples=sorted(handler['samples'])) for name, handler in self._handlers.items()}
+        lateness = sorted(self._lateness)
+        stalls = self._stalls
+        report = {
+            'duration_s': time.perf_counter() - self.started_at,
+            'event_loop': {
+                'heartbeats': len(lateness),
+                'stalls': len(stalls),
+                'stalled_ms': sum(stall['ms'] for stall in stalls),
+                'max_stall_ms': max((stall['ms'] for stall in stalls), default=0.0),
+                'p99_lateness_ms': percentile(lateness, 0.99) * 1000 if lateness else 0.0,
+                'worst_stalls': sorted(stalls, key=lambda stall: -stall['ms'])[:20],
+            },
+            'handlers': {
+                name: {'count': handler['count'], 'total_ms': handler['total'] * 1000, 'max_ms': handler['max'] * 1000,
+                       'p95_ms': percentile(handler['samples'], 0.95) * 1000, 'gui_thread': handler['gui_thread']}
+                for name, handler in sorted(handlers.items(), key=lambda item: -item[1]['total'])
+            },
+            'rows': {status: dict(rows, rows_per_reload=rows['reloaded_rows'] / rows['reloads'] if rows['reloads'] else 0.0)
+                     for status, rows in self._rows.items()},
+        }
+        if self.user_interface is not None:
+            report['queries'] = self.user_interface.controller.get_stats()['queries']  # None unless TODO_SQL_STATS is set
+        return report
+
+    def summary(self, handlers=5):
+        """ Return the key numbers as a few lines of text, as shown in the overlay."""
+        report = self.report()
+        event_loop = report['event_loop']
+        lines = [f"stalls: {event_loop['stalls']}  max {event_loop['max_stall_ms']:.0f} ms  p99 lateness {event_loop['p99_lateness_ms']:.1f} ms"]
+        for name, handler in list(report['handlers'].items())[:handlers]:
+            lines.append(f"{name}: {handler['count']}x {handler['total_ms']:.0f} ms (max {handler['max_ms']:.1f})")
+        for status, rows in report['rows'].items():
+            lines.append(f"{status}: {rows['reloads']} reloads, {rows['rows_per_reload']:.0f} rows each, {rows['inserted_rows']} inserted")
+        return '\n'.join(lines)
+
+    def toggle_overlay(self):
+        """ Show or hide the overlay. It is refreshed twice a second while it is visible."""
+        if not self.overlay.isHidden():
+            self.overlay.hide()
+            self.overlay_timer.stop()
+        else:
+            self.update_overlay()
+            self.overlay.show()
+            self.overlay.raise_()
+            self.overlay_timer.start(500)
+
+    def update_overlay(self):
+        self.overlay.setText(self.summary())
+        self.overlay.adjustSize()
+        self.overlay.move(self.user_interface.window.width() - self.overlay.width() - 8, 8)
+
+    def dump(self, path):
+        """ Write the report as JSON to a file."""
+        with open(path, 'w') as file:
+            json.dump(self.report(), file, indent=2)
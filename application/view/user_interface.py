@@ -1,26 +1,48 @@
-import arrow
-from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QLabel, QListWidget, QListWidgetItem, QWidget, QLineEdit, QPushButton, QSizePolicy, QDialog, QMessageBox, QComboBox, QAbstractItemView
-from PySide6.QtCore import Qt, QMimeData, Signal
+import copy
+from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QLabel, QListView, QWidget, QLineEdit, QPushButton, QSizePolicy, QDialog, QMessageBox, QComboBox, QAbstractItemView, QProgressBar
+from PySide6.QtCore import Qt, QModelIndex, Signal
 from PySide6.QtGui import QDrag, QPixmap, QPainter, QCursor, QFontMetrics, QPen, QColor
 from application.controller.task_manager import TaskManager
+from application.model.database_manager import DatabaseError, DatabaseManager, position_between
+from application.view.todo_list_model import TodoListModel
+from application.view.task_worker import TaskWorker
+from application.view.change_feed import ChangeFeed
+from application.controller.change_event import ChangeEvent
 
             
 class UserInterface:
     """ The UserInterface class is responsible for creating the main window of the application and handling user interactions. 
         It uses the TaskManager class to interact with the model and controller."""
+
+    # Changes of more ToDos than this reload the board instead of reading every changed ToDo
+    REFRESH_LIMIT = 50
     def __init__(self, model, controller):
-        """ Initialize the UserInterface with the provided model and controller."""
+        """ Initialize the UserInterface with the provided model and controller.
+            The controller is shared with all columns, so the whole window works on a single database connection pool.
+            Args:
+            model (DatabaseManager): The database of the application, used to create a controller if none is given
+            controller (TaskManager): The controller of the application, or None to create one for the model"""
         self.model = model
-        self.controller = TaskManager(self)
+        self.controller = controller if controller is not None else TaskManager(model)
         self.app = QApplication.instance()
         if self.app is None:
             self.app = QApplication([])
         self.window = QMainWindow()
+
+        # All calls into the TaskManager run on background threads, results come back through signals
+        self.worker = TaskWorker(on_error=self.show_error)
+        self.board_order = 'position'  # The field the columns are sorted by, by default the manual order
+        self.search_generation = 0  # Identifies the latest search, so results of older searches are ignored
+
+        # The board follows the change events of the controller, for its own writes as well as for other instances
+        self.change_feed = ChangeFeed(self.controller, self.worker)
+        self.change_feed.changed.connect(self.handle_change_event)
         
         self.window.setWindowTitle("Simply Done - Your Simple Task Organizer") # Set the window title
-        self.todo_list_widget = CustomListWidget(self, status='To Do') # Create a custom QListWidget for the To Do items
-        self.in_progress_list_widget = CustomListWidget(self, status='In Progress') # Create a custom QListWidget for the In Progress items
-        self.done_list_widget = CustomListWidget(self, status='Done') # Create a custom QListWidget for the Done items
+        self.todo_list_widget = CustomListView(self, status='To Do') # Create a custom QListView for the To Do items
+        self.in_progress_list_widget = CustomListView(self, status='In Progress') # Create a custom QListView for the In Progress items
+        self.done_list_widget = CustomListView(self, status='Done') # Create a custom QListView for the Done items
+        self.columns = (self.todo_list_widget, self.in_progress_list_widget, self.done_list_widget)
         
         # Create a QLineEdit widget for the input field and a QPushButton for adding To-Do items
         self.todo_input = QLineEdit("") 
@@ -44,6 +66,22 @@ class UserInterface:
         self.sort_button = QPushButton("...")
         self.input_layout.addWidget(self.sort_button)
 
+        # Add a search field that filters the Kanban columns as you type
+        self.search_input = QLineEdit("")
+        self.search_input.setPlaceholderText("Search...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.input_layout.addWidget(self.search_input)
+
+        # Add an indicator that is shown while database calls are in flight
+        self.busy_indicator = QProgressBar()
+        self.busy_indicator.setRange(0, 0)  # A range of 0 to 0 shows a busy animation instead of a percentage
+        self.busy_indicator.setFixedWidth(60)
+        self.busy_indicator.setTextVisible(False)
+        self.busy_indicator.hide()
+        self.input_layout.addWidget(self.busy_indicator)
+        self.worker.busyChanged.connect(self.busy_indicator.setVisible)
+
         # Create the main layout and set it as the central widget of the window
         self.main_layout = QVBoxLayout()
         self.main_layout.addLayout(self.input_layout)
@@ -59,18 +97,22 @@ class UserInterface:
         # Connect the returnPressed signal of the QLineEdit widget to the add_todo method
         self.todo_input.returnPressed.connect(self.add_todo)
         
-        # Connect the itemDoubleClicked signal of the QListWidgets to the open_todo_window method
-        self.todo_list_widget.itemDoubleClicked.connect(self.open_todo_window)
-        self.in_progress_list_widget.itemDoubleClicked.connect(self.open_todo_window)
-        self.done_list_widget.itemDoubleClicked.connect(self.open_todo_window)
+        # Connect the doubleClicked signal of the columns to the open_todo_window method
+        self.todo_list_widget.doubleClicked.connect(self.open_todo_window)
+        self.in_progress_list_widget.doubleClicked.connect(self.open_todo_window)
+        self.done_list_widget.doubleClicked.connect(self.open_todo_window)
         
-        # Connect the itemRightClicked signal of the QListWidgets to the open_delete_dialog method 
+        # Connect the itemRightClicked signal of the columns to the open_delete_dialog method 
         self.todo_list_widget.itemRightClicked.connect(self.open_delete_dialog)
         self.in_progress_list_widget.itemRightClicked.connect(self.open_delete_dialog)
         self.done_list_widget.itemRightClicked.connect(self.open_delete_dialog)
 
         # Connect the clicked signal of the sort_button to the open_sort_dialog method
         self.sort_button.clicked.connect(self.open_sort_dialog)
+
+        # Connect the textChanged signal of the search field to the filter_kanban_board method, searching once the user pauses typing
+        self.search_input.textChanged.connect(lambda text: self.worker.coalesce('search', self.filter_kanban_board, delay_ms=150))
+        self.search_matches = None  # The IDs of the ToDos matching the current search, or None without search
     
         
     # Add a KanBan board column to the UI
@@ -96,54 +138,227 @@ class UserInterface:
         return container
     
     def add_todo(self):
-        """ Add a new ToDo item to the database and update the Kanban board."""
+        """ Add a new ToDo item to the database in the background. The change event of the controller adds it to the Kanban board."""
         todo_text = self.todo_input.text()
         if todo_text:  # make sure the input field is not empty
-            try:
-                self.controller.create_todo_item(todo_text)
-                self.update_kanban_board()
-                self.todo_input.clear()  # clear the input field
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to add ToDo item: {str(e)}")
+            self.worker.submit(self.controller.create_todo_item, todo_text, write=True,
+                               on_error=lambda e: self.show_error(f"Failed to add ToDo item: {str(e)}"))
+            self.todo_input.clear()  # clear the input field
+
+    def show_error(self, error):
+        """ Show an error message for a failed database call.
+            Args:
+            error (Exception or str): The error to show"""
+        QMessageBox.critical(self.window, "Error", str(error))
     
                 
     def update_kanban_board(self, todos=None):
-        """ Update the Kanban board with the provided list of ToDos or fetch the current list from the database if not provided."""
-        
-        # Fetch the current list of ToDos from the database through the controller if not provided
+        """ Reload the Kanban board with the provided list of ToDos or load the current ToDos from the database if not provided.
+            Without a list, the first page of every column is queried in the background and further rows are fetched as a
+            column is scrolled. Repeated requests in quick succession are coalesced into one reload.
+            This resets all columns, so it is only used for the initial load and when the order of all ToDos changes.
+            Single changes are applied with apply_board_changes and refresh_board_item. While a search is active, the board
+            shows the search results instead, so the search is run again."""
         if todos is None:
-            todos = self.controller.list_todo_items()
-
-        # Clear the current items in the QListWidgets
-        self.todo_list_widget.clear()
-        self.in_progress_list_widget.clear()
-        self.done_list_widget.clear()
-
-        # Iterate over the list of ToDos
-        for todo in todos:
-            item = QListWidgetItem(todo.title)  # create a QListWidgetItem with the title of the ToDo
-            item.setData(Qt.UserRole, todo.id)  # store the id of the ToDoItem in the QListWidgetItem
-
-            # Check the status of the ToDo and add it to the corresponding QListWidget
-            if todo.status == 'To Do' or todo.status is None:
-                self.todo_list_widget.addItem(item)
-            elif todo.status == 'In Progress':
-                self.in_progress_list_widget.addItem(item)
-            elif todo.status == 'Done':
-                self.done_list_widget.addItem(item)
-
+            if self.search_matches is not None:
+                self.worker.coalesce('search', self.filter_kanban_board, delay_ms=20)
+                return
+            for column in self.columns:
+                self.worker.coalesce(('refresh', column.status), lambda column=column: self._load_columns([column]), delay_ms=20)
+            return
+        for column in self.columns:
+            column.model().set_todos(todos)
+
+        # Keep the current search applied to the reloaded board
+        if self.search_matches is not None:
+            self.filter_kanban_board()
+
+    def sort_kanban_board(self, order_by):
+        """ Show all columns in a new sort order. A column that has loaded all its ToDos switches to its in-memory index of
+            the field at once, the others reload their first page in the new order from the database.
+            Args:
+            order_by (str): The field to sort by, e.g. 'due_date' or 'priority'"""
+        self.board_order = order_by
+        for column in self.columns:
+            if not column.model().sort(order_by):  # Columns showing search results have all their ToDos loaded
+                self.worker.coalesce(('refresh', column.status), lambda column=column: self._load_columns([column]), delay_ms=20)
+
+    def _load_columns(self, columns):
+        """ Query the first page of columns in the background. Each column is shown as soon as its page arrives,
+            so the first tasks appear before the slowest column finished loading."""
+        for column in columns:
+            model = column.model()
+            model.load_generation += 1
+            self.worker.submit(model.query_first_page, self.board_order,
+                               on_result=lambda page, model=model, generation=model.load_generation, order_by=self.board_order:
+                                   self._show_first_page(generation, model, page, order_by))
+
+    def _show_first_page(self, generation, model, page, order_by):
+        """ Show a first page queried by _load_columns, unless the column was loaded or sorted again in the meantime."""
+        if generation != model.load_generation:
+            return
+        model.show_first_page(page, order_by)
+
+    def handle_change_event(self, event):
+        """ Apply a ChangeEvent of the controller to the board. Only the changed ToDos are updated, unless the event does not
+            say which ToDos changed or too many changed, in which case the board is reloaded.
+            Args:
+            event (ChangeEvent): The change"""
+        if event.kind == ChangeEvent.RESET or len(event.ids) > self.REFRESH_LIMIT:
+            self.update_kanban_board()
+        elif event.kind == ChangeEvent.DELETED:
+            self.apply_board_changes(deleted_ids=event.ids)
+        elif event.todo_items:
+            self.apply_board_changes(upserted=event.todo_items)
+        else:
+            for todo_id in event.ids:
+                self.refresh_board_item(todo_id)
 
+    def apply_board_changes(self, upserted=(), deleted_ids=()):
+        """ Apply the changes of some ToDos to the board without touching the other items.
+            New ToDos are inserted at their sorted position, ToDos whose status changed are moved and changed titles are updated in place.
+            Args:
+            upserted (iterable): The created or changed ToDoItems.
+            deleted_ids (iterable): The IDs of deleted ToDos."""
+        for todo in upserted:
+            for column in self.columns:
+                column.model().upsert(todo)  # Removes the ToDo from the columns of other statuses
+        for todo_id in deleted_ids:
+            for column in self.columns:
+                column.model().remove(todo_id)
+
+        # A new or renamed ToDo may not match the current search
+        if upserted and self.search_matches is not None:
+            self.filter_kanban_board()
+
+    def refresh_board_item(self, todo_id):
+        """ Reload a single ToDo from the database in the background and apply its changes to the board.
+            A ToDo that no longer exists is removed.
+            Args:
+            todo_id (int): The ID of the ToDo to refresh"""
+        def handle_error(e):
+            if isinstance(e, DatabaseError) and isinstance(e.original_exception, ValueError):  # No ToDo has this ID
+                self.apply_board_changes(deleted_ids=[todo_id])
+            else:
+                self.show_error(e)
+
+        self.worker.submit(self.controller.get_todo_item, todo_id,
+                           on_result=lambda todo: self.apply_board_changes(upserted=[todo]), on_error=handle_error)
+
+    def loaded_todo(self, todo_id):
+        """ Return the ToDoItem with the ID if a column has loaded it, otherwise None."""
+        for column in self.columns:
+            row = column.model().row_of(todo_id)
+            if row >= 0:
+                return column.model().todo_at(row)
+        return None
+
+    def move_board_item(self, todo_id, status, after=None, before=None):
+        """ Move a ToDo to a column and between two of its ToDos. The board shows the move at once and the move is written
+            in the background. If the write fails, the ToDo is put back where it was.
+            Args:
+            todo_id (int): The ID of the ToDo to move
+            status (str): The status of the target column
+            after (ToDoItem): The ToDo the moved one follows, or None
+            before (ToDoItem): The ToDo the moved one precedes, or None. Without both the ToDo is moved to the end of the column"""
+        original = self.loaded_todo(todo_id)
+        expected_position = None
+        if original is not None:
+            # Place a copy with the new status and position, so the original can be restored if the write fails
+            moved = copy.copy(original)
+            moved.status = status
+            if after is None and before is None:
+                moved.position = self._end_position(status, todo_id)
+            else:
+                expected_position = position_between(after and self._position(after), before and self._position(before))
+                moved.position = expected_position
+            if moved.position is not None:
+                self.apply_board_changes(upserted=[moved])
+
+        def handle_result(todo):
+            # The change event has already placed the ToDo
+            if expected_position is not None and todo.position != expected_position:
+                self.update_kanban_board()  # The database renumbered the column, so the loaded positions are outdated
+
+        def handle_error(e):
+            if original is not None:
+                self.apply_board_changes(upserted=[original])
+            self.show_error(f"Failed to move ToDo item: {str(e)}")
+
+        self.worker.submit(self.controller.move_todo_item, todo_id, status, after and after.id, before and before.id, write=True,
+                           on_result=handle_result, on_error=handle_error)
+
+    @staticmethod
+    def _position(todo):
+        """ Return the sort position of a ToDo, which is its ID if it was never moved."""
+        return DatabaseManager.page_key(todo, 'position')[0]
+
+    def _end_position(self, status, todo_id):
+        """ Return the position after the last ToDo of a column, or infinity if the column has not loaded all its ToDos or
+            only shows search results, which leaves the moved ToDo to fetchMore or shows it last."""
+        model = self.column_for_status(status).model()
+        if not model.fully_loaded() or self.search_matches is not None:
+            return float('inf')
+        positions = [self._position(model.todo_at(row)) for row in range(model.rowCount()) if model.todo_at(row).id != todo_id]
+        return position_between(max(positions, default=None), None)
+
+    def column_for_status(self, status):
+        """ Return the column that shows ToDos with the given status, or None for an unknown status."""
+        if status == 'To Do' or status is None:
+            return self.todo_list_widget
+        elif status == 'In Progress':
+            return self.in_progress_list_widget
+        elif status == 'Done':
+            return self.done_list_widget
+        return None
+
+    def filter_kanban_board(self, query=None):
+        """ Show only the ToDos whose title matches the search query. The matches are searched in the whole database and
+            shown in their columns without paging, so matches that were never scrolled into view are found as well.
+            Args:
+            query (str): The search query, or None to use the text of the search field. An empty query shows all ToDos."""
+        if query is None:
+            query = self.search_input.text()
+        self.search_generation += 1
+        if not query.strip():
+            self._show_search_results(self.search_generation, None)
+            return
+        generation = self.search_generation
+        self.worker.submit(self.controller.search_todo_items, query, limit=None,
+                           on_result=lambda todos: self._show_search_results(generation, todos))
+
+    def _show_search_results(self, generation, todos):
+        """ Show the ToDos found by a search in the columns, unless a newer search was started in the meantime.
+            Ending the search loads the first page of every column again.
+            Args:
+            generation (int): The search_generation of the search
+            todos (list): The matching ToDoItems, or None to show all ToDos"""
+        if generation != self.search_generation:
+            return
+        if todos is None:
+            if self.search_matches is not None:
+                self.search_matches = None
+                self._load_columns(self.columns)
+            return
+        self.search_matches = {todo.id for todo in todos}
+        for column in self.columns:
+            column.model().set_todos(todos)  # Also drops the pages that are still being loaded
 
     def open_todo_window(self, item):
         """ Open a dialog window to display and edit the details of a ToDoItem 
             Args:
-            item (QListWidgetItem): The item that was double-clicked in the QListWidget"""
+            item (QModelIndex): The item that was double-clicked in a column"""
         
-        # Get the id of the ToDoItem from the QListWidgetItem
+        # Get the id of the ToDoItem from the item
         id = item.data(Qt.UserRole)
 
-        # Get the ToDoItem object from the database
-        todo = self.controller.get_todo_item(id)
+        # Get the ToDoItem object from the database and show the dialog when it arrives
+        self.worker.submit(self.controller.get_todo_item, id, on_result=self.show_todo_dialog)
+
+    def show_todo_dialog(self, todo):
+        """ Show the dialog window to edit a ToDoItem
+            Args:
+            todo (ToDoItem): The ToDoItem to edit"""
         
         # Create a QDialog
         dialog = QDialog()
@@ -190,7 +405,7 @@ class UserInterface:
 
         # Create QLabel and QLineEdit for the due_date, and set the current due_date
         due_date_label = QLabel("Due Date")
-        due_date_input = QLineEdit(arrow.get(todo.due_date).format('YYYY/MM/DD') if todo.due_date else "")
+        due_date_input = QLineEdit(todo.due_date_text.replace('-', '/') if todo.due_date_text else "")
         layout.addWidget(due_date_label)
         layout.addWidget(due_date_input)
 
@@ -214,20 +429,21 @@ class UserInterface:
             due_date_str (str): The new due date of the ToDoItem in string format
             dialog (QDialog): The dialog window to close"""
 
-        # Handle the submit action and show an error message if needed
-        result = self.controller.handle_submit(todo_id, title, priority, status, due_date_str)
-        if result is not True:
-            QMessageBox.critical(None, "Error", result)
-        else:
-            self.update_kanban_board()
-            dialog.accept()
+        # Handle the submit action in the background and show an error message if needed
+        def handle_result(result):
+            if result is not True:
+                QMessageBox.critical(None, "Error", result)
+            else:
+                dialog.accept()  # The change event of the controller updates the board
+
+        self.worker.submit(self.controller.handle_submit, todo_id, title, priority, status, due_date_str, write=True, on_result=handle_result)
             
             
     
     def open_delete_dialog(self, item):
         """ Open a dialog window to confirm the deletion of a ToDoItem
             Args:
-            item (QListWidgetItem): The item that was right-clicked in the QListWidget"""
+            item (QModelIndex): The item that was right-clicked in a column"""
         
         # Create a QDialog
         dialog = QDialog()
@@ -251,12 +467,11 @@ class UserInterface:
         """ Handle the deletion of a ToDoItem and close the dialog
             Args:
             dialog (QDialog): The dialog window to close
-            item (QListWidgetItem): The item to delete from the QListWidget"""
+            item (QModelIndex): The item to delete from its column"""
         
-        # Get the ID of the ToDo from the item and delete it from the database through the controller
+        # Get the ID of the ToDo from the item and delete it from the database through the controller in the background
         todo_id = item.data(Qt.UserRole)
-        self.controller.delete_todo_item(todo_id)
-        self.update_kanban_board()
+        self.worker.submit(self.controller.delete_todo_item, todo_id, write=True)  # The change event removes it from the board
         dialog.accept()
 
     def display_main_window(self):
@@ -277,6 +492,7 @@ class UserInterface:
 
         # Add the sorting options to the QComboBox
         sort_combo_box = QComboBox()
+        sort_combo_box.addItem("Manual Order")
         sort_combo_box.addItem("Due Date")
         sort_combo_box.addItem("Priority")
         layout.addWidget(sort_combo_box)
@@ -297,23 +513,24 @@ class UserInterface:
             sort_option (str): The selected sorting option"""
             
         # Sort the ToDo items based on the selected sorting option
-        sorted_items = []
-        if sort_option == "Due Date":
-            sorted_items = self.controller.sort_todo_items_by_due_date()
+        if sort_option == "Manual Order":
+            self.sort_kanban_board('position')
+        elif sort_option == "Due Date":
+            self.sort_kanban_board('due_date')
         elif sort_option == "Priority":
-            sorted_items = self.controller.sort_todo_items_by_priority()
+            self.sort_kanban_board('priority')
 
-        self.update_kanban_board(sorted_items)
 
-
-class CustomListWidget(QListWidget):
-    """ A custom QListWidget that emits a signal when an item is right-clicked."""
+class CustomListView(QListView):
+    """ A Kanban column: a QListView over a lazily loaded TodoListModel that emits a signal when an item is right-clicked.
+        Only the rows that are scrolled into view are loaded and painted, and all rows have the same height,
+        so the view does not have to measure every ToDo of the column."""
     
     # Define a custom signal for the right-clicked event
-    itemRightClicked = Signal(QListWidgetItem)
+    itemRightClicked = Signal(QModelIndex)
 
     def __init__(self, UserInterface, status=None, *args, **kwargs):
-        """ Initialize the custom QListWidget with the provided UserInterface and status.
+        """ Initialize the column view with the provided UserInterface and status.
             Args:
             UserInterface (UserInterface): The UserInterface instance
             status (str): The status of the ToDo items in the list
@@ -324,27 +541,33 @@ class CustomListWidget(QListWidget):
         super().__init__(*args, **kwargs)
         self.status = status
         self.UserInterface = UserInterface
-        self.controller = TaskManager(self)
-        self.setDragDropMode(QAbstractItemView.InternalMove)
+        self.controller = UserInterface.controller  # Shared with the window, columns never open their own database
+        self.setModel(TodoListModel(UserInterface.controller, status, worker=UserInterface.worker, parent=self))
+        self.setUniformItemSizes(True)  # All rows have the height of the first one, so the view never measures the others
+        self.setDragEnabled(True)
+        self.setAcceptDrops(True)
+        self.setDragDropMode(QAbstractItemView.DragDrop)
+        self.setDefaultDropAction(Qt.MoveAction)
     
     def startDrag(self, actions):
         """ Start the drag operation with the item's ID and a custom pixmap.
             Args:
             actions: The drag actions to perform"""
             
+        index = self.currentIndex()
+        if not index.isValid():
+            return
+
         # Create a drag object
         drag = QDrag(self)
         
-        # Create a QMimeData object and set the text to the ID of the item
-        mimeData = QMimeData()
-        mimeData.setText(str(self.currentItem().data(Qt.UserRole)))  # Store the id of the item
-        
-        # Set the mime data for the drag object
-        drag.setMimeData(mimeData)
+        # Set the mime data for the drag object, it contains the id of the item
+        drag.setMimeData(self.model().mimeData([index]))
 
         # Calculate the size of the text
-        fontMetrics = QFontMetrics(self.currentItem().font())
-        textSize = fontMetrics.size(0, self.currentItem().text())
+        text = index.data(Qt.DisplayRole) or ""
+        fontMetrics = QFontMetrics(self.font())
+        textSize = fontMetrics.size(0, text)
 
         # Create a pixmap with the size of the text
         pixmap = QPixmap(textSize.width(), textSize.height())
@@ -355,30 +578,18 @@ class CustomListWidget(QListWidget):
         # Set the color of the text to green
         textColor = QColor('green')
 
-        # Draw the icon and text on the pixmap
+        # Draw the text on the pixmap
         painter.setPen(QPen(textColor))  # Set the color of the text
-        painter.drawPixmap(pixmap.rect(), self.currentItem().icon().pixmap(textSize)) # Draw the icon
-        painter.drawText(pixmap.rect(), Qt.AlignCenter, self.currentItem().text()) # Draw the text
+        painter.drawText(pixmap.rect(), Qt.AlignCenter, text) # Draw the text
         painter.end()
 
         # Set the pixmap and hotspot for the drag object
         drag.setPixmap(pixmap)
-        drag.setHotSpot(self.mapFromGlobal(QCursor.pos()) - self.visualItemRect(self.currentItem()).topLeft())
+        drag.setHotSpot(self.mapFromGlobal(QCursor.pos()) - self.visualRect(index).topLeft())
 
         # Execute the drag operation
         drag.exec(actions)
 
-    def mimeData(self, items):
-        """ Return the mime data for the drag operation.
-            Args:
-            items: The items to drag"""
-            
-        # Create a QMimeData object and set the text to the ID of the item
-        mimeData = QMimeData()
-        id = self.currentItem().data(Qt.UserRole)
-        mimeData.setText(str(id))
-        return mimeData
-
     def dragEnterEvent(self, event):
         """ Accept the drag event if it has text data.
             Args:
@@ -398,16 +609,52 @@ class CustomListWidget(QListWidget):
             event.acceptProposedAction()
 
     def dropEvent(self, event):
-        """ Handle the drop event by updating the status of the ToDo item.
+        """ Handle the drop event by moving the ToDo item to this column at the drop position.
             Args:
             event: The drop event"""
         
         # Get the ID of the ToDo item from the mime data
         id = int(event.mimeData().text())
-        if self.status is not None:  # Only update the status if it's not None
-            self.controller.update_todo_status(id, self.status)
-            self.UserInterface.update_kanban_board()  # Refresh the Kanban board
         event.acceptProposedAction()
+        if self.status is None:  # Only move the item if the column has a status
+            return
+        after, before = self.drop_neighbours(event.position().toPoint(), id)
+        row = self.model().row_of(id)
+        if row >= 0 and self.model().order_by != 'position':
+            return  # Dropped into its own column, which is sorted by a field, so nothing changes
+        if row >= 0 and (after, before) == self.neighbours(row):
+            return  # Dropped at the place it already has
+        self.UserInterface.move_board_item(id, self.status, after, before)
+
+    def neighbours(self, row):
+        """ Return the ToDoItems before and after a row, each None at the start or end of the loaded rows."""
+        model = self.model()
+        return (model.todo_at(row - 1) if row > 0 else None,
+                model.todo_at(row + 1) if row + 1 < model.rowCount() else None)
+
+    def drop_neighbours(self, point, dragged_id):
+        """ Return the ToDoItems between which a ToDo dropped at a point is placed, skipping the dragged ToDo itself.
+            Both are None to move it to the end of the column, which is also used while the column is sorted by a field.
+            Args:
+            point (QPoint): The drop position in viewport coordinates
+            dragged_id (int): The ID of the dragged ToDo"""
+        model = self.model()
+        if model.order_by != 'position':
+            return None, None
+        index = self.indexAt(point)
+        if not index.isValid():
+            if model.canFetchMore():
+                return None, None  # Below the loaded rows, the end of the column is not loaded yet
+            row = model.rowCount()
+        else:
+            row = index.row() + (1 if point.y() > self.visualRect(index).center().y() else 0)  # Lower half: drop after the item
+        after_row, before_row = row - 1, row
+        if after_row >= 0 and model.todo_at(after_row).id == dragged_id:
+            after_row -= 1
+        if before_row < model.rowCount() and model.todo_at(before_row).id == dragged_id:
+            before_row += 1
+        return (model.todo_at(after_row) if after_row >= 0 else None,
+                model.todo_at(before_row) if before_row < model.rowCount() else None)
 
     def mousePressEvent(self, event):
         """ Handle the mouse press event and emit the itemRightClicked signal if the right mouse button is clicked.
@@ -417,7 +664,6 @@ class CustomListWidget(QListWidget):
         # Call the parent class mousePressEvent method
         super().mousePressEvent(event)
         if event.button() == Qt.RightButton: # Check if the right mouse button is clicked
-            item = self.itemAt(event.pos()) # Get the item at the mouse position
-            if item is not None:
-                self.itemRightClicked.emit(item) # Emit the itemRightClicked signal with the item
-
+            index = self.indexAt(event.position().toPoint()) # Get the item at the mouse position
+            if index.isValid():
+                self.itemRightClicked.emit(index) # Emit the itemRightClicked signal with the index of the item
@@ -0,0 +1,69 @@
+""" Compare the durability profiles of the DatabaseManager.
+
+For every profile the benchmark measures the write throughput of single-row commits, which is where the
+synchronous setting matters, and the latency of point reads and full board reads while the file is on disk.
+
+Usage:
+    python -m benchmarks.bench_durability [--rows 2000] [--reads 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from application.model.database_manager import DatabaseManager, DURABILITY_PROFILES
+from application.model.query_stats import percentile
+from application.model.todo_item import ToDoItem
+
+
+def bench_profile(durability, rows, reads):
+    """ Run the benchmark for one durability profile and return the measurements as a dict."""
+    with tempfile.TemporaryDirectory() as directory:
+        db_manager = DatabaseManager(os.path.join(directory, 'bench.db'), durability=durability)
+
+        # Writes: one commit per row, like the UI does for every add
+        start = time.perf_counter()
+        for i in range(rows):
+            db_manager.insert_todo_item(ToDoItem(None, f'Task {i}', random.choice(['High', 'Medium', 'Low']), 'To Do', '2024-01-01'))
+        write_seconds = time.perf_counter() - start
+
+        # Point reads by random id
+        ids = [item.id for item in db_manager.list_todo_items()]
+        latencies = []
+        for _ in range(reads):
+            start = time.perf_counter()
+            db_manager.get_todo_item(random.choice(ids))
+            latencies.append(time.perf_counter() - start)
+
+        # Full board reads, the query behind every refresh
+        start = time.perf_counter()
+        db_manager.list_todo_items()
+        list_seconds = time.perf_counter() - start
+
+        db_manager.close_connection()
+
+    return {
+        'profile': durability,
+        'writes_per_second': rows / write_seconds,
+        'read_p50_us': statistics.median(latencies) * 1e6,
+        'read_p99_us': percentile(sorted(latencies), 0.99) * 1e6,
+        'list_ms': list_seconds * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000, help='number of single-row commits per profile')
+    parser.add_argument('--reads', type=int, default=500, help='number of point reads per profile')
+    args = parser.parse_args()
+
+    print(f"{'profile':<8} {'writes/s':>12} {'read p50 (us)':>14} {'read p99 (us)':>14} {'list (ms)':>10}")
+    for durability in DURABILITY_PROFILES:
+        result = bench_profile(durability, args.rows, args.reads)
+        print(f"{result['profile']:<8} {result['writes_per_second']:>12.0f} {result['read_p50_us']:>14.1f} "
+              f"{result['read_p99_us']:>14.1f} {result['list_ms']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+""" Measure the model and controller layers on synthetic boards and compare the results against a baseline.
+
+For every board size the suite fills a fresh database file and measures the DatabaseManager operations behind the
+application: batched and single-row inserts, updates, full and sorted lists, keyset pages and deletes. It then measures
+the end-to-end latency of the TaskManager calls the user interface makes, including the cache and the change events.
+
+Every size is measured --repeat times on a fresh database. Results are written as JSON: every metric has the median of
+the repetitions as its value, the value of every repetition, a unit and a direction, so a later run can be compared
+against a stored baseline. A metric is a regression if its median got worse by more than the threshold and even its
+best repetition is worse than the worst repetition of the baseline, so run-to-run noise does not fail the comparison.
+
+Usage:
+    python -m benchmarks.bench_suite [--sizes 1k,100k] [--repeat 5] [--output results.json]
+    python -m benchmarks.bench_suite --sizes 1k,100k,1m --baseline baseline.json [--threshold 0.1]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from application.controller.task_manager import TaskManager
+from application.model.database_manager import DatabaseManager, DURABILITY_PROFILES
+from application.model.query_stats import percentile
+from application.model.todo_item import ToDoItem
+
+STATUSES = ['To Do', 'In Progress', 'Done']
+PRIORITIES = ['High', 'Medium', 'Low', None]
+WORDS = ['buy', 'milk', 'call', 'plan', 'review', 'write', 'report', 'fix', 'bug', 'book', 'flight', 'clean', 'kitchen',
+         'prepare', 'slides', 'pay', 'invoice', 'email', 'team', 'update', 'docs', 'water', 'plants', 'renew', 'passport']
+
+# The number of operations measured individually per size, so latency runs stay short on large boards
+SAMPLE_OPERATIONS = 200
+
+# The number of times every size is measured by default
+DEFAULT_REPEAT = 5
+
+
+def parse_size(text):
+    """ Parse a board size such as 1000, 1k or 1m."""
+    text = text.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(text.rstrip('km')) * multiplier
+
+
+def format_size(size):
+    """ Format a board size as in the metric names, e.g. 1k or 1m."""
+    for suffix, factor in (('m', 1000000), ('k', 1000)):
+        if size >= factor and size % factor == 0:
+            return f'{size // factor}{suffix}'
+    return str(size)
+
+
+def generate_todo_items(count, seed=0):
+    """ Yield count synthetic ToDoItems with random titles, priorities, statuses and due dates. The seed makes boards repeatable."""
+    rng = random.Random(seed)
+    for i in range(count):
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))) + f' {i}'
+        due_date = f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}' if rng.random() < 0.7 else None
+        yield ToDoItem(None, title, rng.choice(PRIORITIES), rng.choice(STATUSES), due_date)
+
+
+def timed(fn, *args, **kwargs):
+    """ Call fn and return the elapsed seconds."""
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def latencies(fn, arguments):
+    """ Call fn once per argument tuple and return the latencies in seconds."""
+    samples = []
+    for args in arguments:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def metric(value, unit, higher_is_better):
+    """ Return a result entry."""
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def add_latency_metrics(results, name, samples):
+    """ Add the median and the 99th percentile of latency samples in microseconds."""
+    results[f'{name}.p50'] = metric(statistics.median(samples) * 1e6, 'us', False)
+    results[f'{name}.p99'] = metric(percentile(sorted(samples), 0.99) * 1e6, 'us', False)
+
+
+def bench_database_manager(db_path, size, durability, rng):
+    """ Measure the DatabaseManager on a new board of size tasks and return the metrics without the size suffix."""
+    results = {}
+    db_manager = DatabaseManager(db_path, durability=durability)
+
+    # Inserts: the whole board in one transaction, then single-row commits like the add button
+    seconds = timed(db_manager.insert_todo_items, generate_todo_items(size))
+    results['db.insert_batch'] = metric(size / seconds, 'rows/s', True)
+    samples = latencies(db_manager.insert_todo_item, ((item,) for item in generate_todo_items(SAMPLE_OPERATIONS, seed=1)))
+    add_latency_metrics(results, 'db.insert_single', samples)
+    ids = [row[0] for row in db_manager.connection.execute('SELECT id FROM todo_items')]
+
+    # Updates: a batch of full updates in one transaction, single updates and a status patch
+    batch = [ToDoItem(id, f'Updated {id}', rng.choice(PRIORITIES), None, None) for id in rng.sample(ids, min(len(ids), 10000))]
+    results['db.update_batch'] = metric(len(batch) / timed(db_manager.update_todo_items, batch), 'rows/s', True)
+    samples = latencies(db_manager.update_todo_item,
+                        ((ToDoItem(id, 'Renamed', 'High', None, None),) for id in rng.sample(ids, min(len(ids), SAMPLE_OPERATIONS))))
+    add_latency_metrics(results, 'db.update_single', samples)
+    patched = rng.sample(ids, min(len(ids), 10000))
+    results['db.patch_status'] = metric(len(patched) / timed(db_manager.patch_todo_items, patched, status='Done'), 'rows/s', True)
+
+    # Reads: full lists, sorted lists, one board page per column and point reads
+    results['db.list'] = metric(timed(db_manager.list_todo_items) * 1e3, 'ms', False)
+    results['db.iter'] = metric(timed(lambda: sum(1 for _ in db_manager.iter_todo_items())) * 1e3, 'ms', False)
+    for field in ('due_date', 'priority'):
+        results[f'db.sorted_list.{field}'] = metric(timed(db_manager.get_todo_items_sorted_by, field) * 1e3, 'ms', False)
+    samples = latencies(db_manager.query_todo_items,
+                        ((status, None, None, None, order_by, 200) for status in STATUSES for order_by in ('position', 'due_date', 'priority')))
+    add_latency_metrics(results, 'db.query_page', samples)
+    samples = latencies(db_manager.get_todo_item, ((id,) for id in rng.sample(ids, min(len(ids), SAMPLE_OPERATIONS))))
+    add_latency_metrics(results, 'db.get', samples)
+
+    # Deletes: a batch in one transaction, then the rest of the board
+    deleted = rng.sample(ids, min(len(ids), 10000))
+    results['db.delete_batch'] = metric(len(deleted) / timed(db_manager.delete_todo_items, deleted), 'rows/s', True)
+    results['db.delete_all'] = metric(timed(db_manager.delete_all_todo_items) * 1e3, 'ms', False)
+
+    db_manager.close_connection()
+    return results
+
+
+def bench_task_manager(db_path, size, durability, rng):
+    """ Measure the end-to-end latency of TaskManager calls on a board of size tasks and return the metrics."""
+    results = {}
+    db_manager = DatabaseManager(db_path, durability=durability)
+    db_manager.insert_todo_items(generate_todo_items(size, seed=2))
+    task_manager = TaskManager(db_manager)
+    task_manager.subscribe(lambda event: None)  # The user interface always listens to the change events
+    ids = [row[0] for row in db_manager.connection.execute('SELECT id FROM todo_items')]
+    sample = rng.sample(ids, min(len(ids), SAMPLE_OPERATIONS))
+
+    add_latency_metrics(results, 'tm.create', latencies(task_manager.create_todo_item, ((f'New task {i}',) for i in range(SAMPLE_OPERATIONS))))
+    add_latency_metrics(results, 'tm.get_miss', latencies(task_manager.get_todo_item, ((id,) for id in sample)))
+    add_latency_metrics(results, 'tm.get_hit', latencies(task_manager.get_todo_item, ((id,) for id in sample)))
+    add_latency_metrics(results, 'tm.update', latencies(task_manager.update_todo_item, ((id, 'Edited', 'Low', None, None) for id in sample)))
+    add_latency_metrics(results, 'tm.move', latencies(task_manager.move_todo_item, ((id, rng.choice(STATUSES)) for id in sample)))
+    add_latency_metrics(results, 'tm.query_page', latencies(task_manager.query_todo_items,
+                                                            ((status, None, None, None, 'position', 200) for status in STATUSES * 10)))
+    add_latency_metrics(results, 'tm.search', latencies(task_manager.search_todo_items, ((rng.choice(WORDS)[:3],) for _ in range(50))))
+    add_latency_metrics(results, 'tm.poll_idle', latencies(task_manager.poll_external_changes, (() for _ in range(SAMPLE_OPERATIONS))))
+    add_latency_metrics(results, 'tm.delete', latencies(task_manager.delete_todo_item, ((id,) for id in sample)))
+
+    db_manager.close_connection()
+    return results
+
+
+def run_suite(sizes, durability='safe', seed=0, repeat=DEFAULT_REPEAT):
+    """ Run all benchmarks repeat times for every board size and return the report as a dict. Every repetition runs the
+        same operations on a fresh database, and the value of a metric is the median of the repetitions."""
+    runs = {}
+    for size in sizes:
+        label = format_size(size)
+        for repetition in range(repeat):
+            rng = random.Random(seed)  # The same samples in every repetition
+            with tempfile.TemporaryDirectory() as directory:
+                for name, bench in (('db', bench_database_manager), ('tm', bench_task_manager)):
+                    print(f"Running {name} benchmarks on {label} tasks ({repetition + 1}/{repeat}) ...", file=sys.stderr)
+                    results = bench(os.path.join(directory, f'{name}.db'), size, durability, rng)
+                    for key, result in results.items():
+                        runs.setdefault(f'{key}[{label}]', []).append(result)
+    metrics = {}
+    for name, results in runs.items():
+        values = [result['value'] for result in results]
+        metrics[name] = dict(results[0], value=statistics.median(values), runs=values)
+    return {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'sizes': [format_size(size) for size in sizes],
+            'durability': durability,
+            'repeat': repeat,
+        },
+        'metrics': metrics,
+    }
+
+
+def compare(report, baseline, threshold):
+    """ Compare the metrics of a report with a baseline report.
+        Args:
+            report (dict): The report of this run.
+            baseline (dict): A stored report.
+            threshold (float): The relative change of the medians, e.g. 0.1 for 10%, above which a worse metric is a regression.
+        Returns:
+            list: (name, baseline value, value, relative change, regressed) tuples for the metrics in both reports, where a
+                positive change is an improvement. A metric only regressed if its best repetition is also worse than the
+                worst repetition of the baseline, because a change within the spread of the runs is noise."""
+    rows = []
+    for name, result in report['metrics'].items():
+        reference = baseline['metrics'].get(name)
+        if reference is None or not reference['value']:
+            continue
+        change = (result['value'] - reference['value']) / reference['value']
+        runs, reference_runs = result.get('runs', [result['value']]), reference.get('runs', [reference['value']])
+        if result['higher_is_better']:
+            separated = max(runs) < min(reference_runs)
+        else:
+            change = -change
+            separated = min(runs) > max(reference_runs)
+        rows.append((name, reference['value'], result['value'], change, change < -threshold and separated))
+    return rows
+
+
+def print_report(report):
+    """ Print the metrics of a report as a table."""
+    for name, result in report['metrics'].items():
+        print(f"{name:<40} {result['value']:>14.1f} {result['unit']}")
+
+
+def print_comparison(rows, threshold):
+    """ Print a comparison returned by compare and a summary line."""
+    print(f"{'metric':<40} {'baseline':>14} {'current':>14} {'change':>9}")
+    for name, reference, value, change, regressed in rows:
+        print(f"{name:<40} {reference:>14.1f} {value:>14.1f} {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"{regressions} of {len(rows)} metrics regressed by more than {threshold:.0%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1k,100k', help='comma separated board sizes, e.g. 1k,100k,1m')
+    parser.add_argument('--durability', choices=list(DURABILITY_PROFILES), default='safe', help='durability profile of the databases')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random samples')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help=f'measurements per size (default {DEFAULT_REPEAT})')
+    parser.add_argument('--output', help='write the report as JSON to this file')
+    parser.add_argument('--baseline', help='compare against a report written by an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change that counts as a regression (default 0.1)')
+    args = parser.parse_args(argv)
+
+    report = run_suite([parse_size(size) for size in args.sizes.split(',')], args.durability, args.seed, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if not args.baseline:
+        print_report(report)
+        return 0
+    with open(args.baseline) as file:
+        rows = compare(report, json.load(file), args.threshold)
+    print_comparison(rows, args.threshold)
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,23 +1,73 @@
+import time
+
+STARTED_AT = time.perf_counter()  # Taken before any other import, so --profile-startup includes the import time
+
+import argparse
+import os
 import sys
-from application.controller.task_manager import TaskManager
-from application.model.database_manager import DatabaseManager
-from application.view.user_interface import UserInterface
 
 
+def parse_arguments(argv=None):
+    """ Parse the command line arguments of the application."""
+    parser = argparse.ArgumentParser(description="Simply Done - Your Simple Task Organizer")
+    parser.add_argument('--db', help="Path of the SQLite database. Defaults to the TODO_DB_PATH environment variable or todo_list.db")
+    parser.add_argument('--durability', choices=['safe', 'fast', 'memory'], default='safe', help="The SQLite durability profile")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Print the time to window, to the first task and to the full board, then exit")
+    parser.add_argument('--profile-ui', nargs='?', const='ui_profile.json', metavar='FILE',
+                        help="Measure event loop stalls, handler times and rows added to the board, press F12 for an overlay, "
+                             "and write the report to FILE on exit (default: ui_profile.json). Also set by TODO_UI_PROFILE")
+    return parser.parse_args(argv)
 
-if __name__ == "__main__":
-    # Erstellen Sie Instanzen von Ihrem Modell und Controller
-    model = DatabaseManager('todo_list.db') 
-    controller = TaskManager(db_manager='todo_list.db')  
+
+def main(argv=None):
+    """ Start the application. The heavy imports happen here, after the arguments were parsed, and the board is loaded
+        in the background once the window is shown."""
+    arguments = parse_arguments(argv)
+
+    from application.controller.task_manager import TaskManager
+    from application.model.database_manager import DatabaseManager, resolve_db_path
+    from application.view.user_interface import UserInterface
+
+    ui_profile_path = arguments.profile_ui or os.environ.get('TODO_UI_PROFILE')
+    ui_profiler = None
+    if ui_profile_path:
+        from application.view.ui_profiler import UIProfiler
+        ui_profiler = UIProfiler()
+        ui_profiler.install()  # Before the UserInterface connects its signals to the handlers
+
+    # Erstellen Sie eine einzige Datenbank und einen Controller, die von allen Komponenten geteilt werden
+    model = DatabaseManager(resolve_db_path(arguments.db), durability=arguments.durability)
+    controller = TaskManager(model)
 
     # Erstellen Sie eine Instanz von UserInterface und übergeben Sie das Modell und den Controller
     ui = UserInterface(model, controller)
 
+    if ui_profiler is not None:
+        ui_profiler.watch(ui)
+
+    profiler = None
+    if arguments.profile_startup:
+        from application.view.startup_profiler import StartupProfiler
+        profiler = StartupProfiler(STARTED_AT)
+        profiler.watch(ui)
+        profiler.finished.connect(ui.app.quit)
+
     # Zeigen Sie das Hauptfenster an
     ui.display_main_window()
 
-    # Update the KanBan Board
+    # Update the KanBan Board. The columns are filled in the background after the window has been painted
     ui.update_kanban_board()
 
     # Starten Sie die Anwendung
-    sys.exit(ui.app.exec())
\ No newline at end of file
+    exit_code = ui.app.exec()
+    if profiler is not None:
+        print(profiler.report())
+    if ui_profiler is not None:
+        ui_profiler.dump(ui_profile_path)
+        print(f"UI profile written to {ui_profile_path}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import pytest
+from application.model.database_manager import DatabaseManager, DatabaseError
+from application.controller.async_task_manager import AsyncTaskManager
+
+
+def test_crud_and_sort(tmp_path):
+    """ Test_ID: 86
+    Test that the awaitable operations create, read, update, move, sort and delete ToDoItems, and that errors of the
+    TaskManager reach the awaiting coroutine."""
+    async def scenario():
+        async with AsyncTaskManager(str(tmp_path / 'async.db')) as task_manager:
+            first = await task_manager.create_todo_item('Write report', 'Low', 'To Do', '2024-05-02')
+            second = await task_manager.create_todo_item('Buy milk', 'High', 'To Do', '2024-05-01')
+            await task_manager.update_todo_item(first.id, 'Write final report', None, None, None)
+            assert (await task_manager.get_todo_item(first.id)).title == 'Write final report'
+            await task_manager.move_todo_item(second.id, 'Done')
+            assert [item.id for item in await task_manager.sort_todo_items_by_priority()] == [second.id, first.id]
+            assert [item.id for item in await task_manager.sort_todo_items_by_due_date()] == [second.id, first.id]
+            assert [item.status for item in await task_manager.list_todo_items()] == ['To Do', 'Done']
+            await task_manager.delete_todo_item(first.id)
+            with pytest.raises(DatabaseError):
+                await task_manager.get_todo_item(first.id)
+    asyncio.run(scenario())
+
+
+def test_concurrent_writes_and_paged_iteration(tmp_path):
+    """ Test_ID: 87
+    Test that concurrently awaited writes are all applied with distinct IDs and that iter_todo_items yields every matching
+    item in sort order across several pages."""
+    async def scenario():
+        async with AsyncTaskManager(str(tmp_path / 'async.db'), max_readers=3) as task_manager:
+            todo_items = await asyncio.gather(*(task_manager.create_todo_item(f'Task {i}', status='Done' if i % 2 else 'To Do')
+                                                for i in range(40)))
+            assert len({todo_item.id for todo_item in todo_items}) == 40
+            titles = [todo_item.title async for todo_item in task_manager.iter_todo_items(batch_size=7, status='Done')]
+            assert titles == [f'Task {i}' for i in range(1, 40, 2)]
+            counts = await asyncio.gather(*(task_manager.query_todo_items(status='To Do') for _ in range(10)))
+            assert {len(page) for page in counts} == {20}
+    asyncio.run(scenario())
+
+
+def test_reads_do_not_wait_for_writes(tmp_path):
+    """ Test_ID: 88
+    Test that a read completes while another thread holds the write transaction open, and that a write awaited during
+    that time is applied once the transaction ended."""
+    db_manager = DatabaseManager(str(tmp_path / 'async.db'))
+    started, release = threading.Event(), threading.Event()
+
+    def hold_writer():
+        with db_manager.transaction():
+            started.set()
+            release.wait(5)
+
+    async def scenario():
+        task_manager = AsyncTaskManager(db_manager)
+        await task_manager.create_todo_item('Existing')
+        holder = threading.Thread(target=hold_writer)
+        holder.start()
+        started.wait(5)
+        write = asyncio.ensure_future(task_manager.create_todo_item('Queued'))
+        assert [item.title for item in await asyncio.wait_for(task_manager.list_todo_items(), 2)] == ['Existing']
+        assert not write.done()
+        release.set()
+        assert (await asyncio.wait_for(write, 5)).title == 'Queued'
+        holder.join()
+        await task_manager.close()
+    asyncio.run(scenario())
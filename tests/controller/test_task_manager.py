@@ -1,7 +1,9 @@
+import io
 import pytest
 from application.model.todo_item import ToDoItem
 from application.model.database_manager import DatabaseManager, DatabaseError
 from application.controller.task_manager import TaskManager
+from application.controller.change_event import ChangeEvent
 
 class TestTaskManager:
     @classmethod
@@ -102,4 +104,177 @@ class TestTaskManager:
         """ Test_ID: 22
         Test that an error is raised when retrieving a nonexistent todo item."""
         with pytest.raises(DatabaseError):
-            self.task_manager.get_todo_item(9999)
\ No newline at end of file
+            self.task_manager.get_todo_item(9999)
+
+    def test_create_update_delete_todo_items(self):
+        """ Test_ID: 26
+        Test that the bulk methods create, update and delete many todo items."""
+        ids = self.task_manager.create_todo_items(ToDoItem(None, f'Test title {i}', 'High', 'To Do', None) for i in range(4))
+        assert len(self.task_manager.list_todo_items()) == 4
+        self.task_manager.update_todo_items([ToDoItem(ids[0], 'Renamed', None, None, None)])
+        assert self.task_manager.get_todo_item(ids[0]).title == 'Renamed'
+        self.task_manager.delete_todo_items(ids)
+        assert self.task_manager.list_todo_items() == []
+
+    def test_create_todo_items_with_empty_title(self):
+        """ Test_ID: 27
+        Test that an empty title aborts the whole batch with a ValueError."""
+        with pytest.raises(ValueError):
+            self.task_manager.create_todo_items([ToDoItem(None, 'Valid', None, None, None), ToDoItem(None, '', None, None, None)])
+        assert self.task_manager.list_todo_items() == []
+
+    def test_update_nonexistent_todo_item(self):
+        """ Test_ID: 42
+        Test that an error is raised when updating a nonexistent todo item."""
+        with pytest.raises(DatabaseError):
+            self.task_manager.update_todo_item(9999, 'Title', None, None, None)
+
+    def test_iter_todo_items(self):
+        """ Test_ID: 47
+        Test that all todo items can be streamed through the task manager."""
+        ids = self.task_manager.create_todo_items(ToDoItem(None, f'Test title {i}', 'High', 'To Do', None) for i in range(5))
+        assert [item.id for item in self.task_manager.iter_todo_items(batch_size=2)] == ids
+
+    def test_query_todo_items(self):
+        """ Test_ID: 51
+        Test that the task manager pages through todo items sorted by priority."""
+        for priority in ['Low', 'High', 'Medium', 'High']:
+            self.task_manager.create_todo_item(f'Test title {priority}', priority, 'To Do', None)
+        first_page = self.task_manager.query_todo_items(order_by='priority', limit=3)
+        second_page = self.task_manager.query_todo_items(order_by='priority', limit=3, after_key=first_page[-1])
+        assert [item.priority for item in first_page + second_page] == ['High', 'High', 'Medium', 'Low']
+
+    def test_search_todo_items(self):
+        """ Test_ID: 54
+        Test that the task manager finds todo items by the start of a word in their title."""
+        self.task_manager.create_todo_item('Write report', 'High', 'To Do', None)
+        self.task_manager.create_todo_item('Read book', 'Low', 'To Do', None)
+        assert [item.title for item in self.task_manager.search_todo_items('rep')] == ['Write report']
+
+    def test_init_opens_database_from_path_or_environment(self, monkeypatch):
+        """ Test_ID: 63
+        Test that the TaskManager opens a database from a path and falls back to the TODO_DB_PATH environment variable.
+        A DatabaseManager passed to the constructor should be used as is."""
+        monkeypatch.setenv('TODO_DB_PATH', ':memory:')
+        assert TaskManager(self.database_manager).db_manager is self.database_manager
+        assert TaskManager(':memory:').db_manager.db_path == ':memory:'
+        assert TaskManager().db_manager.db_path == ':memory:'
+
+    def test_get_todo_item_is_served_from_cache(self):
+        """ Test_ID: 67
+        Test that a ToDoItem that was listed or read before is returned from the cache without a database query.
+        The hit and miss counters should count the lookups."""
+        todo_item = self.task_manager.create_todo_item('Cached', 'High', 'To Do', None)
+        self.task_manager.cache.invalidate()
+        listed = self.task_manager.query_todo_items(status='To Do')[0]
+        hits_before = self.task_manager.cache_stats()['hits']
+        original_get = self.database_manager.get_todo_item
+        self.database_manager.get_todo_item = lambda id: pytest.fail("The database should not be queried")
+        try:
+            assert self.task_manager.get_todo_item(todo_item.id) is listed
+        finally:
+            self.database_manager.get_todo_item = original_get
+        assert self.task_manager.cache_stats()['hits'] == hits_before + 1
+
+    def test_writes_invalidate_cached_items(self):
+        """ Test_ID: 68
+        Test that every write through the TaskManager is visible to the next get_todo_item.
+        The cache should never hold more items than its capacity."""
+        task_manager = TaskManager(self.database_manager, cache_size=2)
+        todo_item = task_manager.create_todo_item('Original', 'Low', 'To Do', None)
+        task_manager.update_todo_item(todo_item.id, 'Renamed', None, None, None)
+        assert task_manager.get_todo_item(todo_item.id).title == 'Renamed'
+        task_manager.update_todo_status(todo_item.id, 'Done')
+        assert task_manager.get_todo_item(todo_item.id).status == 'Done'
+        task_manager.patch_todo_items([todo_item.id], priority='High')
+        assert task_manager.get_todo_item(todo_item.id).priority == 'High'
+        task_manager.delete_todo_item(todo_item.id)
+        with pytest.raises(DatabaseError):
+            task_manager.get_todo_item(todo_item.id)
+        for title in ('A', 'B', 'C'):
+            task_manager.create_todo_item(title)
+        assert task_manager.cache_stats()['size'] == 2
+
+    def test_subscribers_receive_change_events(self):
+        """ Test_ID: 72
+        Test that every write notifies the subscribers with the kind of change and the affected IDs."""
+        events = []
+        callback = self.task_manager.subscribe(events.append)
+        try:
+            todo_item = self.task_manager.create_todo_item('Observed')
+            self.task_manager.update_todo_item(todo_item.id, 'Renamed', None, None, None)
+            self.task_manager.update_todo_status(todo_item.id, 'Done')
+            self.task_manager.delete_todo_item(todo_item.id)
+            self.task_manager.delete_all_todo_items()
+        finally:
+            self.task_manager.unsubscribe(callback)
+        assert [(event.kind, event.ids) for event in events] == [
+            (ChangeEvent.CREATED, (todo_item.id,)), (ChangeEvent.UPDATED, (todo_item.id,)),
+            (ChangeEvent.STATUS_CHANGED, (todo_item.id,)), (ChangeEvent.DELETED, (todo_item.id,)), (ChangeEvent.RESET, ())]
+        assert events[0].todo_items == (todo_item,)
+
+    def test_poll_external_changes(self, tmp_path):
+        """ Test_ID: 73
+        Test that changes written by another connection are found by polling and drop the affected items from the cache.
+        Polling without external changes should report nothing."""
+        db_path = str(tmp_path / 'shared.db')
+        task_manager, other_instance = TaskManager(db_path), TaskManager(db_path)
+        todo_item = task_manager.create_todo_item('Shared', status='To Do')
+        assert task_manager.poll_external_changes() == []
+        other_instance.update_todo_status(todo_item.id, 'Done')
+        other_instance.delete_todo_items([todo_item.id + 1])  # Deletes nothing, so nothing is logged
+        events = task_manager.poll_external_changes()
+        assert [(event.kind, event.ids, event.external) for event in events] == [(ChangeEvent.STATUS_CHANGED, (todo_item.id,), True)]
+        assert task_manager.get_todo_item(todo_item.id).status == 'Done'
+        assert task_manager.poll_external_changes() == []
+
+    def test_poll_external_changes_written_while_skipping_own_changes(self, tmp_path):
+        """ Test_ID: 104
+        Test that a change of another connection committed right after this TaskManager checked data_version for its own
+        write is still reported by the next poll instead of being skipped with the own change."""
+        db_path = str(tmp_path / 'shared.db')
+        task_manager, other_instance = TaskManager(db_path), DatabaseManager(db_path)
+        statements, foreign = [], []
+        def write_after_data_version(statement):  # Called before each statement, so the write follows the PRAGMA
+            if statements and statements[-1] == 'PRAGMA data_version' and not foreign:
+                foreign.append(other_instance.insert_todo_item(ToDoItem(None, 'Foreign', 'Low', 'To Do', None)))
+            statements.append(statement)
+        connections = [task_manager.db_manager.pool.writer_connection]
+        with task_manager.db_manager.pool.reader() as connection:
+            connections.append(connection)
+        for connection in connections:
+            connection.set_trace_callback(write_after_data_version)
+        try:
+            task_manager.create_todo_item('Own', status='To Do')
+        finally:
+            for connection in connections:
+                connection.set_trace_callback(None)
+        assert foreign
+        events = task_manager.poll_external_changes()
+        assert [(event.kind, event.ids) for event in events] == [(ChangeEvent.CREATED, (foreign[0].id,))]
+        other_instance.close_connection()
+
+    def test_import_export_and_handle_submit(self):
+        """ Test_ID: 81
+        Test that an import through the TaskManager drops cached items and tells the subscribers to reload, that the
+        export writes every item, and that handle_submit reports malformed and impossible due dates."""
+        todo_item = self.task_manager.create_todo_item('Cached')
+        self.task_manager.get_todo_item(todo_item.id)
+        events = []
+        callback = self.task_manager.subscribe(events.append)
+        try:
+            file = io.StringIO(f'id,title\n{todo_item.id},Imported\n', newline='')
+            assert self.task_manager.import_todo_items(file) == 1
+        finally:
+            self.task_manager.unsubscribe(callback)
+        assert [event.kind for event in events] == [ChangeEvent.RESET]
+        assert self.task_manager.get_todo_item(todo_item.id).title == 'Imported'
+
+        file = io.StringIO()
+        assert self.task_manager.export_todo_items(file, 'jsonl') == len(self.task_manager.list_todo_items())
+        assert '"title": "Imported"' in file.getvalue()
+
+        assert self.task_manager.handle_submit(todo_item.id, 'Imported', 'High', 'To Do', '01.02.2024') == "Use YYYY/MM/DD format"
+        assert self.task_manager.handle_submit(todo_item.id, 'Imported', 'High', 'To Do', '2024/02/30').startswith("Invalid date")
+        assert self.task_manager.handle_submit(todo_item.id, 'Imported', 'High', 'To Do', '2024/02/29') is True
+        assert self.task_manager.get_todo_item(todo_item.id).due_date_text == '2024-02-29'
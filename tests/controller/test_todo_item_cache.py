@@ -0,0 +1,25 @@
+from application.model.todo_item import ToDoItem
+from application.controller.todo_item_cache import TodoItemCache
+
+class TestTodoItemCache:
+    def test_evicts_least_recently_used(self):
+        """ Test_ID: 69
+        Test that the cache evicts the least recently used item once it is full."""
+        cache = TodoItemCache(capacity=2)
+        cache.put([ToDoItem(1, 'One', None, None, None), ToDoItem(2, 'Two', None, None, None)])
+        cache.get(1)  # 2 is now the least recently used item
+        cache.put([ToDoItem(3, 'Three', None, None, None)])
+        assert cache.get(2) is None
+        assert cache.get(1).title == 'One'
+        assert cache.stats() == {'hits': 2, 'misses': 1, 'size': 2, 'capacity': 2}
+
+    def test_put_ignores_items_loaded_before_a_write(self):
+        """ Test_ID: 70
+        Test that items loaded before an invalidation are not stored, because they may be outdated."""
+        cache = TodoItemCache()
+        generation = cache.generation
+        cache.invalidate([1])  # A write happens while the item is loaded
+        cache.put([ToDoItem(1, 'Outdated', None, None, None)], generation)
+        assert cache.get(1) is None
+        cache.put([ToDoItem(1, 'Current', None, None, None)], cache.generation)
+        assert cache.get(1).title == 'Current'
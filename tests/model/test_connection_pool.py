@@ -0,0 +1,119 @@
+import threading
+import pytest
+from application.model.connection_pool import ConnectionPool
+from application.model.database_manager import DatabaseManager
+from application.model.todo_item import ToDoItem
+
+class TestConnectionPool:
+    def test_reader_connection_per_thread(self, tmp_path):
+        """ Test_ID: 34
+        Test that every thread gets its own reader connection and that a thread reuses its connection."""
+        pool = ConnectionPool(str(tmp_path / 'pool.db'))
+        connections = []
+        barrier = threading.Barrier(3)
+
+        def check_out():
+            with pool.reader() as first, pool.reader() as second:
+                assert first is second
+                connections.append(first)
+                barrier.wait()  # All threads hold their connection at the same time
+
+        threads = [threading.Thread(target=check_out) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len({id(connection) for connection in connections}) == 3
+        assert all(connection is not pool.writer_connection for connection in connections)
+        pool.close()
+
+    def test_reader_connections_of_ended_threads_are_reused(self, tmp_path):
+        """ Test_ID: 95
+        Test that the reader connections of threads that ended are reused by new threads and that no more than
+        max_idle_readers stay open, so short-lived threads do not pile up connections."""
+        pool = ConnectionPool(str(tmp_path / 'pool.db'), max_idle_readers=2)
+
+        def read():
+            with pool.reader() as connection:
+                connection.execute('SELECT 1').fetchone()
+
+        for _ in range(50):
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join()
+        assert len(pool._readers) == 1
+
+        barrier = threading.Barrier(5)
+        threads = [threading.Thread(target=lambda: (read(), barrier.wait())) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(pool._readers) == 2
+        pool.close()
+
+    def test_in_memory_readers_share_writer(self):
+        """ Test_ID: 35
+        Test that an in-memory database is read through the writer connection, because it only exists in that connection."""
+        pool = ConnectionPool(':memory:')
+        with pool.reader() as connection:
+            assert connection is pool.writer_connection
+        pool.close()
+
+    def test_writer_rolls_back_on_error(self):
+        """ Test_ID: 36
+        Test that the writer transaction is rolled back when the block raises."""
+        pool = ConnectionPool(':memory:')
+        with pool.writer() as connection:
+            connection.execute('CREATE TABLE items(value INTEGER)')
+        with pytest.raises(RuntimeError):
+            with pool.writer() as connection:
+                connection.execute('INSERT INTO items VALUES (1)')
+                raise RuntimeError('abort')
+        with pool.reader() as connection:
+            assert connection.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+        pool.close()
+
+    def test_database_manager_from_worker_threads(self, tmp_path):
+        """ Test_ID: 37
+        Test that one DatabaseManager can be used from several threads at the same time.
+        Every insert should be stored and the last inserted ID should be tracked per thread."""
+        db_manager = DatabaseManager(str(tmp_path / 'threads.db'), durability='fast')
+        errors = []
+
+        def work(worker):
+            try:
+                for i in range(20):
+                    db_manager.insert_todo_item(ToDoItem(None, f'Worker {worker} task {i}', 'Low', 'To Do', None))
+                    inserted = db_manager.get_todo_item(db_manager.get_last_inserted_id())
+                    assert inserted.title == f'Worker {worker} task {i}'
+                    db_manager.list_todo_items()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert len(db_manager.list_todo_items()) == 80
+        db_manager.close_connection()
+
+    def test_nested_writers_join_one_transaction(self, tmp_path):
+        """ Test_ID: 85
+        Test that writer blocks nested in the same thread are committed or rolled back together with the outermost block,
+        and that reads inside the outermost block see its uncommitted writes."""
+        pool = ConnectionPool(str(tmp_path / 'nested.db'))
+        with pool.writer() as connection:
+            connection.execute('CREATE TABLE items(value INTEGER)')
+        with pytest.raises(RuntimeError):
+            with pool.writer():
+                with pool.writer() as connection:
+                    connection.execute('INSERT INTO items VALUES (1)')
+                with pool.reader() as connection:
+                    assert connection.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 1
+                raise RuntimeError('abort')
+        with pool.reader() as connection:
+            assert connection.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+        pool.close()
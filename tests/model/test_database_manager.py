@@ -1,5 +1,6 @@
 import pytest
 import sqlite3
+import threading
 from application.model.todo_item import ToDoItem
 from application.model.database_manager import DatabaseManager
 
@@ -104,4 +105,240 @@ class TestDatabaseManager:
         self.db_manager.insert_todo_item(self.todo_item)
         self.db_manager.update_todo_status(1, 'Done')
         retrieved_item = self.db_manager.get_todo_item(1)
-        assert retrieved_item.status == 'Done'
\ No newline at end of file
+        assert retrieved_item.status == 'Done'
+
+    def test_insert_todo_items(self):
+        """ Test_ID: 23
+        Test that many todo items are inserted in one batch.
+        The method should return the IDs of the inserted rows in insertion order."""
+        items = [ToDoItem(None, f'Title {i}', 'Low', 'To Do', '2022-01-01') for i in range(5)]
+        ids = self.db_manager.insert_todo_items(iter(items))
+        assert len(ids) == 5
+        assert [self.db_manager.get_todo_item(id).title for id in ids] == [f'Title {i}' for i in range(5)]
+
+    def test_insert_todo_items_rolls_back_on_error(self):
+        """ Test_ID: 24
+        Test that a failing batch insert leaves no rows behind."""
+        def items():
+            yield ToDoItem(None, 'First', 'Low', 'To Do', None)
+            raise RuntimeError('broken source')
+        with pytest.raises(RuntimeError):
+            self.db_manager.insert_todo_items(items())
+        assert self.db_manager.list_todo_items() == []
+
+    def test_insert_todo_items_ignores_rows_of_other_connections(self, tmp_path):
+        """ Test_ID: 103
+        Test that a row committed by another connection while a batch is inserted is not returned as one of the batch.
+        The other connection writes right after the batch read the highest ID so far."""
+        mine = DatabaseManager(str(tmp_path / 'todo.db'))
+        other = DatabaseManager(str(tmp_path / 'todo.db'))
+        statements = []
+        writers = []
+        def start_other_writer(statement):
+            statements.append(statement)  # The callback runs before a statement, so wait for the one after the maximum
+            if len(statements) > 1 and 'MAX(id)' in statements[-2] and not writers:
+                writers.append(threading.Thread(target=other.insert_todo_item, args=(ToDoItem(None, 'foreign', 'Low', 'To Do', None),)))
+                writers[0].start()
+                writers[0].join(0.5)  # Give the other connection the chance to commit before the batch is inserted
+        mine.pool.writer_connection.set_trace_callback(start_other_writer)
+        try:
+            ids = mine.insert_todo_items([ToDoItem(None, 'mine', 'Low', 'To Do', None) for _ in range(2)])
+        finally:
+            mine.pool.writer_connection.set_trace_callback(None)
+            writers[0].join()
+        assert [mine.get_todo_item(id).title for id in ids] == ['mine', 'mine']
+        assert len(mine.list_todo_items()) == 3
+        mine.close_connection()
+        other.close_connection()
+
+    def test_update_and_delete_todo_items(self):
+        """ Test_ID: 25
+        Test that many todo items are updated and deleted in one batch.
+        Attributes that are None should keep their current value."""
+        ids = self.db_manager.insert_todo_items([ToDoItem(None, f'Title {i}', 'Low', 'To Do', None) for i in range(3)])
+        updated = self.db_manager.update_todo_items(ToDoItem(id, None, None, 'Done', None) for id in ids)
+        assert updated == 3
+        assert all(self.db_manager.get_todo_item(id).status == 'Done' for id in ids)
+        assert self.db_manager.get_todo_item(ids[0]).title == 'Title 0'
+        assert self.db_manager.delete_todo_items(ids[:2]) == 2
+        assert [item.id for item in self.db_manager.list_todo_items()] == ids[2:]
+
+    def test_durability_profiles(self, tmp_path):
+        """ Test_ID: 32
+        Test that the durability profile sets the journal mode and synchronous level of the connection."""
+        safe = DatabaseManager(str(tmp_path / 'safe.db'))
+        assert safe.connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert safe.connection.execute('PRAGMA synchronous').fetchone()[0] == 2  # FULL
+        safe.close_connection()
+        fast = DatabaseManager(str(tmp_path / 'fast.db'), durability='fast')
+        assert fast.connection.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        fast.close_connection()
+
+    def test_unknown_durability_profile(self):
+        """ Test_ID: 33
+        Test that an unknown durability profile raises a ValueError."""
+        with pytest.raises(ValueError):
+            DatabaseManager(':memory:', durability='reckless')
+
+    def test_insert_todo_item_returns_item_with_id(self):
+        """ Test_ID: 38
+        Test that inserting a todo item returns a new todo item carrying the ID assigned by the database."""
+        inserted = self.db_manager.insert_todo_item(ToDoItem(None, 'New title', 'Low', 'To Do', None))
+        assert inserted.id is not None
+        assert inserted.title == 'New title'
+        assert self.db_manager.get_todo_item(inserted.id).title == 'New title'
+
+    def test_insert_todo_item_propagates_errors(self):
+        """ Test_ID: 39
+        Test that a failing insert raises instead of silently returning a stale ID."""
+        self.db_manager.close_connection()
+        try:
+            with pytest.raises(sqlite3.Error):
+                self.db_manager.insert_todo_item(self.todo_item)
+        finally:
+            self.db_manager.connect()
+            self.db_manager.create_table()
+
+    def test_update_todo_item_keeps_missing_fields(self):
+        """ Test_ID: 40
+        Test that attributes which are None keep their stored value when a todo item is updated."""
+        inserted = self.db_manager.insert_todo_item(self.todo_item)
+        assert self.db_manager.update_todo_item(ToDoItem(inserted.id, None, None, 'Done', None))
+        retrieved_item = self.db_manager.get_todo_item(inserted.id)
+        assert retrieved_item.title == 'Test title'
+        assert retrieved_item.status == 'Done'
+        assert retrieved_item.due_date.format('YYYY-MM-DD') == '2022-01-01'
+        assert not self.db_manager.update_todo_item(ToDoItem(9999, 'Missing', None, None, None))
+
+    def test_patch_todo_items(self):
+        """ Test_ID: 41
+        Test that the same values are written to many todo items and that only whitelisted columns are accepted."""
+        ids = self.db_manager.insert_todo_items([ToDoItem(None, f'Title {i}', 'Low', 'To Do', None) for i in range(3)])
+        assert self.db_manager.patch_todo_items(ids[:2], status='Done', due_date='2022-03-03') == 2
+        assert [item.status for item in self.db_manager.list_todo_items()] == ['Done', 'Done', 'To Do']
+        assert self.db_manager.get_todo_item(ids[0]).title == 'Title 0'
+        with pytest.raises(ValueError):
+            self.db_manager.patch_todo_items(ids, id=1)
+
+    def test_iter_todo_items(self):
+        """ Test_ID: 46
+        Test that todo items are streamed in batches and can be sorted by priority."""
+        self.db_manager.insert_todo_items(ToDoItem(None, f'Title {i}', ['Low', 'High', 'Medium'][i % 3], 'To Do', None) for i in range(7))
+        iterator = self.db_manager.iter_todo_items(batch_size=3)
+        assert next(iterator).title == 'Title 0'
+        assert [item.title for item in iterator] == [f'Title {i}' for i in range(1, 7)]
+        priorities = [item.priority for item in self.db_manager.iter_todo_items(batch_size=2, order_by='priority')]
+        assert priorities == ['High'] * 2 + ['Medium'] * 2 + ['Low'] * 3
+
+    def test_query_todo_items_keyset_pagination(self):
+        """ Test_ID: 48
+        Test that paging with the last item of each page returns every matching item exactly once, in sort order.
+        Items without due date sort first and items with equal due dates are ordered by ID."""
+        due_dates = [None, '2022-03-01', '2022-01-01', None, '2022-01-01', '2022-02-01', '2022-03-01']
+        self.db_manager.insert_todo_items(ToDoItem(None, f'Title {i}', 'Low', 'Done', due_date) for i, due_date in enumerate(due_dates))
+        pages, after_key = [], None
+        while True:
+            page = self.db_manager.query_todo_items(status='Done', order_by='due_date', limit=2, after_key=after_key)
+            if not page:
+                break
+            pages.append(page)
+            after_key = page[-1]
+        items = [item for page in pages for item in page]
+        assert [item.due_date_text for item in items] == sorted(due_dates, key=lambda due_date: (due_date is not None, due_date or ''))
+        assert len({item.id for item in items}) == len(due_dates)
+        assert max(len(page) for page in pages) == 2
+
+    def test_query_todo_items_filters(self):
+        """ Test_ID: 49
+        Test that query_todo_items filters by status, priority and due date. None in a status list matches items without status."""
+        self.db_manager.insert_todo_items([
+            ToDoItem(None, 'A', 'High', None, '2022-01-01'),
+            ToDoItem(None, 'B', 'Low', 'To Do', '2022-02-01'),
+            ToDoItem(None, 'C', 'High', 'Done', '2022-03-01'),
+        ])
+        assert [item.title for item in self.db_manager.query_todo_items(status=['To Do', None])] == ['A', 'B']
+        assert [item.title for item in self.db_manager.query_todo_items(priority='High', due_after='2022-01-15')] == ['C']
+        assert [item.title for item in self.db_manager.query_todo_items(due_before='2022-02-01', order_by='priority')] == ['A']
+
+    def test_sorting_rejects_unknown_fields(self):
+        """ Test_ID: 50
+        Test that sort fields are whitelisted and never interpolated into the SQL text."""
+        with pytest.raises(ValueError):
+            self.db_manager.get_todo_items_sorted_by('id; DROP TABLE todo_items')
+        with pytest.raises(ValueError):
+            self.db_manager.query_todo_items(order_by='priority_rank')
+
+    def test_search_todo_items(self):
+        """ Test_ID: 52
+        Test that the full-text search matches word prefixes and follows inserts, updates and deletes of todo items."""
+        ids = self.db_manager.insert_todo_items([
+            ToDoItem(None, 'Buy milk', None, None, None),
+            ToDoItem(None, 'Buy bread', None, None, None),
+            ToDoItem(None, 'Call the milkman', None, None, None),
+        ])
+        assert self.db_manager.has_search_index()
+        assert {item.title for item in self.db_manager.search_todo_items('mil')} == {'Buy milk', 'Call the milkman'}
+        assert [item.title for item in self.db_manager.search_todo_items('buy mil')] == ['Buy milk']
+        assert len(self.db_manager.search_todo_items('buy', limit=1)) == 1
+        self.db_manager.update_todo_item(ToDoItem(ids[1], 'Bake bread', None, None, None))
+        assert [item.title for item in self.db_manager.search_todo_items('buy')] == ['Buy milk']
+        self.db_manager.delete_todo_item(ids[0])
+        assert [item.title for item in self.db_manager.search_todo_items('milk')] == ['Call the milkman']
+        assert self.db_manager.search_todo_items('"*') == []
+
+    def test_search_todo_items_without_fts5(self):
+        """ Test_ID: 53
+        Test that the search falls back to LIKE queries when the database has no FTS5 index."""
+        db_manager = DatabaseManager(':memory:')
+        with db_manager.pool.writer() as connection:
+            for trigger in ('insert', 'update', 'delete'):
+                connection.execute(f'DROP TRIGGER todo_items_fts_{trigger}')
+            connection.execute('DROP TABLE todo_items_fts')
+        db_manager.insert_todo_item(ToDoItem(None, 'Buy milk', None, None, None))
+        db_manager.insert_todo_item(ToDoItem(None, 'Buy bread', None, None, None))
+        assert not db_manager.has_search_index()
+        assert [item.title for item in db_manager.search_todo_items('buy mil')] == ['Buy milk']
+        db_manager.close_connection()
+
+    def test_move_todo_item_between_neighbours(self):
+        """ Test_ID: 66
+        Test that moving a todo item writes a position between its new neighbours and keeps the order when sorted by position.
+        Repeated moves into the same gap should renumber the column once the positions get too close."""
+        ids = self.db_manager.insert_todo_items([ToDoItem(None, f'Task {i}', None, 'To Do', None) for i in range(70)])
+        moved = self.db_manager.move_todo_item(ids[2], 'To Do', after_id=ids[0], before_id=ids[1])
+        assert ids[0] < moved.position < ids[1]
+        for previous_id, id in zip(ids[2:], ids[3:]):  # Halving the same gap over and over exhausts the precision of a float
+            self.db_manager.move_todo_item(id, 'To Do', after_id=ids[0], before_id=previous_id)
+        assert [todo.id for todo in self.db_manager.query_todo_items(status='To Do', order_by='position')] == [ids[0]] + ids[:0:-1]
+        moved = self.db_manager.move_todo_item(ids[0], 'Done')
+        assert moved.status == 'Done'
+        assert self.db_manager.move_todo_item(9999, 'Done') is None
+
+    def test_move_todo_item_next_to_one_neighbour(self):
+        """ Test_ID: 99
+        Test that moving a todo item after or before a single item places it right next to that item, between it and the
+        item adjacent to it, instead of at the position of the adjacent item."""
+        ids = self.db_manager.insert_todo_items([ToDoItem(None, f'Task {i}', None, 'To Do', None) for i in range(1, 6)])
+
+        self.db_manager.move_todo_item(ids[4], 'To Do', after_id=ids[0])
+        after_order = [todo.id for todo in self.db_manager.query_todo_items(status='To Do', order_by='position')]
+        self.db_manager.move_todo_item(ids[0], 'To Do', before_id=ids[3])
+        before_order = [todo.id for todo in self.db_manager.query_todo_items(status='To Do', order_by='position')]
+
+        assert after_order == [ids[0], ids[4], ids[1], ids[2], ids[3]]
+        assert before_order == [ids[4], ids[1], ids[2], ids[0], ids[3]]
+        positions = [todo.position for todo in self.db_manager.query_todo_items(status='To Do', order_by='position')]
+        assert len(set(positions)) == len(positions)
+
+    def test_move_todo_item_rejects_invalid_neighbours(self):
+        """ Test_ID: 105
+        Test that a move next to an unknown item, an item of another column, the moved item itself or between neighbours
+        in the wrong order is rejected and leaves the moved item where it was."""
+        ids = self.db_manager.insert_todo_items([ToDoItem(None, f'Task {i}', None, 'To Do', None) for i in range(1, 5)])
+        other = self.db_manager.insert_todo_item(ToDoItem(None, 'Elsewhere', None, 'Done', None))
+        for neighbours in ({'before_id': 9999}, {'after_id': other.id}, {'after_id': ids[2]},
+                           {'after_id': ids[3], 'before_id': ids[1]}, {'after_id': ids[1], 'before_id': ids[1]}):
+            with pytest.raises(ValueError):
+                self.db_manager.move_todo_item(ids[2], 'To Do', **neighbours)
+        assert [todo.id for todo in self.db_manager.query_todo_items(status='To Do', order_by='position')] == ids
+        assert all(todo.position is not None for todo in self.db_manager.list_todo_items())
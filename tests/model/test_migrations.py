@@ -0,0 +1,73 @@
+import sqlite3
+import threading
+from application.model.database_manager import DatabaseManager
+from application.model.migrations import LATEST_VERSION, get_schema_version, run_migrations
+
+class TestMigrations:
+    def test_new_database_is_at_latest_version(self):
+        """ Test_ID: 28
+        Test that a new database is created with the latest schema version."""
+        db_manager = DatabaseManager(':memory:')
+        assert get_schema_version(db_manager.connection) == LATEST_VERSION
+        db_manager.close_connection()
+
+    def test_legacy_database_is_upgraded_in_place(self, tmp_path):
+        """ Test_ID: 29
+        Test that a database created before the migration system is upgraded when it is opened.
+        Existing rows should be kept and the priority rank should be derived from the priority."""
+        db_path = str(tmp_path / 'legacy.db')
+        connection = sqlite3.connect(db_path)
+        connection.execute('CREATE TABLE todo_items(id INTEGER PRIMARY KEY, title TEXT, priority TEXT, status TEXT, due_date TEXT)')
+        connection.execute("INSERT INTO todo_items VALUES (1, 'Old task', 'Medium', 'To Do', '2022-01-01')")
+        connection.commit()
+        connection.close()
+
+        db_manager = DatabaseManager(db_path)
+        assert db_manager.get_todo_item(1).title == 'Old task'
+        assert db_manager.connection.execute('SELECT priority_rank FROM todo_items WHERE id = 1').fetchone()[0] == 2
+        indexes = {row[1] for row in db_manager.connection.execute("PRAGMA index_list('todo_items')")}
+        assert {'idx_todo_items_status', 'idx_todo_items_due_date', 'idx_todo_items_priority_rank'} <= indexes
+        db_manager.close_connection()
+
+    def test_run_migrations_is_idempotent(self):
+        """ Test_ID: 30
+        Test that running the migrations twice does not apply any migration again."""
+        connection = sqlite3.connect(':memory:')
+        assert run_migrations(connection) == LATEST_VERSION
+        assert run_migrations(connection) == LATEST_VERSION
+        assert connection.execute('SELECT COUNT(*) FROM schema_migrations').fetchone()[0] == LATEST_VERSION
+
+    def test_concurrent_opens_apply_each_migration_once(self, tmp_path):
+        """ Test_ID: 94
+        Test that several connections opening a new database at the same time, like the GUI and a CLI cron job, do not
+        fail on migrations another connection applied first."""
+        db_path = str(tmp_path / 'shared.db')
+        barrier = threading.Barrier(4)
+        errors = []
+
+        def open_database():
+            barrier.wait()
+            try:
+                DatabaseManager(db_path).close_connection()
+            except sqlite3.Error as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=open_database) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        connection = sqlite3.connect(db_path)
+        assert [row[0] for row in connection.execute('SELECT version FROM schema_migrations')] == list(range(1, LATEST_VERSION + 1))
+        connection.close()
+
+    def test_priority_sort_uses_index(self):
+        """ Test_ID: 31
+        Test that sorting by priority is answered by the priority rank index instead of a temporary B-tree."""
+        db_manager = DatabaseManager(':memory:')
+        plan = db_manager.connection.execute('EXPLAIN QUERY PLAN SELECT id FROM todo_items ORDER BY priority_rank').fetchall()
+        assert any('idx_todo_items_priority_rank' in row[-1] for row in plan)
+        assert not any('TEMP B-TREE' in row[-1] for row in plan)
+        db_manager.close_connection()
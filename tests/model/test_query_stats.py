@@ -0,0 +1,54 @@
+import logging
+from application.model.todo_item import ToDoItem
+from application.model.database_manager import DatabaseManager
+from application.model.query_stats import QueryStats, normalize_sql
+from application.controller.task_manager import TaskManager
+
+
+def test_records_statements_with_rows_and_percentiles():
+    """ Test_ID: 89
+    Test that every statement is counted under its normalized text, with the rows it returned and its latency
+    percentiles, and that IN lists of any length count as the same statement."""
+    db_manager = DatabaseManager(':memory:', query_stats=True)
+    db_manager.insert_todo_items(ToDoItem(None, f'Task {i}', 'High', 'To Do', None) for i in range(30))
+    db_manager.query_stats.reset()
+    for _ in range(3):
+        db_manager.list_todo_items()
+    list(db_manager.iter_todo_items(batch_size=7))
+    db_manager.query_todo_items(status=['To Do', 'Done'])
+    db_manager.query_todo_items(status=['To Do', 'Done', 'In Progress'])
+    report = db_manager.query_stats.snapshot()
+
+    listing = report[normalize_sql('SELECT id, title, priority, status, due_date, sort_position FROM todo_items')]
+    assert listing['count'] == 4 and listing['rows'] == 120
+    assert 0 <= listing['p50_ms'] <= listing['p95_ms'] <= listing['p99_ms'] <= listing['total_ms']
+    assert sum(statement['count'] for sql, statement in report.items() if 'status IN (?, ...)' in sql) == 2
+    db_manager.close_connection()
+
+
+def test_slow_queries_are_logged_with_plan(caplog):
+    """ Test_ID: 90
+    Test that statements above the threshold are logged together with their query plan."""
+    db_manager = DatabaseManager(':memory:', query_stats=QueryStats(slow_query_ms=0))
+    with caplog.at_level(logging.WARNING, logger='application.model.query_stats'):
+        db_manager.query_todo_items(status='Done', order_by='position')
+    assert any('Slow query' in message and 'idx_todo_items_status_position' in message for message in caplog.messages)
+    db_manager.close_connection()
+
+
+def test_get_stats_and_environment_switch(monkeypatch):
+    """ Test_ID: 91
+    Test that TaskManager.get_stats reports the cache and, once TODO_SQL_STATS switched instrumentation on, the queries,
+    and that instrumentation is off by default."""
+    monkeypatch.delenv('TODO_SQL_STATS', raising=False)
+    assert TaskManager(':memory:').get_stats()['queries'] is None
+
+    monkeypatch.setenv('TODO_SQL_STATS', '1')
+    monkeypatch.setenv('TODO_SLOW_QUERY_MS', '250')
+    task_manager = TaskManager(':memory:')
+    todo_item = task_manager.create_todo_item('Measured')
+    task_manager.get_todo_item(todo_item.id)
+    stats = task_manager.get_stats()
+    assert stats['cache']['hits'] == 1
+    assert task_manager.db_manager.query_stats.slow_query_ms == 250
+    assert any(sql.startswith('INSERT INTO todo_items') for sql in stats['queries'])
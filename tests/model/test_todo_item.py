@@ -1,5 +1,7 @@
 import unittest
-from application.model.todo_item import ToDoItem
+from unittest.mock import patch
+import arrow
+from application.model.todo_item import ToDoItem, DueDateFormatError, parse_due_date
 
 class TestToDoItem(unittest.TestCase):
     def test_todo_item_initialization(self):
@@ -21,5 +23,53 @@ class TestToDoItem(unittest.TestCase):
         self.assertEqual(todo_item.status, 'To Do')
         self.assertEqual(todo_item.due_date, '2022-01-01')
 
+
+
+class TestToDoItemFromRow(unittest.TestCase):
+    def test_from_row_defers_due_date_parsing(self):
+        """ Test_ID: 43
+        Test that a ToDoItem created from a database row parses its due date only when it is read."""
+        with patch('arrow.get', wraps=arrow.get) as mock_get:
+            todo_item = ToDoItem.from_row((1, 'Buy milk', 'High', 'To Do', '2022-01-01'))
+            self.assertEqual(todo_item.due_date_text, '2022-01-01')
+            mock_get.assert_not_called()
+            self.assertEqual(todo_item.due_date.format('YYYY-MM-DD'), '2022-01-01')
+            self.assertIs(todo_item.due_date, todo_item.due_date)  # Parsed once and kept
+            mock_get.assert_called_once()
+
+    def test_from_row_without_due_date(self):
+        """ Test_ID: 44
+        Test that a row without a due date gives a ToDoItem whose due date is None."""
+        todo_item = ToDoItem.from_row((1, 'Buy milk', None, None, None))
+        self.assertIsNone(todo_item.due_date)
+        self.assertIsNone(todo_item.due_date_text)
+
+    def test_todo_item_has_no_instance_dict(self):
+        """ Test_ID: 45
+        Test that ToDoItem uses __slots__ and rejects unknown attributes."""
+        todo_item = ToDoItem(1, 'Buy milk', 'High', 'To Do', arrow.get('2022-01-01'))
+        self.assertFalse(hasattr(todo_item, '__dict__'))
+        self.assertEqual(todo_item.due_date_text, '2022-01-01')
+        with self.assertRaises(AttributeError):
+            todo_item.notes = 'unknown'
+
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
+
+
+class TestParseDueDate(unittest.TestCase):
+    def test_parse_due_date(self):
+        """ Test_ID: 76
+        Test that due dates typed as YYYY/MM/DD or stored as YYYY-MM-DD are returned in the storage format, that text which is
+        not a date raises DueDateFormatError and that days which do not exist raise a plain ValueError."""
+        self.assertEqual(parse_due_date('2024/02/29'), '2024-02-29')
+        self.assertEqual(parse_due_date('2024-02-29'), '2024-02-29')
+        self.assertIsNone(parse_due_date(''))
+        for text in ('tomorrow', '2024/2/29', '2024-02/29', '29.02.2024'):
+            with self.assertRaises(DueDateFormatError):
+                parse_due_date(text)
+        for text in ('2023/02/29', '2024/13/01'):
+            with self.assertRaises(ValueError) as context:
+                parse_due_date(text)
+            self.assertNotIsInstance(context.exception, DueDateFormatError)
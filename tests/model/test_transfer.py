@@ -0,0 +1,114 @@
+import io
+import pytest
+from application.model.todo_item import ToDoItem
+from application.model.database_manager import DatabaseManager
+from application.model.transfer import export_todo_items, import_todo_items, detect_format
+from application.model.migrations import drop_title_search_triggers
+
+
+@pytest.fixture
+def db_manager():
+    """ Create an in-memory database with three todo items, one of them moved to the top of its column."""
+    db_manager = DatabaseManager(':memory:')
+    db_manager.insert_todo_items([
+        ToDoItem(None, 'Buy milk', 'High', 'To Do', '2024-03-01'),
+        ToDoItem(None, 'Write report, "final"', None, 'In Progress', None),
+        ToDoItem(None, 'Call mom', 'Low', 'To Do', None),
+    ])
+    db_manager.move_todo_item(3, 'To Do', before_id=1)
+    yield db_manager
+    db_manager.close_connection()
+
+
+def rows(db_manager):
+    return [(item.id, item.title, item.priority, item.status, item.due_date_text, item.position) for item in db_manager.iter_todo_items(order_by='id')]
+
+
+@pytest.mark.parametrize('format', ['csv', 'jsonl'])
+def test_export_import_round_trip(db_manager, format):
+    """ Test_ID: 77
+    Test that exporting a board and importing it into an empty database restores every item with its ID and position,
+    and that progress is reported after every chunk."""
+    file = io.StringIO(newline='')
+    exported = []
+    assert export_todo_items(db_manager, file, format, chunk_size=2, progress=exported.append) == 3
+    assert exported == [2, 3]
+
+    target = DatabaseManager(':memory:')
+    file.seek(0)
+    imported = []
+    assert import_todo_items(target, file, format, chunk_size=2, progress=imported.append) == 3
+    assert imported == [2, 3]
+    assert rows(target) == rows(db_manager)
+    target.close_connection()
+
+
+def test_import_upserts_by_id(db_manager):
+    """ Test_ID: 78
+    Test that an upsert replaces stored items with the same ID and inserts the others, that due dates in the YYYY/MM/DD
+    format of the edit dialog are accepted, and that without upsert every row becomes a new item."""
+    file = io.StringIO('id,title,priority,status,due_date\n1,Buy oat milk,Low,Done,2024/04/01\n,New task,,To Do,\n', newline='')
+    assert import_todo_items(db_manager, file) == 2
+    assert db_manager.get_todo_item(1).title == 'Buy oat milk'
+    assert db_manager.get_todo_item(1).due_date_text == '2024-04-01'
+    assert db_manager.get_todo_item(4).title == 'New task'
+
+    file = io.StringIO('{"id": 1, "title": "Copy of milk"}\n', newline='')
+    assert import_todo_items(db_manager, file, 'jsonl', upsert=False) == 1
+    assert db_manager.get_todo_item(1).title == 'Buy oat milk'
+    assert db_manager.get_todo_item(5).title == 'Copy of milk'
+
+
+def test_import_rejects_invalid_rows(db_manager):
+    """ Test_ID: 79
+    Test that an invalid row stops the import with its line number, keeping the chunks committed before it, and that the
+    format of a file is detected from its extension."""
+    file = io.StringIO('title,due_date\nFirst,\nSecond,2024/02/30\n', newline='')
+    with pytest.raises(ValueError, match='Line 3'):
+        import_todo_items(db_manager, file, chunk_size=1)
+    assert [row[1] for row in rows(db_manager)][-1] == 'First'
+    assert detect_format('board.CSV') == 'csv' and detect_format('board.jsonl') == 'jsonl'
+    with pytest.raises(ValueError):
+        detect_format('board.xlsx')
+
+
+@pytest.mark.parametrize('line, message', [
+    ('[1, 2]', 'Line 2: Expected an object'),
+    ('{"title": 5}', 'Line 2: title must be a string'),
+    ('{"title": "Due", "due_date": 20240101}', 'Line 2: due_date must be a string'),
+    ('{"title": "Bad id", "id": [1]}', 'Line 2: '),
+])
+def test_import_rejects_json_values_of_wrong_type(db_manager, line, message):
+    """ Test_ID: 101
+    Test that JSON Lines rows that are valid JSON but not an object, or hold fields of the wrong type, are rejected with
+    a ValueError naming their line."""
+    file = io.StringIO('{"title": "Valid"}\n' + line + '\n')
+    with pytest.raises(ValueError, match=message):
+        import_todo_items(db_manager, file, format='jsonl')
+
+
+def test_bulk_import_rebuilds_search_index(tmp_path):
+    """ Test_ID: 80
+    Test that titles imported in several chunks are found by the search once the import finished, and that a database
+    left without the search triggers by an interrupted import is repaired when it is opened again."""
+    db_path = str(tmp_path / 'bulk.db')
+    db_manager = DatabaseManager(db_path)
+    if not db_manager.has_search_index():
+        pytest.skip("SQLite was built without FTS5")
+    file = io.StringIO('title\nPlan trip\nBook flight\nPack bags\n', newline='')
+    assert import_todo_items(db_manager, file, chunk_size=2) == 3
+    assert [item.title for item in db_manager.search_todo_items('flight')] == ['Book flight']
+
+    with pytest.raises(RuntimeError):
+        with db_manager.deferred_search_index():
+            db_manager.insert_todo_items([ToDoItem(None, 'Rent car', None, 'To Do', None)])
+            raise RuntimeError("Interrupted")  # The index is still rebuilt when the block exits
+    assert [item.title for item in db_manager.search_todo_items('car')] == ['Rent car']
+
+    drop_title_search_triggers(db_manager.connection)  # As if the process died inside the block
+    db_manager.connection.execute("INSERT INTO todo_items (title) VALUES ('Buy sunscreen')")
+    db_manager.connection.commit()
+    db_manager.close_connection()
+    db_manager = DatabaseManager(db_path)
+    assert [item.title for item in db_manager.search_todo_items('sunscreen')] == ['Buy sunscreen']
+    db_manager.close_connection()
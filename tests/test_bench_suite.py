@@ -0,0 +1,34 @@
+from benchmarks.bench_suite import compare, format_size, parse_size
+
+
+def report(**metrics):
+    """ Return a report with one metric per keyword, given as (higher_is_better, runs); the value is the median of the runs."""
+    return {'metrics': {name: {'value': sorted(runs)[len(runs) // 2], 'runs': runs, 'unit': 'ops/s',
+                               'higher_is_better': higher_is_better}
+                        for name, (higher_is_better, runs) in metrics.items()}}
+
+
+def test_compare_reports_only_separated_regressions():
+    """ Test_ID: 106
+    Test that compare reports an improvement as a positive change, flags a worse metric only if all its runs are worse
+    than all runs of the baseline, and skips metrics that are missing or zero in the baseline."""
+    baseline = report(improved=(True, [90, 100, 110]), regressed=(True, [90, 100, 110]), noisy=(True, [70, 100, 130]),
+                      slower=(False, [9, 10, 11]), zero=(True, [0, 0, 0]))
+    current = report(improved=(True, [140, 150, 160]), regressed=(True, [60, 70, 80]), noisy=(True, [60, 70, 110]),
+                     slower=(False, [14, 15, 16]), zero=(True, [5, 5, 5]), new=(True, [1, 1, 1]))
+    rows = {row[0]: row[1:] for row in compare(current, baseline, 0.1)}
+    assert set(rows) == {'improved', 'regressed', 'noisy', 'slower'}
+    assert rows['improved'] == (100, 150, 0.5, False)
+    assert rows['regressed'] == (100, 70, -0.3, True)
+    assert rows['noisy'][2:] == (-0.3, False)  # As much worse as regressed, but the runs overlap
+    assert rows['slower'] == (10, 15, -0.5, True)  # Lower is better, so a higher value is a negative change
+    assert compare(current, baseline, 0.6) == [(name, *rows[name][:3], False) for name in rows]
+
+
+def test_parse_and_format_size():
+    """ Test_ID: 107
+    Test that board sizes are parsed with the k and m suffixes and formatted back as in the metric names."""
+    assert parse_size('1000') == 1000
+    assert parse_size('1k') == 1000
+    assert parse_size(' 1M ') == 1000000
+    assert [format_size(size) for size in (500, 1000, 1500, 1000000)] == ['500', '1k', '1500', '1m']
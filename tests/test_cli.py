@@ -0,0 +1,62 @@
+import io
+import subprocess
+import sys
+import pytest
+from application.cli import main
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """ Return a function that runs a command line against a database in tmp_path and returns the exit code and stdout."""
+    monkeypatch.setenv('TODO_DB_PATH', str(tmp_path / 'cli.db'))
+
+    def run(*argv, stdin=''):
+        monkeypatch.setattr(sys, 'stdin', io.StringIO(stdin))
+        out = io.StringIO()
+        return main(list(argv), out=out), out.getvalue()
+    return run
+
+
+def test_add_list_move_delete(run):
+    """ Test_ID: 82
+    Test that tasks can be added, listed with filters, moved and deleted from the command line, and that an invalid due
+    date or a move next to an unknown task fails with exit code 1."""
+    assert run('add', 'Buy milk', '--priority', 'High', '--due', '2024/05/01') == (0, '1\n')
+    assert run('add', 'Call mom') == (0, '2\n')
+    assert run('add', 'Broken', '--due', '2024/02/30')[0] == 1
+    assert run('move', '2', 'Done') == (0, '')
+    assert run('move', '1', 'To Do', '--before', '999')[0] == 1
+    assert run('list', '--status', 'To Do') == (0, '1\tTo Do\tHigh\t2024-05-01\tBuy milk\n')
+    assert run('stats') == (0, 'Done\t1\nTo Do\t1\nTotal\t2\n')
+    assert run('delete', '1', '2') == (0, '2\n')
+    assert run('list') == (0, '')
+
+
+def test_batch_runs_in_one_transaction(run):
+    """ Test_ID: 83
+    Test that batch applies all commands from stdin and prints their output, and that a failing line rolls back every
+    command of the batch and names the line."""
+    commands = '# Plan the week\nadd "Write report" --priority Low\n\nadd Review\nmove 1 Done\n'
+    assert run('batch', stdin=commands) == (0, '1\n2\n')
+    assert run('batch', stdin='add Discarded\nmove 99 Done\n') == (1, '')
+    assert run('batch', stdin='add Discarded\nrename 1\n') == (1, '')
+    assert run('list', '--order-by', 'title') == (0, '2\tTo Do\t\t\tReview\n1\tDone\tLow\t\tWrite report\n')
+
+
+def test_unopenable_files_are_reported_as_errors(run, tmp_path, capsys):
+    """ Test_ID: 102
+    Test that a missing import file and a database that cannot be opened fail with exit code 1 and an error line
+    instead of a traceback."""
+    assert run('import', str(tmp_path / 'missing.csv')) == (1, '')
+    assert "error: [Errno 2]" in capsys.readouterr().err
+    assert run('--db', str(tmp_path / 'missing' / 'cli.db'), 'stats') == (1, '')
+    assert capsys.readouterr().err == "error: unable to open database file\n"
+
+
+def test_cli_does_not_import_qt(tmp_path):
+    """ Test_ID: 84
+    Test that running a command imports neither PySide6 nor arrow, so scripts do not pay for the GUI."""
+    code = ("import sys; from application.cli import main; "
+            f"main(['--db', {str(tmp_path / 'cli.db')!r}, 'add', 'Headless', '--due', '2024/05/01']); "
+            "sys.exit(any(name.split('.')[0] in ('PySide6', 'arrow') for name in sys.modules))")
+    assert subprocess.run([sys.executable, '-c', code], capture_output=True).returncode == 0
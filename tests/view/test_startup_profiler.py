@@ -0,0 +1,48 @@
+import time
+import pytest
+from unittest.mock import MagicMock
+from PySide6.QtWidgets import QApplication
+from application.view.user_interface import UserInterface
+from application.view.startup_profiler import StartupProfiler
+from application.model.todo_item import ToDoItem
+
+@pytest.fixture(scope="function", autouse=True) # This fixture will run before and after each test function
+def setup_teardown_application(monkeypatch):
+    """Setup: Create QApplication instance if it doesn't exist
+    User interfaces created without a controller open an in-memory database"""
+    monkeypatch.setenv('TODO_DB_PATH', ':memory:')
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+
+    yield
+
+    # Teardown: Delete QApplication instance
+    app.quit()
+    del app
+
+class TestStartupProfiler:
+    def test_records_first_task_and_full_board(self):
+        """ Test_ID: 64
+        Test that the profiler records the first task and the full board once every column shows its first page.
+        The finished signal should be emitted once and the report should list all milestones."""
+        # Arrange
+        user_interface = UserInterface(None, None)
+        profiler = StartupProfiler(time.perf_counter())
+        profiler.watch(user_interface)
+        finished_spy = MagicMock()
+        profiler.finished.connect(finished_spy)
+        todo_model, in_progress_model, done_model = (column.model() for column in user_interface.columns)
+
+        # Act
+        todo_model.show_first_page([])
+        in_progress_model.show_first_page([ToDoItem(1, 'First', None, 'In Progress', None)])
+        first_task_before_full_board = profiler.time_to_full_board is None and profiler.time_to_first_task is not None
+        done_model.show_first_page([])
+
+        # Assert
+        assert first_task_before_full_board
+        assert profiler.time_to_full_board >= profiler.time_to_first_task
+        finished_spy.assert_called_once()
+        assert "time to first task" in profiler.report()
+        assert "time to window:     n/a" in profiler.report()
@@ -0,0 +1,102 @@
+import threading
+import pytest
+from unittest.mock import MagicMock
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtWidgets import QApplication
+from application.view.task_worker import TaskWorker
+from application.view.change_feed import ChangeFeed
+
+@pytest.fixture(scope="function", autouse=True) # This fixture will run before and after each test function
+def setup_teardown_application():
+    """Setup: Create QApplication instance if it doesn't exist"""
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+
+    yield
+
+    # Teardown: Delete QApplication instance
+    app.quit()
+    del app
+
+class TestTaskWorker:
+    def test_submit_delivers_in_gui_thread(self):
+        """ Test_ID: 59
+        Test that a submitted call runs on a background thread and its result is delivered in the GUI thread.
+        The busyChanged signal should report the start and the end of the work."""
+        # Arrange
+        worker = TaskWorker()
+        busy = []
+        worker.busyChanged.connect(busy.append)
+        call_threads = []
+        results = []
+
+        def call(value):
+            call_threads.append(threading.current_thread())
+            return value * 2
+
+        # Act
+        worker.submit(call, 21, on_result=lambda result: results.append((result, threading.current_thread())))
+        worker.wait_for_done()
+
+        # Assert
+        assert results == [(42, threading.main_thread())]
+        assert call_threads[0] is not threading.main_thread()
+        assert busy == [True, False]
+
+    def test_writes_run_in_order_and_errors_are_reported(self):
+        """ Test_ID: 60
+        Test that writes run one after another in submission order and that an exception is passed to on_error."""
+        # Arrange
+        worker = TaskWorker()
+        order = []
+        errors = []
+
+        def fail():
+            raise ValueError("Write failed")
+
+        # Act
+        for i in range(20):
+            worker.submit(order.append, i, write=True)
+        worker.submit(fail, write=True, on_error=errors.append)
+        worker.wait_for_done()
+
+        # Assert
+        assert order == list(range(20))
+        assert isinstance(errors[0], ValueError)
+
+    def test_coalesce_runs_latest_call_once(self):
+        """ Test_ID: 61
+        Test that repeated coalesce calls with the same key result in one call of the latest function."""
+        # Arrange
+        worker = TaskWorker()
+        calls = []
+
+        # Act
+        for i in range(5):
+            worker.coalesce('refresh', lambda i=i: calls.append(i), delay_ms=0)
+        while worker._timers['refresh'].isActive():
+            QCoreApplication.processEvents()
+
+        # Assert
+        assert calls == [4]
+
+    def test_untracked_calls_do_not_signal_busy(self):
+        """ Test_ID: 100
+        Test that calls submitted with track_busy=False, like the polls of the ChangeFeed, run without emitting busyChanged,
+        and that wait_for_done still waits for them."""
+        # Arrange
+        worker = TaskWorker()
+        feed = ChangeFeed(MagicMock(), worker, poll_interval_ms=0)
+        busy = []
+        worker.busyChanged.connect(busy.append)
+
+        # Act
+        feed.poll()
+        worker.submit(lambda: None, track_busy=False)
+        worker.wait_for_done()
+
+        # Assert
+        assert busy == []
+        feed.controller.poll_external_changes.assert_called_once()
+        assert worker.in_flight == 0 and worker.busy_calls == 0
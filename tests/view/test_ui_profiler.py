@@ -0,0 +1,82 @@
+import json
+import time
+import pytest
+from PySide6.QtTest import QTest
+from PySide6.QtWidgets import QApplication
+from application.view.user_interface import UserInterface, CustomListView
+from application.view.ui_profiler import UIProfiler
+from application.model.todo_item import ToDoItem
+
+@pytest.fixture(scope="function", autouse=True) # This fixture will run before and after each test function
+def setup_teardown_application(monkeypatch):
+    """Setup: Create QApplication instance if it doesn't exist
+    User interfaces created without a controller open an in-memory database"""
+    monkeypatch.setenv('TODO_DB_PATH', ':memory:')
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+
+    yield
+
+    # Teardown: Delete QApplication instance
+    app.quit()
+    del app
+
+@pytest.fixture
+def profiler():
+    """ Install a profiler for one test and restore the original methods afterwards."""
+    profiler = UIProfiler(stall_threshold_ms=50)
+    profiler.install()
+    yield profiler
+    profiler.uninstall()
+
+class TestUIProfiler:
+    def test_times_handlers_and_counts_rows(self, profiler):
+        """ Test_ID: 92
+        Test that handlers of a UserInterface created after installing the profiler are timed, that the rows added to
+        each column are counted per reload, that the overlay toggles and that uninstalling restores the original methods."""
+        # Arrange
+        original = profiler._originals[0][2]  # UserInterface.update_kanban_board
+        user_interface = UserInterface(None, None)
+        profiler.watch(user_interface)
+
+        # Act
+        user_interface.update_kanban_board([ToDoItem(1, 'First', None, 'To Do', None), ToDoItem(2, 'Second', None, 'Done', None)])
+        user_interface.apply_board_changes(upserted=[ToDoItem(3, 'Third', None, 'To Do', None)])
+        report = profiler.report()
+
+        # Assert
+        assert report['handlers']['UserInterface.update_kanban_board']['count'] == 1
+        assert report['handlers']['TodoListModel.set_todos']['count'] == 3
+        assert report['handlers']['UserInterface.update_kanban_board']['gui_thread']
+        assert report['rows']['To Do'] == {'reloads': 1, 'reloaded_rows': 1, 'inserted_rows': 1, 'rows_per_reload': 1.0}
+        assert "To Do: 1 reloads" in profiler.summary()
+        profiler.toggle_overlay()  # F12
+        assert not profiler.overlay.isHidden() and profiler.overlay.text().startswith("stalls: 0")
+        profiler.toggle_overlay()
+        assert profiler.overlay.isHidden()
+        profiler.uninstall()
+        assert UserInterface.update_kanban_board is original
+        assert 'paintEvent' not in CustomListView.__dict__
+
+    def test_detects_event_loop_stalls(self, profiler, tmp_path):
+        """ Test_ID: 93
+        Test that blocking the GUI thread is reported as a stall naming the handler that blocked it, and that the report
+        is written as JSON."""
+        # Arrange
+        user_interface = UserInterface(None, None)
+        profiler.watch(user_interface)
+        profiler._recent.clear()
+
+        # Act
+        QTest.qWait(50)
+        started = time.perf_counter()
+        time.sleep(0.12)  # Blocks the event loop like a slow handler
+        profiler.record('UserInterface.apply_board_changes', started, time.perf_counter())
+        QTest.qWait(50)
+        profiler.dump(tmp_path / 'profile.json')
+
+        # Assert
+        event_loop = json.loads((tmp_path / 'profile.json').read_text())['event_loop']
+        assert event_loop['stalls'] >= 1 and event_loop['max_stall_ms'] >= 100
+        assert event_loop['worst_stalls'][0]['handlers'][0].startswith('UserInterface.apply_board_changes')
@@ -1,14 +1,20 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from PySide6.QtWidgets import QApplication, QListWidgetItem, QWidget
+from PySide6.QtWidgets import QApplication, QWidget
 from PySide6.QtCore import Qt, QEvent, QPointF
 from PySide6.QtGui import QMouseEvent
-from application.view.user_interface import UserInterface, CustomListWidget
+from application.view.user_interface import UserInterface, CustomListView
+from application.view.todo_list_model import TodoListModel
+from application.view.task_worker import TaskWorker
+from application.model.database_manager import DatabaseManager, DatabaseError
 from application.controller.task_manager import TaskManager
+from application.model.todo_item import ToDoItem
 
 @pytest.fixture(scope="function", autouse=True) # This fixture will run before and after each test function
-def setup_teardown_application():
-    """Setup: Create QApplication instance if it doesn't exist"""
+def setup_teardown_application(monkeypatch):
+    """Setup: Create QApplication instance if it doesn't exist
+    User interfaces created without a controller open an in-memory database"""
+    monkeypatch.setenv('TODO_DB_PATH', ':memory:')
     app = QApplication.instance()
     if app is None:
         app = QApplication([])
@@ -22,10 +28,9 @@ def setup_teardown_application():
 class TestUserInterface:
     def test_add_todo(self, mocker):
         """ Test_ID: 10
-        Test that the add_todo method calls the create_todo_item method of the TaskManager class.
+        Test that the add_todo method calls the create_todo_item method of the injected controller.
         The method should also clear the todo_input field."""
         # Arrange
-        mock_create_todo_item = mocker.patch('application.controller.task_manager.TaskManager.create_todo_item')
         mock_model = mocker.MagicMock()
         mock_controller = mocker.MagicMock()
         user_interface = UserInterface(mock_model, mock_controller)
@@ -34,11 +39,77 @@ class TestUserInterface:
 
         # Act
         user_interface.add_todo()
+        user_interface.worker.wait_for_done()
 
         # Assert
-        mock_create_todo_item.assert_called_once_with("Test ToDo Item") 
+        mock_controller.create_todo_item.assert_called_once_with("Test ToDo Item")
         user_interface.todo_input.clear.assert_called_once()
 
+    def test_columns_share_controller(self):
+        """ Test_ID: 62
+        Test that the columns use the controller passed to the UserInterface instead of opening their own database."""
+        # Arrange
+        controller = TaskManager(DatabaseManager(':memory:'))
+
+        # Act
+        user_interface = UserInterface(controller.db_manager, controller)
+
+        # Assert
+        assert all(column.controller is controller for column in user_interface.columns)
+        assert all(column.model().controller is controller for column in user_interface.columns)
+
+    def test_move_board_item_rolls_back_on_error(self, mocker):
+        """ Test_ID: 65
+        Test that a moved ToDo is shown in its new column before the move is written.
+        If the write fails, the ToDo should be put back at its old place and an error should be shown."""
+        # Arrange
+        mock_critical = mocker.patch('application.view.user_interface.QMessageBox.critical')
+        user_interface = UserInterface(None, None)
+        user_interface.update_kanban_board([ToDoItem(1, 'First', None, 'To Do', None, position=1), ToDoItem(2, 'Second', None, 'Done', None, position=2)])
+        user_interface.controller = MagicMock()
+        user_interface.controller.move_todo_item.side_effect = DatabaseError("Disk full")
+        done_model = user_interface.done_list_widget.model()
+
+        # Act
+        user_interface.move_board_item(1, 'Done', after=None, before=done_model.todo_at(0))
+        moved_rows = [done_model.index(row).data() for row in range(done_model.rowCount())]
+        user_interface.worker.wait_for_done()
+
+        # Assert
+        assert moved_rows == ['First', 'Second']
+        assert user_interface.todo_list_widget.model().index(0).data() == 'First'
+        assert done_model.rowCount() == 1
+        mock_critical.assert_called_once()
+
+    def test_board_follows_change_events(self, tmp_path):
+        """ Test_ID: 71
+        Test that the board shows the changes of its own controller and of another connection to the same database.
+        Only the changed ToDos should be updated, without reloading the columns."""
+        # Arrange
+        db_path = str(tmp_path / 'shared.db')
+        user_interface = UserInterface(None, TaskManager(db_path))
+        user_interface.change_feed.poll_timer.stop()  # Polled by hand below
+        other_instance = TaskManager(db_path)
+        todo_model = user_interface.todo_list_widget.model()
+        user_interface.update_kanban_board([])
+        reset_spy = MagicMock()
+        todo_model.modelReset.connect(reset_spy)
+
+        # Act
+        todo = user_interface.controller.create_todo_item('Own', status='To Do')
+        QApplication.processEvents()  # Deliver the queued change event
+        own_rows = todo_model.rowCount()
+        other_instance.update_todo_item(todo.id, 'Renamed elsewhere', None, None, None)
+        other_instance.create_todo_item('Created elsewhere', status='Done')
+        user_interface.change_feed.poll()
+        user_interface.worker.wait_for_done()
+
+        # Assert
+        assert own_rows == 1
+        assert todo_model.index(0).data() == 'Renamed elsewhere'
+        assert user_interface.done_list_widget.model().index(0).data() == 'Created elsewhere'
+        reset_spy.assert_not_called()
+
     def test_create_labeled_widget(self):
         """ Test_ID: 11
         Test that the create_labeled_widget method creates a widget with a QLabel and another widget as children.
@@ -57,75 +128,269 @@ class TestUserInterface:
         assert result.layout().itemAt(1).widget() == widget
 
 
+    def test_filter_kanban_board(self):
+        """ Test_ID: 55
+        Test that the search shows only the matching ToDos in their columns.
+        An empty query should load the first page of every column again."""
+        # Arrange
+        user_interface = UserInterface(None, None)
+        user_interface.controller.create_todo_items([ToDoItem(None, 'ToDo 1', None, 'To Do', None), ToDoItem(None, 'ToDo 2', None, 'To Do', None),
+                                                     ToDoItem(None, 'Finished 2', None, 'Done', None)])
+        user_interface._load_columns(user_interface.columns)
+        user_interface.worker.wait_for_done()
+        todo_model = user_interface.todo_list_widget.model()
+
+        # Act
+        user_interface.filter_kanban_board("2")
+        user_interface.worker.wait_for_done()
+
+        # Assert
+        assert [todo_model.index(row).data() for row in range(todo_model.rowCount())] == ['ToDo 2']
+        assert user_interface.done_list_widget.model().rowCount() == 1
+        user_interface.filter_kanban_board("")
+        user_interface.worker.wait_for_done()
+        assert todo_model.rowCount() == 2
+        assert user_interface.search_matches is None
+
+    def test_search_finds_tasks_beyond_the_first_page(self):
+        """ Test_ID: 96
+        Test that a search shows matches that are not in the loaded pages of a column, because they sort after the
+        first page and were never scrolled into view."""
+        # Arrange
+        user_interface = UserInterface(None, None)
+        user_interface.controller.create_todo_items([ToDoItem(None, f'Task {i}', None, 'To Do', None) for i in range(500)])
+        user_interface.controller.create_todo_item('zebra needle', status='To Do')
+        user_interface._load_columns(user_interface.columns)
+        user_interface.worker.wait_for_done()
+        todo_model = user_interface.todo_list_widget.model()
+        assert todo_model.rowCount() == todo_model.page_size
+
+        # Act
+        user_interface.filter_kanban_board("zebra")
+        user_interface.worker.wait_for_done()
+
+        # Assert
+        assert todo_model.rowCount() == 1
+        assert todo_model.index(0).data() == 'zebra needle'
+        assert not user_interface.todo_list_widget.isRowHidden(0)
+
+    def test_apply_board_changes(self):
+        """ Test_ID: 56
+        Test that changes are applied to the board without reloading the columns.
+        A ToDo with a new status should move to the matching column, a new title should be shown in place,
+        a new ToDo should be inserted and a deleted ToDo should be removed."""
+        # Arrange
+        user_interface = UserInterface(None, None)
+        user_interface.update_kanban_board([ToDoItem(1, 'First', None, 'To Do', None), ToDoItem(2, 'Second', None, 'To Do', None)])
+        todo_model = user_interface.todo_list_widget.model()
+        reset_spy = MagicMock()
+        todo_model.modelReset.connect(reset_spy)
+
+        # Act
+        user_interface.apply_board_changes(upserted=[ToDoItem(1, 'First renamed', None, 'Done', None), ToDoItem(3, 'Third', None, 'In Progress', None)])
+        user_interface.apply_board_changes(upserted=[ToDoItem(2, 'Second renamed', None, 'To Do', None)])
+
+        # Assert
+        reset_spy.assert_not_called()
+        assert todo_model.rowCount() == 1
+        assert todo_model.index(0).data() == 'Second renamed'
+        assert user_interface.done_list_widget.model().index(0).data() == 'First renamed'
+        assert user_interface.in_progress_list_widget.model().index(0).data(Qt.UserRole) == 3
+        user_interface.apply_board_changes(deleted_ids=[2])
+        assert todo_model.rowCount() == 0
+
+
+class TestTodoListModel:
+    def test_fetch_more_loads_pages(self):
+        """ Test_ID: 57
+        Test that the column model loads the ToDos of its status page by page.
+        The To Do column should also show ToDos without status."""
+        # Arrange
+        database_manager = DatabaseManager(':memory:')
+        database_manager.insert_todo_items([ToDoItem(None, f'Task {i}', None, None if i % 2 else 'To Do', None) for i in range(5)])
+        database_manager.insert_todo_item(ToDoItem(None, 'Finished', None, 'Done', None))
+        controller = MagicMock(query_todo_items=database_manager.query_todo_items)
+        model = TodoListModel(controller, 'To Do', page_size=2)
+
+        # Act
+        model.reload()
+
+        # Assert
+        assert model.rowCount() == 2
+        assert model.canFetchMore()
+        while model.canFetchMore():
+            model.fetchMore()
+        assert [model.index(row).data() for row in range(model.rowCount())] == [f'Task {i}' for i in range(5)]
+        database_manager.close_connection()
+
+    def test_fetch_more_queries_in_background(self):
+        """ Test_ID: 97
+        Test that fetchMore with a worker returns without querying in the calling thread and appends the page once it
+        arrived, and that a page requested before the column was reloaded is dropped."""
+        # Arrange
+        database_manager = DatabaseManager(':memory:')
+        database_manager.insert_todo_items([ToDoItem(None, f'Task {i}', None, 'To Do', None) for i in range(5)])
+        worker = TaskWorker()
+        model = TodoListModel(TaskManager(database_manager), 'To Do', page_size=2, worker=worker)
+        model.reload()
+
+        # Act
+        model.fetchMore()
+        pending_rows, pending_can_fetch = model.rowCount(), model.canFetchMore()
+        worker.wait_for_done()
+        loaded_rows = model.rowCount()
+        model.fetchMore()
+        model.reload()
+        worker.wait_for_done()
+
+        # Assert
+        assert (pending_rows, pending_can_fetch) == (2, False)
+        assert loaded_rows == 4
+        assert [model.index(row).data() for row in range(model.rowCount())] == ['Task 0', 'Task 1']
+        assert model.canFetchMore()
+        database_manager.close_connection()
+
+    def test_upsert_keeps_sort_order(self):
+        """ Test_ID: 58
+        Test that an inserted or changed ToDo is placed at its sorted position.
+        A ToDo that sorts after the loaded rows is left for fetchMore."""
+        # Arrange
+        model = TodoListModel(MagicMock(), 'Done')
+        model.order_by = 'priority'
+        model.set_todos([ToDoItem(1, 'Low', 'Low', 'Done', None), ToDoItem(2, 'High', 'High', 'Done', None)])
+
+        # Act
+        model.upsert(ToDoItem(3, 'Medium', 'Medium', 'Done', None))
+        model.upsert(ToDoItem(1, 'Now high', 'High', 'Done', None))
+
+        # Assert
+        assert [model.index(row).data() for row in range(model.rowCount())] == ['Now high', 'High', 'Medium']
+        assert model.row_of(3) == 2
+
+
+    def test_sort_uses_in_memory_indexes(self):
+        """ Test_ID: 74
+        Test that a fully loaded column switches its sort order without querying the controller.
+        Changes applied before the switch should be reflected in every order."""
+        # Arrange
+        controller = MagicMock()
+        model = TodoListModel(controller, 'Done')
+        model.set_todos([ToDoItem(1, 'Banana', 'Low', 'Done', '2024-03-01'), ToDoItem(2, 'Cherry', 'High', 'Done', None)])
+        model.upsert(ToDoItem(3, 'Apple', 'Medium', 'Done', '2024-01-01'))
+        model.upsert(ToDoItem(2, 'Avocado', 'High', 'Done', '2024-02-01'))
+        model.remove(1)
+
+        # Act
+        titles = {}
+        for order_by in ('title', 'priority', 'due_date', 'position'):
+            assert model.sort(order_by)
+            titles[order_by] = [model.index(row).data() for row in range(model.rowCount())]
+
+        # Assert
+        controller.query_todo_items.assert_not_called()
+        assert titles == {'title': ['Apple', 'Avocado'], 'priority': ['Avocado', 'Apple'], 'due_date': ['Apple', 'Avocado'], 'position': ['Avocado', 'Apple']}
+        assert model.row_of(3) == 1
+
+    def test_pages_extend_only_the_shown_order(self):
+        """ Test_ID: 98
+        Test that pages loaded by fetchMore only extend the index of the shown order and that sort builds the index of
+        another order once, which upsert keeps up to date afterwards."""
+        # Arrange
+        database_manager = DatabaseManager(':memory:')
+        database_manager.insert_todo_items([ToDoItem(None, title, None, 'Done', None) for title in ('Cherry', 'Apple', 'Banana')])
+        model = TodoListModel(TaskManager(database_manager), 'Done', page_size=2)
+        model.reload()
+        model.fetchMore()
+
+        # Act
+        shown_indexes = set(model._indexes)
+        model.sort('title')
+        title_index = model._indexes['title']
+        model.upsert(ToDoItem(4, 'Avocado', None, 'Done', None))
+        model.sort('position')
+        model.sort('title')
+
+        # Assert
+        assert shown_indexes == {'position'}
+        assert model._indexes['title'] is title_index
+        assert [model.index(row).data() for row in range(model.rowCount())] == ['Apple', 'Avocado', 'Banana', 'Cherry']
+        database_manager.close_connection()
+
+    def test_sort_requires_all_rows(self):
+        """ Test_ID: 75
+        Test that a column that has not loaded all its ToDos cannot be sorted in memory and keeps its order."""
+        # Arrange
+        model = TodoListModel(MagicMock(), 'Done', page_size=1)
+        model.show_first_page([ToDoItem(1, 'Loaded', None, 'Done', None)])
+
+        # Act
+        sorted_in_memory = model.sort('title')
 
-class TestCustomListWidget:
+        # Assert
+        assert not sorted_in_memory
+        assert model.order_by == 'position'
+
+
+class TestCustomListView:
     def test_custom_list_widget_drag(self):
         """ Test_ID: 12
-        Test that the startDrag method of the CustomListWidget class sets the correct MIME data.
-        The MIME data should contain the ID of the ToDoItem associated with the selected item.
-        The method should return the MIME data."""
+        Test that the startDrag method of the CustomListView class sets the correct MIME data.
+        The MIME data should contain the ID of the ToDoItem associated with the selected item."""
         # Arrange
         user_interface = UserInterface(None, None)
-        custom_list_widget = CustomListWidget(user_interface)
-        item = QListWidgetItem()
-        item.setData(Qt.UserRole, 123)
-        custom_list_widget.addItem(item)
-        custom_list_widget.setCurrentItem(item)  # Select the item
+        custom_list_view = CustomListView(user_interface, status='To Do')
+        custom_list_view.model().set_todos([ToDoItem(123, 'Drag me', None, 'To Do', None)])
+        index = custom_list_view.model().index(0)
+        custom_list_view.setCurrentIndex(index)  # Select the item
 
         # Act
-        custom_list_widget.startDrag(Qt.CopyAction)
+        custom_list_view.startDrag(Qt.CopyAction)
 
         # Assert
-        mime_data = custom_list_widget.mimeData([item])
+        mime_data = custom_list_view.model().mimeData([index])
         assert mime_data.text() == "123"
 
     def test_custom_list_widget_drop(self):
         """ Test_ID: 13
-        Test that the dropEvent method of the CustomListWidget class calls the update_todo_status method of the controller with the correct arguments.
-        The method should call the UserInterface's update_kanban_board method.
-        The method should update the status of the ToDoItem associated with the dropped item.
-        The method should return None."""
+        Test that the dropEvent method of the CustomListView class calls the move_todo_item method of the controller with the correct arguments.
+        A ToDo dropped below the rows of an empty column should be moved to the end of the column."""
         # Arrange
         user_interface = UserInterface(None, None)
-        custom_list_widget = CustomListWidget(user_interface, status="In Progress")
-        item = QListWidgetItem()
-        item.setData(Qt.UserRole, 123)
-        custom_list_widget.addItem(item)
+        custom_list_view = CustomListView(user_interface, status="In Progress")
 
-        # Mock the controller and the UserInterface's update_kanban_board method
+        # Mock the controller of the UserInterface, which moves the ToDo
         mock_controller = MagicMock()
-        custom_list_widget.controller = mock_controller  # Set the controller of the CustomListWidget instance
-        user_interface.update_kanban_board = MagicMock()
+        user_interface.controller = mock_controller
 
         # Act
         event = MagicMock()
         event.mimeData().text.return_value = "123"  # Return a string
-        custom_list_widget.dropEvent(event)
+        event.position.return_value = QPointF(5, 500)  # Below all rows
+        custom_list_view.dropEvent(event)
+        user_interface.worker.wait_for_done()
 
         # Assert
-        mock_controller.update_todo_status.assert_called_once_with(123, "In Progress")
-
+        mock_controller.move_todo_item.assert_called_once_with(123, "In Progress", None, None)
 
     def test_custom_list_widget_right_click(self):
         """ Test_ID: 14
-        Test that the mousePressEvent method of the CustomListWidget class emits the itemRightClicked signal when the right mouse button is pressed.
+        Test that the mousePressEvent method of the CustomListView class emits the itemRightClicked signal when the right mouse button is pressed.
         The method should emit the signal once."""
         
         # Arrange
         user_interface = UserInterface(None, None)
-        custom_list_widget = CustomListWidget(user_interface)
-        item = QListWidgetItem()
-        custom_list_widget.addItem(item)
+        custom_list_view = CustomListView(user_interface, status='To Do')
+        custom_list_view.model().set_todos([ToDoItem(1, 'Right-click me', None, 'To Do', None)])
+        custom_list_view.resize(200, 200)
 
         # Mock the itemRightClicked signal
         signal_mock = MagicMock()
-        custom_list_widget.itemRightClicked = signal_mock
+        custom_list_view.itemRightClicked = signal_mock
 
         # Act
-        event = QMouseEvent(QEvent.MouseButtonPress, QPointF(10, 10), Qt.RightButton, Qt.RightButton, Qt.NoModifier)
-        custom_list_widget.mousePressEvent(event)
+        event = QMouseEvent(QEvent.MouseButtonPress, QPointF(10, 5), QPointF(10, 5), Qt.RightButton, Qt.RightButton, Qt.NoModifier)
+        custom_list_view.mousePressEvent(event)
 
         # Assert
         signal_mock.emit.assert_called_once()
-        
-        
\ No newline at end of file
+        assert signal_mock.emit.call_args[0][0].data(Qt.UserRole) == 1